@@ -0,0 +1,122 @@
+# app/data/cache.py
+"""
+LRU caches: QueryCache for query results, keyed by (sql, params, table versions),
+and the plain LRUCache it is built on (the dashboard also keeps chart specs in one).
+
+Every write in app/data bumps its table's counter in `table_versions`, so a
+changed table simply produces a new key and stale results are never served.
+Entries also expire after `ttl` seconds to cover writers outside this app,
+and the least recently used entries are evicted once `max_bytes` is reached.
+`connect` is where the versions are read: pass the connection the loader
+reads its rows from (e.g. get_read_connection) so both see the same data.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from app.data.db import get_connection, get_table_versions
+from app.data.partitions import HOT_TABLE, MANIFEST, is_partition
+from app.data.rollups import ROLLUPS, VERSIONED_AS
+from app.data.search import SEARCH_INDEXES
+from app.data.sla import SLA_SKETCH
+
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+
+# Tables maintained by triggers (and views) -> the table whose version counter covers them
+_DERIVED_TABLES = {name: spec[0] for name, spec in ROLLUPS.items()}
+_DERIVED_TABLES.update({fts: table for table, (fts, _) in SEARCH_INDEXES.items()})
+_DERIVED_TABLES[SLA_SKETCH] = "it_tickets"
+_DERIVED_TABLES[MANIFEST] = HOT_TABLE
+_DERIVED_TABLES = {name: VERSIONED_AS.get(source, source) for name, source in _DERIVED_TABLES.items()}
+_DERIVED_TABLES.update(VERSIONED_AS)
+
+
+def tables_in(sql):
+    """
+    Names of the tables a SELECT reads from (FROM / JOIN targets).
+    Rollup and search index tables (and incident partitions) count as their source table,
+    whose counter covers them.
+    """
+    return [HOT_TABLE if is_partition(name) else _DERIVED_TABLES.get(name, name) for name in _TABLE_RE.findall(sql)]
+
+
+class LRUCache:
+    """
+    Thread-safe LRU of loaded values: `ttl` seconds per entry, evicting the least
+    recently used entries once the values' `sizeof` totals more than `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl=300, sizeof=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof or (lambda value: 0)
+        self._entries = OrderedDict()  # key -> (value, size, stored_at)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key, loader):
+        """Return the value cached under `key`, or call `loader()` and remember what it returns."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+
+        value = loader()
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return value  # too big to be worth keeping
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class QueryCache(LRUCache):
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl=300, sizeof=None, connect=get_connection):
+        super().__init__(max_bytes, ttl, sizeof)
+        self.connect = connect
+
+    def get_or_load(self, sql, params, loader):
+        """
+        Return the cached result for `sql` + `params`, or call `loader()`
+        and remember what it returns. Cached values are shared: treat them as read-only.
+        """
+        with self.connect() as conn:
+            versions = get_table_versions(conn, tables_in(sql))
+        return self.lookup((sql, tuple(params), versions), loader)
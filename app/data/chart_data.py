@@ -0,0 +1,111 @@
+# app/data/chart_data.py
+"""
+Shrinking the data behind a chart before it is sent to the browser.
+
+Altair embeds every row of a chart's DataFrame in the Vega-Lite spec, so a
+few years of per-hour counts means tens of thousands of points to ship and
+draw, far more than the chart is pixels wide. Time series are therefore
+downsampled with Largest-Triangle-Three-Buckets (LTTB): the x range is cut
+into as many buckets as the point budget allows and from each bucket the
+point forming the largest triangle with its neighbours is kept, which keeps
+the peaks and dips a plain average or every-n-th sample would lose. Pie
+charts keep their biggest slices and fold the long tail into "Other".
+
+frame_hash() fingerprints the (small, aggregated) data of a chart, so the
+dashboard can reuse a chart spec it has already built for the same numbers.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# Width assumed for a full-width chart in the dashboard's wide layout
+CHART_WIDTH_PX = 1200
+# Points a line chart may draw per horizontal pixel
+POINTS_PER_PX = 0.5
+# Slices a pie chart shows at most, "Other" included
+PIE_MAX_SLICES = 8
+# Slices smaller than this share of the total are folded into "Other" as well
+PIE_MIN_SHARE = 0.01
+OTHER_LABEL = "Other"
+
+
+def point_budget(width_px=CHART_WIDTH_PX, points_per_px=POINTS_PER_PX):
+    """Points worth drawing in a chart `width_px` pixels wide."""
+    return max(int(width_px * points_per_px), 3)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Positions of the `n_out` points LTTB keeps from the series (x, y), x ascending.
+    The first and last points are always kept; all positions if n_out >= len(x).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets between the first and the last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # average of the next bucket (just the last point for the final bucket)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # twice the area of the triangle (point a, candidate, next bucket's average)
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def downsample_series(df, x_col, y_col, max_points=None):
+    """`df` (sorted by `x_col`, numeric or datetime) cut down to at most `max_points` rows with LTTB."""
+    max_points = max_points or point_budget()
+    if len(df) <= max_points:
+        return df
+    x = df[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x.dtype):
+        x = x.to_numpy("datetime64[ns]").astype(np.int64)
+    keep = lttb_indices(x, df[y_col].to_numpy(np.float64), max_points)
+    return df.iloc[keep].reset_index(drop=True)
+
+
+def fold_other(count_df, label_col, value_col, max_slices=PIE_MAX_SLICES, min_share=PIE_MIN_SHARE):
+    """
+    The biggest rows of `count_df` (label | value), with the rest summed into one
+    OTHER_LABEL row. Past `max_slices` rows, the top `max_slices` - 1 are kept whatever
+    their share (so a long tail of tiny slices doesn't fold everything into "Other");
+    otherwise only the rows under `min_share` of the total are folded.
+    Unchanged if nothing needs folding.
+    """
+    ordered = count_df.sort_values(value_col, ascending=False, kind="stable")
+    values = ordered[value_col].to_numpy(np.float64)
+    if len(ordered) > max_slices:
+        keep = np.arange(len(ordered)) < max_slices - 1
+    else:
+        keep = values >= values.sum() * min_share
+        keep[0] = True  # the biggest slice stays, whatever `min_share` is
+    if keep.all():
+        return count_df
+
+    kept = ordered[keep]
+    folded = pd.DataFrame({
+        label_col: kept[label_col].astype(object).tolist() + [OTHER_LABEL],
+        value_col: kept[value_col].tolist() + [ordered[value_col][~keep].sum()],
+    })
+    # a real "Other" label among the kept rows is merged into the folded one
+    return folded.groupby(label_col, sort=False, as_index=False)[value_col].sum()
+
+
+def frame_hash(df):
+    """Hex digest of `df`'s column names and values (not its index)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\0".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,130 @@
+# app/data/correlation.py
+"""
+Which IT tickets were opened within N hours of a cyber incident.
+
+A pandas cross join of the two tables compares every incident with every
+ticket (N x M pairs). Here both sides are read in time order instead
+(incidents filtered by category / severity / status, tickets by status /
+priority, each ordered on its indexed epoch column), and every incident's
+window [t - before, t + after] is located in the sorted ticket times with two
+binary searches (np.searchsorted). Counting is O(N log M) once the inputs are
+sorted, whatever the window size; listing the pairs adds O(K) for K pairs.
+
+The *_query() builders return (sql, params) like app/data/queries.py, so the
+dashboard can read (and cache) the inputs with load_df(). The join only needs
+ids and epochs; the text columns are read afterwards for the few incidents and
+pairs actually shown (incident_details_query / ticket_details_query).
+correlate() does the whole thing on its own connection.
+"""
+import numpy as np
+import pandas as pd
+
+from app.data.db import get_connection
+from app.data.frames import read_frame
+from app.data.metrics import timed
+from app.data.partitions import ALL_VIEW
+from app.data.queries import build_where
+
+# Pairs listed at most by correlate() unless told otherwise
+DEFAULT_PAIR_LIMIT = 1000
+
+
+def incident_times_query(filters=None):
+    """
+    Ids and times of the incidents (archived months included) matching `filters` with a
+    usable timestamp, oldest first. Each table is read in order on its epoch index and merged.
+    """
+    where, params = build_where(ALL_VIEW, filters, extra=["timestamp_epoch IS NOT NULL"])
+    sql = f"SELECT incident_id, timestamp_epoch FROM {ALL_VIEW}{where} ORDER BY timestamp_epoch"
+    return sql, params
+
+
+def ticket_times_query(filters=None):
+    """Ids and times of the tickets matching `filters` with a usable created date, oldest first."""
+    where, params = build_where("it_tickets", filters, extra=["created_epoch IS NOT NULL"])
+    sql = f"SELECT ticket_id, created_epoch FROM it_tickets{where} ORDER BY created_epoch"
+    return sql, params
+
+
+def _ids_query(sql, ids):
+    ids = sorted({int(i) for i in ids})
+    return f"{sql} IN ({', '.join('?' * len(ids))})", ids
+
+
+def incident_details_query(incident_ids):
+    """The columns shown for the incidents `incident_ids` (only read for the rows on screen)."""
+    return _ids_query("SELECT incident_id, timestamp, severity, category, status, description "
+                      f"FROM {ALL_VIEW} WHERE incident_id", incident_ids)
+
+
+def ticket_details_query(ticket_ids):
+    """The columns shown for the tickets `ticket_ids`, prefixed ticket_ where they clash with incident columns."""
+    return _ids_query("SELECT ticket_id, created_date AS ticket_created, status AS ticket_status, issue "
+                      "FROM it_tickets WHERE ticket_id", ticket_ids)
+
+
+def match_windows(incident_epochs, ticket_epochs, after_hours, before_hours=0):
+    """
+    For each incident time, the slice [lo, hi) of the sorted `ticket_epochs` that lies
+    in [t - before_hours, t + after_hours] (both ends included).
+    """
+    ticket_epochs = np.asarray(ticket_epochs, dtype=np.int64)
+    incident_epochs = np.asarray(incident_epochs, dtype=np.int64)
+    lo = np.searchsorted(ticket_epochs, incident_epochs - int(before_hours * 3600), side="left")
+    hi = np.searchsorted(ticket_epochs, incident_epochs + int(after_hours * 3600), side="right")
+    return lo, hi
+
+
+def ticket_counts(incidents, tickets, after_hours, before_hours=0):
+    """`incidents` (from incident_times_query) plus a `tickets` column: tickets opened in each one's window."""
+    lo, hi = match_windows(incidents["timestamp_epoch"], tickets["created_epoch"], after_hours, before_hours)
+    return incidents.assign(tickets=hi - lo)
+
+
+def ticket_pairs(incidents, tickets, after_hours, before_hours=0, limit=None):
+    """
+    Matched (incident_id, ticket_id, hours_after) pairs in incident then ticket time order,
+    at most `limit` of them (see with_details() for the text columns). hours_after is the
+    ticket's created time minus the incident time (negative = opened before it).
+    """
+    lo, hi = match_windows(incidents["timestamp_epoch"], tickets["created_epoch"], after_hours, before_hours)
+    counts = hi - lo
+    if limit is not None:
+        # keep whole incidents up to the limit, then part of the next one
+        counts = np.minimum(counts, np.maximum(limit - (np.cumsum(counts) - counts), 0))
+    incident_index = np.repeat(np.arange(len(counts)), counts)
+    # position of each pair inside its incident's window: 0, 1, ... per incident
+    offsets = np.arange(len(incident_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+    ticket_index = lo[incident_index] + offsets
+
+    return pd.DataFrame({
+        "incident_id": incidents["incident_id"].to_numpy()[incident_index],
+        "ticket_id": tickets["ticket_id"].to_numpy()[ticket_index],
+        "hours_after": (tickets["created_epoch"].to_numpy(np.int64)[ticket_index]
+                        - incidents["timestamp_epoch"].to_numpy(np.int64)[incident_index]) / 3600,
+    })
+
+
+def with_details(frame, incident_details=None, ticket_details=None):
+    """`frame` with the columns of incident_details_query() / ticket_details_query() results joined on by id."""
+    for details, key in ((incident_details, "incident_id"), (ticket_details, "ticket_id")):
+        if details is not None:
+            frame = frame.merge(details, on=key, how="left")
+    return frame
+
+
+@timed("correlation.correlate")
+def correlate(after_hours, incident_filters=None, ticket_filters=None, before_hours=0, pair_limit=DEFAULT_PAIR_LIMIT):
+    """
+    Tickets opened within [-before_hours, +after_hours] of each incident matching `incident_filters`.
+    Returns (per-incident counts, first `pair_limit` matched pairs with their details);
+    see ticket_counts / ticket_pairs.
+    """
+    with get_connection() as conn:
+        incidents = read_frame(*incident_times_query(incident_filters), conn=conn)
+        tickets = read_frame(*ticket_times_query(ticket_filters), conn=conn)
+        pairs = ticket_pairs(incidents, tickets, after_hours, before_hours, pair_limit)
+        if len(pairs):
+            pairs = with_details(pairs, read_frame(*incident_details_query(pairs["incident_id"]), conn=conn),
+                                 read_frame(*ticket_details_query(pairs["ticket_id"]), conn=conn))
+    return ticket_counts(incidents, tickets, after_hours, before_hours), pairs
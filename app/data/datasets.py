@@ -1,37 +1,78 @@
 # app/data/datasets.py
-from app.data.db import connect_database
+from app.data.db import bump_table_version, get_connection
+from app.data.metrics import timed
+from app.data.queries import mutation_where
+from app.data.streaming import ITER_BATCH_ROWS, iter_table
+from app.data.write_behind import write_bulk, write_row, write_transaction
 
+@timed("datasets.insert_dataset")
 def insert_dataset(dataset_id, name, rows, columns, uploaded_by, upload_date):
-    conn = connect_database()
-    cur = conn.cursor()
+    with write_transaction() as conn:
+        cur = conn.cursor()
 
-    # Use INSERT OR REPLACE so the CSV-provided dataset_id is preserved
-    cur.execute("""
+        # Use INSERT OR REPLACE so the CSV-provided dataset_id is preserved
+        cur.execute("""
+            INSERT OR REPLACE INTO datasets_metadata (dataset_id, name, rows, columns, uploaded_by, upload_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (dataset_id, name, rows, columns, uploaded_by, upload_date))
+        bump_table_version(conn, "datasets_metadata")
+
+@timed("datasets.insert_datasets_many")
+def insert_datasets_many(conn, rows):
+    """
+    Insert many (dataset_id, name, rows, columns, uploaded_by, upload_date)
+    tuples on an existing connection. The caller owns the transaction
+    (and flushes queued write-behind changes first, like write_transaction()).
+    """
+    cur = conn.executemany("""
         INSERT OR REPLACE INTO datasets_metadata (dataset_id, name, rows, columns, uploaded_by, upload_date)
         VALUES (?, ?, ?, ?, ?, ?)
-    """, (dataset_id, name, rows, columns, uploaded_by, upload_date))
-
-    conn.commit()
-    conn.close()
+    """, rows)
+    bump_table_version(conn, "datasets_metadata")
+    return cur.rowcount
 
+@timed("datasets.get_all_datasets")
 def get_all_datasets():
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("SELECT dataset_id, name, rows, columns, uploaded_by, upload_date FROM datasets_metadata")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT dataset_id, name, rows, columns, uploaded_by, upload_date FROM datasets_metadata")
+        return cur.fetchall()
+
+# Columns get_all_datasets() returns, and the default for iter_datasets()
+DATASET_ROW_COLUMNS = ("dataset_id", "name", "rows", "columns", "uploaded_by", "upload_date")
+
+def iter_datasets(columns=DATASET_ROW_COLUMNS, batch_size=ITER_BATCH_ROWS, after_id=None, as_objects=False):
+    """
+    Stream datasets in dataset_id order, `batch_size` rows per fetch (see app/data/streaming.py).
+    `after_id` resumes after the last dataset_id seen; `as_objects` yields row objects instead of tuples.
+    """
+    return iter_table("datasets_metadata", columns, batch_size, after_id, as_objects)
 
+@timed("datasets.update_dataset_rows")
 def update_dataset_rows(dataset_id, new_rows):
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("UPDATE datasets_metadata SET rows = ? WHERE dataset_id = ?", (new_rows, dataset_id))
-    conn.commit()
-    conn.close()
+    with write_transaction() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE datasets_metadata SET rows = ? WHERE dataset_id = ?", (new_rows, dataset_id))
+        bump_table_version(conn, "datasets_metadata")
 
+@timed("datasets.delete_dataset")
 def delete_dataset(dataset_id):
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM datasets_metadata WHERE dataset_id = ?", (dataset_id,))
-    conn.commit()
-    conn.close()
+    write_row("datasets_metadata", "DELETE FROM datasets_metadata WHERE dataset_id = ?", (dataset_id,), dataset_id)
+
+# Bulk changes: one transaction each, returning the number of rows changed
+@timed("datasets.update_dataset_rows_many")
+def update_dataset_rows_many(updates):
+    """Apply (dataset_id, new_rows) pairs."""
+    return write_bulk("datasets_metadata", "UPDATE datasets_metadata SET rows = ? WHERE dataset_id = ?",
+                      ((new_rows, dataset_id) for dataset_id, new_rows in updates))
+
+@timed("datasets.delete_datasets_many")
+def delete_datasets_many(dataset_ids):
+    return write_bulk("datasets_metadata", "DELETE FROM datasets_metadata WHERE dataset_id = ?",
+                      ((dataset_id,) for dataset_id in dataset_ids))
+
+@timed("datasets.delete_datasets_where")
+def delete_datasets_where(uploaded_by=None, before=None, after=None):
+    """Delete every dataset matching the filters (upload_date in [after, before), as YYYY-MM-DD text)."""
+    where, params = mutation_where("datasets_metadata", {"uploaded_by": uploaded_by}, "upload_date", before, after)
+    return write_bulk("datasets_metadata", f"DELETE FROM datasets_metadata{where}", [params])
@@ -1,11 +1,288 @@
 # app/data/db.py
+import atexit
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+from app.data.metrics import timed
+
 # Put the DB inside the app/data folder so it's always the one used by the app
 DB_PATH = Path(__file__).resolve().parent / "intelligence_platform.db"
 
-def connect_database(db_path=DB_PATH):
-    """Return a sqlite3 connection to the project's database file."""
-    return sqlite3.connect(str(db_path))
+# PRAGMAs applied once to every pooled connection when it is opened.
+# Checkpoint policy: in WAL mode readers never block the writer (and the other way
+# round); committed pages go to the -wal file and are copied back into the main file
+# by a PASSIVE checkpoint once the WAL passes wal_autocheckpoint pages. A passive
+# checkpoint skips pages a reader still needs, so after bulk loads checkpoint_wal()
+# is called to catch up, and journal_size_limit shrinks the -wal file again afterwards.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,      # negative = size in KiB (~20 MB)
+    "mmap_size": 268435456,    # 256 MB
+    "wal_autocheckpoint": 1000,           # pages (~4 MB)
+    "journal_size_limit": 67108864,       # 64 MB
+}
+
+# PRAGMAs for connections to the read-only replica (see app/data/replica.py)
+REPLICA_PRAGMAS = {
+    "cache_size": -20000,
+    "mmap_size": 268435456,
+}
+
+# Extra PRAGMAs used while bulk loading CSV files. Durability is relaxed on
+# purpose: a load that dies half way can simply be re-run from the source files.
+BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": -64000,      # ~64 MB
+}
+
+@timed("db.connect_database")
+def connect_database(db_path=DB_PATH, pragmas=None, **options):
+    """
+    Return a sqlite3 connection to the project's database file, with `pragmas` applied.
+    Every connection the app opens (pooled, replica, bulk load) comes from here.
+    `options` go to sqlite3.connect() (e.g. uri=True, check_same_thread=False).
+    """
+    conn = sqlite3.connect(str(db_path), **options)
+    if pragmas:
+        apply_pragmas(conn, pragmas)
+    return conn
+
+def apply_pragmas(conn, pragmas):
+    """Run `PRAGMA name = value` for every entry in `pragmas`."""
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+@contextmanager
+def bulk_load_connection(db_path=None, pragmas=None):
+    """
+    Yield one dedicated connection tuned for bulk inserts.
+    Defaults to the same DB file as the connection pool.
+    """
+    conn = connect_database(get_pool().db_path if db_path is None else db_path,
+                            {**DEFAULT_PRAGMAS, **(BULK_LOAD_PRAGMAS if pragmas is None else pragmas)})
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def bump_table_version(conn, table):
+    """
+    Record that `table` changed. Call inside the writing transaction so the
+    counter moves exactly when the data does; caches key on these counters.
+    """
+    conn.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = ?", (table,))
+
+@timed("db.checkpoint_wal")
+def checkpoint_wal(conn=None, mode="PASSIVE"):
+    """
+    Copy committed WAL pages back into the database file. Returns (busy, wal_pages, checkpointed_pages).
+    PASSIVE never waits; TRUNCATE waits (up to the busy timeout) for readers and then empties the -wal file.
+    """
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode: {mode}")
+    if conn is None:
+        with get_connection() as conn:
+            return checkpoint_wal(conn, mode)
+    return tuple(conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+@timed("db.get_table_versions")
+def get_table_versions(conn, tables):
+    """Return ((table, version), ...) for the given tables, in name order."""
+    names = sorted(set(tables))
+    if not names:
+        return ()
+    placeholders = ", ".join("?" for _ in names)
+    rows = conn.execute(
+        f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders}) ORDER BY table_name",
+        names,
+    ).fetchall()
+    return tuple(rows)
+
+
+class ConnectionPool:
+    """
+    Keeps one long-lived connection per thread (sqlite3 connections should not
+    be shared between threads) so CRUD calls stop paying connect/close and
+    schema parsing every time.
+
+    Use `with pool.connection() as conn:` for reads and
+    `with pool.transaction() as conn:` for writes (commit / rollback for you).
+    """
+
+    def __init__(self, db_path=DB_PATH, pragmas=None):
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._owned = []  # (thread, connection) for every connection handed out
+
+    def _open(self):
+        # The pool makes sure only the owning thread uses a connection, but
+        # close_all() may run on another thread, hence check_same_thread=False.
+        conn = connect_database(self.db_path, self.pragmas, check_same_thread=False)
+        with self._lock:
+            self._close_dead_threads()
+            self._owned.append((threading.current_thread(), conn))
+        return conn
+
+    def _close_dead_threads(self):
+        # Streamlit runs scripts on short-lived threads, so drop their connections.
+        alive = []
+        for thread, conn in self._owned:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._owned = alive
+
+    def checkout(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+            self._local.depth = 0
+        self._local.depth += 1
+        return conn
+
+    def release(self, conn):
+        """Give a connection back. Uncommitted work is rolled back on the outermost release."""
+        self._local.depth -= 1
+        if self._local.depth == 0 and conn.in_transaction:
+            conn.rollback()
+
+    @contextmanager
+    def connection(self):
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            with conn:  # commit on success, rollback on error
+                yield conn
+
+    def close_all(self):
+        with self._lock:
+            for _, conn in self._owned:
+                conn.close()
+            self._owned = []
+        self._local = threading.local()
+
+
+def replica_generations(db_path):
+    """
+    Complete copies of the replica `db_path` (app/data/replica.py), oldest first.
+    Each refresh writes a new file next to it, <stem>.<generation><suffix>, instead of
+    replacing one in place: a file that connections hold open can't be replaced on Windows.
+    """
+    path = Path(db_path)
+    generations = []
+    for candidate in path.parent.glob(f"{path.stem}.*{path.suffix}"):
+        generation = candidate.name[len(path.stem) + 1:-len(path.suffix) or None]
+        if generation.isdigit():
+            generations.append((int(generation), candidate))
+    return [candidate for _, candidate in sorted(generations)]
+
+
+def current_replica(db_path):
+    """The newest copy of the replica `db_path`, or None before the first one."""
+    generations = replica_generations(db_path)
+    return generations[-1] if generations else None
+
+
+class ReplicaPool(ConnectionPool):
+    """
+    Per-thread read-only connections to the newest copy of the replica written by
+    app/data/replica.py. A copy is never changed once written, so it is opened with
+    immutable=1 (no locking at all); when a newer copy appears, each thread moves
+    to it on its next checkout. A thread's connection is only swapped between
+    queries, never inside one.
+    """
+
+    def __init__(self, db_path, pragmas=None):
+        super().__init__(db_path, REPLICA_PRAGMAS if pragmas is None else pragmas)
+
+    def _open(self):
+        self._local.file = current_replica(self.db_path)
+        uri = f"{Path(self._local.file).resolve().as_uri()}?mode=ro&immutable=1"
+        conn = connect_database(uri, self.pragmas, uri=True, check_same_thread=False)
+        with self._lock:
+            self._close_dead_threads()
+            self._owned.append((threading.current_thread(), conn))
+        return conn
+
+    def checkout(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.depth == 0 and self._local.file != current_replica(self.db_path):
+            with self._lock:
+                self._owned = [(t, c) for t, c in self._owned if c is not conn]
+            conn.close()  # lets the refresher delete the old copy
+            self._local.conn = None
+        return super().checkout()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_replica = None
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+def configure_pool(db_path=DB_PATH, pragmas=None):
+    """Replace the process-wide pool, e.g. to point the app at another DB file."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(db_path, pragmas)
+    return _pool
+
+def get_connection():
+    """Context manager yielding the calling thread's pooled connection."""
+    return get_pool().connection()
+
+def transaction():
+    """Context manager yielding a pooled connection inside a transaction."""
+    return get_pool().transaction()
+
+def configure_read_replica(db_path=None):
+    """
+    Send get_read_connection() to the snapshot at `db_path` (None: back to the
+    main database). Returns the replica pool, or None.
+    """
+    global _replica
+    with _pool_lock:
+        if _replica is not None:
+            _replica.close_all()
+        _replica = None if db_path is None else ReplicaPool(db_path)
+    return _replica
+
+def get_read_connection():
+    """
+    Context manager for read-only queries that may be a little stale (the dashboard):
+    the read replica when one is configured and exists, else the main pool.
+    """
+    replica = _replica
+    if replica is not None and current_replica(replica.db_path) is not None:
+        return replica.connection()
+    return get_connection()
 
+@atexit.register
+def _close_pool():
+    if _pool is not None:
+        _pool.close_all()
+    if _replica is not None:
+        _replica.close_all()
@@ -0,0 +1,72 @@
+# app/data/frames.py
+"""
+DataFrames straight from SQLite, with compact dtypes.
+
+Low-cardinality text columns (severity, category, status, role, uploader,
+ticket priority and assignee) become pandas Categoricals: one small integer
+code per row plus a single copy of each distinct string, so comparisons like
+df["severity"] == "High" compare codes instead of strings. Integer columns (ids, counts, epoch seconds) are
+downcast to the narrowest integer type that holds their values.
+"""
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from app.data.db import get_connection
+from app.data.metrics import timed
+
+CATEGORY_COLUMNS = {"severity", "category", "status", "role", "uploaded_by", "priority", "assigned_to"}
+
+# Rows converted at a time, so the full-width object columns of a big result
+# never exist all at once
+FRAME_CHUNK_ROWS = 100_000
+
+
+def compact(df):
+    """Convert `df` to the compact dtypes in place and return it."""
+    for column in df.columns:
+        dtype = df[column].dtype
+        if column in CATEGORY_COLUMNS and not isinstance(dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+        elif pd.api.types.is_integer_dtype(dtype):
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+@timed("frames.read_frame", detail=lambda sql, *args, **kwargs: " ".join(sql.split()))
+def read_frame(sql, params=(), conn=None, chunksize=FRAME_CHUNK_ROWS):
+    """pd.read_sql_query() with compact dtypes, converted chunk by chunk."""
+    if conn is None:
+        with get_connection() as conn:
+            return _read_chunks(sql, params, conn, chunksize)
+    return _read_chunks(sql, params, conn, chunksize)
+
+
+def _read_chunks(sql, params, conn, chunksize):
+    chunks = [compact(chunk) for chunk in pd.read_sql_query(sql, conn, params=list(params), chunksize=chunksize)]
+    if len(chunks) <= 1:
+        return chunks[0] if chunks else compact(pd.read_sql_query(sql, conn, params=list(params)))
+
+    # chunks may have seen different categories; merge them so the result stays categorical
+    merged = {
+        column: union_categoricals(_common_categories([chunk[column] for chunk in chunks]))
+        for column in chunks[0].columns
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype)
+    }
+    frame = pd.concat(chunks, ignore_index=True)
+    for column, values in merged.items():
+        frame[column] = values
+    return compact(frame)
+
+
+def _common_categories(columns):
+    """
+    `columns` (one categorical per chunk) with their categories cast to one dtype.
+    A chunk where the column is all NULL has no categories, and their dtype then
+    differs from the other chunks', which union_categoricals() refuses.
+    """
+    dtypes = [c.cat.categories.dtype for c in columns if len(c.cat.categories)]
+    if not dtypes:
+        return columns
+    dtype = dtypes[0] if all(d == dtypes[0] for d in dtypes) else object
+    return [c if c.cat.categories.dtype == dtype else c.cat.set_categories(c.cat.categories.astype(dtype))
+            for c in columns]
@@ -1,36 +1,120 @@
 # app/data/incidents.py
-from app.data.db import connect_database
+from app.data.db import bump_table_version, get_connection
+from app.data.metrics import timed
+from app.data.partitions import ALL_VIEW, HOT_TABLE, incident_tables, list_partitions, locate_incidents, route_archived
+from app.data.queries import mutation_where
+from app.data.streaming import ITER_BATCH_ROWS, iter_table
+from app.data.write_behind import set_router, write_bulk_statements, write_row, write_transaction
+from app.data.timestamps import to_epoch
 
-def insert_incident(incident_id, timestamp, severity, category, status, description):
-    conn = connect_database()
-    cur = conn.cursor()
+# New incidents go to the hot cyber_incidents table; older months live in monthly partition
+# tables (app/data/partitions.py), where re-loaded ones are updated. Reads and changes below cover both.
+
+# incident_id is unique, so loading the same incident again updates it instead of duplicating it
+UPSERT_INCIDENT_SQL = """
+    INSERT INTO cyber_incidents (incident_id, timestamp, timestamp_epoch, severity, category, status, description)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(incident_id) DO UPDATE SET
+        timestamp = excluded.timestamp,
+        timestamp_epoch = excluded.timestamp_epoch,
+        severity = excluded.severity,
+        category = excluded.category,
+        status = excluded.status,
+        description = excluded.description
+"""
 
-    cur.execute("""
-        INSERT INTO cyber_incidents (incident_id, timestamp, severity, category, status, description)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (incident_id, timestamp, severity, category, status, description))
+@timed("incidents.insert_incident")
+def insert_incident(incident_id, timestamp, severity, category, status, description):
+    with write_transaction() as conn:
+        cur = conn.cursor()
+        epoch = to_epoch([timestamp])[0]
+        row = (incident_id, timestamp, epoch, severity, category, status, description)
+        hot, _ = route_archived(conn, [row])
+        if hot:
+            cur.execute(UPSERT_INCIDENT_SQL, row)
+        bump_table_version(conn, "cyber_incidents")
 
-    conn.commit()
-    conn.close()
+@timed("incidents.insert_incidents_many")
+def insert_incidents_many(conn, rows):
+    """
+    Insert or update many (incident_id, timestamp, timestamp_epoch, severity, category,
+    status, description) tuples on an existing connection. The caller owns the transaction
+    (and flushes queued write-behind changes first, like write_transaction()).
+    """
+    hot, updated = route_archived(conn, list(rows))
+    cur = conn.executemany(UPSERT_INCIDENT_SQL, hot)
+    bump_table_version(conn, "cyber_incidents")
+    return cur.rowcount + updated
 
+@timed("incidents.get_all_incidents")
 def get_all_incidents():
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("SELECT id, incident_id, timestamp, severity, category, status, description FROM cyber_incidents")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT id, incident_id, timestamp, severity, category, status, description FROM {ALL_VIEW}")
+        return cur.fetchall()
+
+# Columns get_all_incidents() returns, and the default for iter_incidents()
+INCIDENT_ROW_COLUMNS = ("id", "incident_id", "timestamp", "severity", "category", "status", "description")
+
+def iter_incidents(columns=INCIDENT_ROW_COLUMNS, batch_size=ITER_BATCH_ROWS, after_id=None, as_objects=False):
+    """
+    Stream incidents (archived months included), `batch_size` rows per fetch (see
+    app/data/streaming.py): the hot table, then each partition table, newest month
+    first, each in id order (not the whole view sorted by id).
+    `after_id` skips the ids up to it in every table; `as_objects` yields row objects instead of tuples.
+    """
+    yield from iter_table(HOT_TABLE, columns, batch_size, after_id, as_objects)
+    # listed afterwards, so a month archived meanwhile is still read
+    with get_connection() as conn:
+        partitions = [p["name"] for p in list_partitions(conn, "table")]
+    for name in reversed(partitions):
+        yield from iter_table(HOT_TABLE, columns, batch_size, after_id, as_objects, source=name)
+
+def _route(conn, incident_ids):
+    """Router for write_row(): the partition table of each archived incident, one lookup per batch."""
+    return {incident_id: p["name"] for incident_id, p in locate_incidents(conn, incident_ids).items()}
 
+set_router(HOT_TABLE, _route)
+
+def _tables(before=None, after=None):
+    """Hot table and partitions that can hold incidents timestamped in [after, before)."""
+    bounds = [None if value is None else to_epoch([value])[0] for value in (after, before)]
+    with get_connection() as conn:
+        return incident_tables(conn, *bounds)
+
+@timed("incidents.update_incident_status")
 def update_incident_status(incident_id, new_status):
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("UPDATE cyber_incidents SET status = ? WHERE incident_id = ?", (new_status, incident_id))
-    conn.commit()
-    conn.close()
+    write_row("cyber_incidents", "UPDATE {table} SET status = ? WHERE incident_id = ?", (new_status, incident_id), incident_id)
 
+@timed("incidents.delete_incident")
 def delete_incident(incident_id):
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM cyber_incidents WHERE incident_id = ?", (incident_id,))
-    conn.commit()
-    conn.close()
+    write_row("cyber_incidents", "DELETE FROM {table} WHERE incident_id = ?", (incident_id,), incident_id)
+
+# Bulk changes: one transaction each (over every table they may touch), returning the number of rows changed
+@timed("incidents.update_incident_status_many")
+def update_incident_status_many(incident_ids, new_status):
+    params = [(new_status, incident_id) for incident_id in incident_ids]
+    return write_bulk_statements("cyber_incidents", [
+        (f"UPDATE {table} SET status = ? WHERE incident_id = ?", params) for table in _tables()])
+
+@timed("incidents.update_incident_status_where")
+def update_incident_status_where(new_status, severity=None, category=None, status=None, before=None, after=None):
+    """Set the status of every incident matching the filters (timestamp in [after, before))."""
+    where, params = mutation_where("cyber_incidents", {"severity": severity, "category": category, "status": status},
+                                   "timestamp", before, after)
+    return write_bulk_statements("cyber_incidents", [
+        (f"UPDATE {table} SET status = ?{where}", [(new_status, *params)]) for table in _tables(before, after)])
+
+@timed("incidents.delete_incidents_many")
+def delete_incidents_many(incident_ids):
+    params = [(incident_id,) for incident_id in incident_ids]
+    return write_bulk_statements("cyber_incidents", [
+        (f"DELETE FROM {table} WHERE incident_id = ?", params) for table in _tables()])
+
+@timed("incidents.delete_incidents_where")
+def delete_incidents_where(severity=None, category=None, status=None, before=None, after=None):
+    """Delete every incident matching the filters (timestamp in [after, before))."""
+    where, params = mutation_where("cyber_incidents", {"severity": severity, "category": category, "status": status},
+                                   "timestamp", before, after)
+    return write_bulk_statements("cyber_incidents", [
+        (f"DELETE FROM {table}{where}", [params]) for table in _tables(before, after)])
@@ -0,0 +1,46 @@
+# app/data/ingest_state.py
+"""
+Remembers how much of each source file has been loaded, so a re-run only
+touches files that changed and only reads the bytes appended since last time.
+"""
+import hashlib
+
+from app.data.metrics import timed
+
+def file_sha256(path, length=None, block_size=1024 * 1024):
+    """SHA-256 of the first `length` bytes of a file (the whole file if None)."""
+    digest = hashlib.sha256()
+    remaining = length
+    with open(path, "rb") as fh:
+        while remaining is None or remaining > 0:
+            block = fh.read(block_size if remaining is None else min(block_size, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+@timed("ingest_state.get_ingest_state")
+def get_ingest_state(conn, path):
+    """Return the saved row for `path` as a dict, or None if it was never loaded."""
+    row = conn.execute(
+        "SELECT size, mtime_ns, sha256, offset, rows FROM ingest_state WHERE path = ?", (str(path),)
+    ).fetchone()
+    if row is None:
+        return None
+    return dict(zip(("size", "mtime_ns", "sha256", "offset", "rows"), row))
+
+@timed("ingest_state.save_ingest_state")
+def save_ingest_state(conn, path, size, mtime_ns, sha256, offset, rows):
+    conn.execute("""
+        INSERT INTO ingest_state (path, size, mtime_ns, sha256, offset, rows, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(path) DO UPDATE SET
+            size = excluded.size,
+            mtime_ns = excluded.mtime_ns,
+            sha256 = excluded.sha256,
+            offset = excluded.offset,
+            rows = excluded.rows,
+            updated_at = excluded.updated_at
+    """, (str(path), size, mtime_ns, sha256, offset, rows))
@@ -0,0 +1,181 @@
+# app/data/metrics.py
+"""
+In-process timing of the hot paths: SQLite calls, DataFrame loads, charts, bcrypt.
+
+Functions are wrapped with @timed("layer.name"). While metrics are off (the
+default) the wrapper only checks one module-level flag and calls straight
+through. Once enabled, every call records its latency in a fixed log-scale
+histogram (so p50/p95/p99 cost the same memory at 10 or 10 million calls),
+plus call, error and row counts. Calls slower than SLOW_CALL_MS are logged
+through the "app.slow" logger and kept in a short list for the Diagnostics page.
+
+Turn it on with APP_METRICS=1 (or enable() at runtime). APP_METRICS_DUMP=path
+writes snapshot() to that JSON file when the process exits.
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger("app.slow")
+
+SLOW_CALL_MS = float(os.environ.get("APP_SLOW_QUERY_MS", 250))
+SLOW_LOG_SIZE = 100
+# Upper bounds (ms) of the latency buckets: 0.01 ms doubling up to ~84 s; the last bucket is open
+LATENCY_BUCKETS_MS = [0.01 * 2 ** i for i in range(24)]
+
+_enabled = os.environ.get("APP_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_stats = {}  # name -> _Stat
+_slow = deque(maxlen=SLOW_LOG_SIZE)
+
+
+class _Stat:
+    __slots__ = ("calls", "errors", "rows", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.calls = self.errors = self.rows = 0
+        self.total_ms = self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def percentile(self, fraction):
+        # upper bound of the bucket holding that fraction of calls (never above the slowest call)
+        wanted, seen = fraction * self.calls, 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted and count:
+                return min(LATENCY_BUCKETS_MS[i], self.max_ms) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return 0.0
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    """Switch recording on or off for the whole process."""
+    global _enabled
+    _enabled = bool(on)
+
+
+def set_slow_threshold(ms):
+    global SLOW_CALL_MS
+    SLOW_CALL_MS = float(ms)
+
+
+def record(name, ms, rows=None, error=False, detail=None):
+    """Add one call of `name` that took `ms` milliseconds."""
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = _Stat()
+        stat.calls += 1
+        stat.total_ms += ms
+        stat.max_ms = max(stat.max_ms, ms)
+        stat.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        if error:
+            stat.errors += 1
+        if rows:
+            stat.rows += rows
+        if ms >= SLOW_CALL_MS:
+            _slow.append({
+                "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "name": name,
+                "ms": round(ms, 3),
+                "rows": rows,
+                "detail": detail,
+            })
+    if ms >= SLOW_CALL_MS:
+        logger.warning("slow call %s: %.1f ms%s", name, ms, f" ({detail})" if detail else "")
+
+
+def count_rows(result):
+    """
+    Rows in a query result: a list / DataFrame has len() rows, one fetched tuple is 1, None is 0.
+    Anything else (a role name, a rowcount) isn't a row count and gives None.
+    """
+    if result is None:
+        return 0
+    if isinstance(result, tuple):
+        return 1
+    if isinstance(result, (str, bytes)) or not hasattr(result, "__len__"):
+        return None
+    return len(result)
+
+
+def timed(name, detail=None):
+    """
+    Decorator recording every call of the function under `name`.
+    `detail(*args, **kwargs)` may return text (e.g. the SQL) shown for slow calls.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                record(name, (time.perf_counter() - start) * 1000, error=True,
+                       detail=detail(*args, **kwargs) if detail else None)
+                raise
+            record(name, (time.perf_counter() - start) * 1000, count_rows(result),
+                   detail=detail(*args, **kwargs) if detail else None)
+            return result
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    """Everything recorded so far: {"calls": {name: {...}}, "slow": [...]}."""
+    with _lock:
+        calls = {
+            name: {
+                "calls": s.calls,
+                "errors": s.errors,
+                "rows": s.rows,
+                "total_ms": s.total_ms,
+                "mean_ms": s.total_ms / s.calls,
+                "p50_ms": s.percentile(0.50),
+                "p95_ms": s.percentile(0.95),
+                "p99_ms": s.percentile(0.99),
+                "max_ms": s.max_ms,
+            }
+            for name, s in _stats.items()
+        }
+        slow = list(_slow)
+    return {
+        "enabled": _enabled,
+        "slow_threshold_ms": SLOW_CALL_MS,
+        "taken_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "calls": calls,
+        "slow": slow,
+    }
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _slow.clear()
+
+
+def dump_metrics(path):
+    """Write snapshot() to `path` as JSON and return the path."""
+    path = Path(path)
+    path.write_text(json.dumps(snapshot(), indent=2))
+    return path
+
+
+@atexit.register
+def _dump_on_exit():
+    path = os.environ.get("APP_METRICS_DUMP")
+    if path and _stats:
+        dump_metrics(path)
@@ -0,0 +1,548 @@
+# app/data/partitions.py
+"""
+Monthly partitions for cyber_incidents, with a retention policy.
+
+`cyber_incidents` holds the recent ("hot") months. apply_retention() moves
+every older month into its own table, cyber_incidents_YYYY_MM, in the same
+database, which keeps the hot table and its indexes small for the inserts,
+upserts and row changes of the loader and the write paths. Partitions older
+than `compress_after_months` are exported to gzip-compressed SQLite files in
+ARCHIVE_DIR and dropped from the database (restore_partition() loads one
+back), which keeps VACUUM and backups of the database bounded too; partitions
+older than `drop_after_months` are deleted outright. Every partition is listed
+in the incident_partitions table.
+
+Reads across all months go through the cyber_incidents_all view: a UNION ALL
+of the hot table and every partition table, plus a source_table column.
+incidents_query() builds the same UNION ALL over only the tables a time range
+can touch (partition pruning). Every partition table gets a copy of the hot
+table's triggers, so the rollups and the search index cover exactly the rows
+of the view: moving a month leaves them untouched (the triggers are bypassed),
+changes to archived rows are counted like any other. Compressing a month takes
+its rows out of the view, the rollups and the search index (restoring puts them
+back), so only months past the retention window can be compressed.
+
+Incident ids stay unique across the tables: rows keep their id when they are
+moved, and new rows always get theirs from the hot table's AUTOINCREMENT.
+Loading an incident that sits in a partition table (route_archived()) updates
+it in place when its timestamp stays within that partition's month, so a full
+CSV re-load leaves the archive where it is; if the timestamp moved to another
+month, the archived copy is deleted and the row goes to the hot table.
+Incidents in compressed partitions can't be looked up: loading one again
+writes it to the hot table, and the two copies are merged when the hot one is
+archived into that month (its timestamp still in it). Until then, or for good
+if its month changed, the incident is stored twice; restore the partition
+before re-loading such incidents to avoid that.
+
+    python -m app.data.partitions [--hot-months 3] [--compress-after 12] [--drop-after N]
+    python -m app.data.partitions --list | --restore cyber_incidents_2024_01
+"""
+import argparse
+import calendar
+import gzip
+import os
+import re
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.data.db import bump_table_version, get_connection, transaction
+from app.data.metrics import timed
+from app.data.queries import TABLE_COLUMNS, build_where
+from app.data.rollups import ROLLUPS
+from app.data.timestamps import to_epoch
+from app.data.write_behind import flush
+
+HOT_TABLE = "cyber_incidents"
+ALL_VIEW = "cyber_incidents_all"
+MANIFEST = "incident_partitions"
+ARCHIVE_DIR = Path("DATA/archive")
+
+# Columns of the hot table, copied as-is into every partition
+ROW_COLUMNS = ("id", "incident_id", "timestamp", "timestamp_epoch", "severity", "category", "status", "description")
+
+# Retention policy, in months counted back from the month of the newest incident
+# (that month included): 3 = the newest month and the two before it stay hot.
+HOT_MONTHS = int(os.environ.get("APP_INCIDENT_HOT_MONTHS", 3))
+COMPRESS_AFTER_MONTHS = int(os.environ.get("APP_INCIDENT_COMPRESS_AFTER_MONTHS", 12))
+DROP_AFTER_MONTHS = int(os.environ["APP_INCIDENT_DROP_AFTER_MONTHS"]) \
+    if os.environ.get("APP_INCIDENT_DROP_AFTER_MONTHS") else None
+
+MANIFEST_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {MANIFEST} (
+        name TEXT PRIMARY KEY,
+        start_epoch INTEGER NOT NULL,
+        end_epoch INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        state TEXT NOT NULL,            -- 'table' or 'compressed'
+        archive_file TEXT,              -- the .db.gz file when compressed
+        changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+# -----------------------------------------
+# Months and names
+# -----------------------------------------
+def month_start(epoch):
+    """Epoch second the (UTC) month of `epoch` starts at."""
+    day = datetime.fromtimestamp(epoch, timezone.utc)
+    return calendar.timegm((day.year, day.month, 1, 0, 0, 0))
+
+
+def add_months(start_epoch, months):
+    """Start of the month `months` after (or before, if negative) the month starting at `start_epoch`."""
+    day = datetime.fromtimestamp(start_epoch, timezone.utc)
+    index = day.year * 12 + day.month - 1 + months
+    return calendar.timegm((index // 12, index % 12 + 1, 1, 0, 0, 0))
+
+
+def partition_name(start_epoch):
+    return datetime.fromtimestamp(start_epoch, timezone.utc).strftime(f"{HOT_TABLE}_%Y_%m")
+
+
+def is_partition(name):
+    """True for partition table names (cyber_incidents_YYYY_MM)."""
+    suffix = name[len(HOT_TABLE) + 1:]
+    return (name.startswith(HOT_TABLE + "_") and len(suffix) == 7 and suffix[4] == "_"
+            and suffix[:4].isdigit() and suffix[5:].isdigit())
+
+
+def list_partitions(conn=None, state=None):
+    """Rows of the manifest, oldest month first, as dicts (only `state` ones if given)."""
+    if conn is None:
+        with get_connection() as conn:
+            return list_partitions(conn, state)
+    where, params = (" WHERE state = ?", (state,)) if state else ("", ())
+    cur = conn.execute(f"SELECT name, start_epoch, end_epoch, rows, state, archive_file, changed_at "
+                       f"FROM {MANIFEST}{where} ORDER BY start_epoch", params)
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
+
+# -----------------------------------------
+# The cross-partition view and pruned queries
+# -----------------------------------------
+def _select(table, columns, where=""):
+    return f"SELECT '{table}' AS source_table, {', '.join(columns)} FROM {table}{where}"
+
+
+def view_sql(partitions):
+    """CREATE VIEW statement for cyber_incidents_all over the hot table and `partitions`."""
+    arms = [_select(table, ROW_COLUMNS) for table in (HOT_TABLE, *partitions)]
+    return f"CREATE VIEW {ALL_VIEW} AS\n    " + "\n    UNION ALL ".join(arms)
+
+
+def _rebuild_view(conn):
+    partitions = [p["name"] for p in list_partitions(conn, "table")]
+    conn.execute(f"DROP VIEW IF EXISTS {ALL_VIEW}")
+    conn.execute(view_sql(partitions))
+
+
+def incident_tables(conn, after=None, before=None):
+    """
+    The hot table plus every partition table holding months in [after, before)
+    (epoch seconds, None = open ended). The hot table is always included, as it
+    may hold late rows of any month.
+    """
+    tables = [HOT_TABLE]
+    for p in list_partitions(conn, "table"):
+        if (after is None or p["end_epoch"] > after) and (before is None or p["start_epoch"] < before):
+            tables.append(p["name"])
+    return tables
+
+
+def incidents_query(filters=None, after=None, before=None, columns=ROW_COLUMNS, conn=None):
+    """
+    (sql, params) selecting `columns` of the incidents matching `filters` with a
+    timestamp in [after, before) from every month, reading only the tables that
+    can hold such rows. `after` / `before` are times like "2024-10-01".
+    """
+    unknown = [c for c in columns if c not in TABLE_COLUMNS[HOT_TABLE]]
+    if unknown:
+        raise ValueError(f"Unknown columns for {HOT_TABLE}: {', '.join(unknown)}")
+    where, params = build_where(HOT_TABLE, filters)
+    clauses = [where[len(" WHERE "):]] if where else []
+    bounds = []
+    for operator, value in ((">=", after), ("<", before)):
+        if value is not None:
+            epoch = to_epoch([value])[0]
+            if epoch is None:
+                raise ValueError(f"Can't read {value!r} as a time")
+            clauses.append(f"timestamp_epoch {operator} ?")
+            params.append(epoch)
+            bounds.append(epoch)
+        else:
+            bounds.append(None)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+
+    if conn is None:
+        with get_connection() as conn:
+            tables = incident_tables(conn, *bounds)
+    else:
+        tables = incident_tables(conn, *bounds)
+    sql = "\nUNION ALL ".join(_select(table, columns, where) for table in tables)
+    return sql, params * len(tables)
+
+
+# incident_ids looked up per statement in locate_incidents()
+_LOOKUP_BATCH = 500
+
+
+def locate_incidents(conn, incident_ids):
+    """
+    {incident_id: partition} (a list_partitions() row) for those of `incident_ids`
+    stored in a partition table; the others are in the hot table, or nowhere.
+    One indexed lookup per partition table and _LOOKUP_BATCH ids, none without partitions.
+    """
+    ids = list(dict.fromkeys(incident_ids))
+    found = {}
+    for p in list_partitions(conn, "table"):
+        for first in range(0, len(ids), _LOOKUP_BATCH):
+            batch = ids[first:first + _LOOKUP_BATCH]
+            marks = ", ".join("?" * len(batch))
+            cur = conn.execute(f"SELECT incident_id FROM {p['name']} WHERE incident_id IN ({marks})", batch)
+            found.update((incident_id, p) for (incident_id,) in cur)
+    return found
+
+
+def route_archived(conn, rows):
+    """
+    Split `rows` (UPSERT_INCIDENT_SQL parameter tuples) before they are written: rows
+    whose incident_id is in a partition table and whose timestamp is still in that
+    partition's month are upserted there; other archived copies are deleted so the
+    rows can go to the hot table without storing an incident twice.
+    Returns (rows for the hot table, rows updated in a partition).
+    """
+    found = locate_incidents(conn, [row[0] for row in rows])
+    if not found:
+        return rows, 0
+
+    hot, in_place, released = [], {}, {}
+    for row in rows:
+        p = found.get(row[0])
+        if p is None:
+            hot.append(row)
+        elif row[2] is not None and p["start_epoch"] <= row[2] < p["end_epoch"]:
+            in_place.setdefault(p["name"], []).append(row)
+        else:
+            released.setdefault(p["name"], []).append((row[0],))
+            hot.append(row)
+
+    columns = ROW_COLUMNS[1:]  # the archived row keeps its id
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns[1:])
+    updated = 0
+    for name, part_rows in in_place.items():
+        updated += conn.executemany(
+            f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(incident_id) DO UPDATE SET {updates}", part_rows).rowcount
+    for name, part_ids in released.items():
+        conn.executemany(f"DELETE FROM {name} WHERE incident_id = ?", part_ids)
+        conn.execute(f"UPDATE {MANIFEST} SET rows = (SELECT COUNT(*) FROM {name}), "
+                     f"changed_at = CURRENT_TIMESTAMP WHERE name = ?", (name,))
+    return hot, updated
+
+
+# -----------------------------------------
+# Partition tables
+# -----------------------------------------
+def _create_partition_table(conn, name, schema="main"):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.{name} (
+            id INTEGER PRIMARY KEY,
+            incident_id INTEGER,
+            timestamp TEXT,
+            timestamp_epoch INTEGER,
+            severity TEXT,
+            category TEXT,
+            status TEXT,
+            description TEXT
+        )
+    """)
+    conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {schema}.idx_{name}_incident_id ON {name} (incident_id)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{name}_timestamp_epoch ON {name} (timestamp_epoch)")
+
+
+_TRIGGER_HEAD_RE = re.compile(r"CREATE\s+TRIGGER\s+(?:IF\s+NOT\s+EXISTS\s+)?\w+(.*?\bON\s+)\w+",
+                              re.IGNORECASE | re.DOTALL)
+
+
+def _triggers(conn, table):
+    """(name, sql) of every trigger on `table`."""
+    return conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ? ORDER BY name",
+                        (table,)).fetchall()
+
+
+def copy_hot_triggers(conn, name):
+    """
+    Give partition table `name` a copy of each trigger of the hot table (the rollups
+    and the search index), so changes to its rows are counted and indexed too.
+    """
+    month = name[len(HOT_TABLE) + 1:]
+    for trigger, sql in _triggers(conn, HOT_TABLE):
+        head = _TRIGGER_HEAD_RE.match(sql)
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger}_{month}{head[1]}{name}{sql[head.end():]}")
+
+
+@contextmanager
+def _triggers_off(conn, *tables):
+    """
+    Drop the triggers of `tables` for the with block, inside the caller's transaction
+    (if the block fails, rolling the transaction back restores them).
+    """
+    triggers = [trigger for table in tables for trigger in _triggers(conn, table)]
+    for trigger, _ in triggers:
+        conn.execute(f"DROP TRIGGER {trigger}")
+    yield
+    for _, sql in triggers:
+        conn.execute(sql)
+
+
+def _drop_empty_counts(conn):
+    """Delete the incident rollup rows whose count fell to 0 (after a partition left the view)."""
+    for rollup, spec in ROLLUPS.items():
+        if spec[0] == ALL_VIEW:
+            conn.execute(f"DELETE FROM {rollup} WHERE count = 0")
+
+
+@contextmanager
+def attached(path):
+    """
+    Yield the pooled connection with the SQLite file at `path` attached as `export`,
+    inside one transaction (committed on success) that may write to both files.
+    """
+    with get_connection() as conn:
+        conn.execute("ATTACH DATABASE ? AS export", (str(path),))
+        try:
+            conn.execute("BEGIN")  # sqlite3 doesn't open one for DDL by itself
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        finally:
+            conn.execute("DETACH DATABASE export")
+
+
+def _move_month(start, end):
+    """Move the hot rows of [start, end) into their partition table. Returns the rows moved."""
+    name = partition_name(start)
+    columns = ", ".join(ROW_COLUMNS)
+    month = "timestamp_epoch >= ? AND timestamp_epoch < ?"
+    with transaction() as conn:
+        conn.execute("BEGIN")  # sqlite3 doesn't open one for DDL by itself
+        _create_partition_table(conn, name)
+        copy_hot_triggers(conn, name)
+        # incidents archived in this month and loaded again since (see the module docstring):
+        # the hot copy replaces the archived one, which stops being counted
+        conn.execute(f"DELETE FROM {name} WHERE incident_id IN (SELECT incident_id FROM {HOT_TABLE} WHERE {month})",
+                     (start, end))
+        # the rows stay in the view, so the rollups and the search index must not change
+        with _triggers_off(conn, HOT_TABLE, name):
+            moved = conn.execute(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {HOT_TABLE} WHERE {month}",
+                                 (start, end)).rowcount
+            conn.execute(f"DELETE FROM {HOT_TABLE} WHERE {month}", (start, end))
+        conn.execute(f"""
+            INSERT INTO {MANIFEST} (name, start_epoch, end_epoch, rows, state)
+            VALUES (?, ?, ?, (SELECT COUNT(*) FROM {name}), 'table')
+            ON CONFLICT(name) DO UPDATE SET rows = excluded.rows, changed_at = CURRENT_TIMESTAMP
+        """, (name, start, end))
+        _rebuild_view(conn)
+        bump_table_version(conn, HOT_TABLE)
+    return moved
+
+
+def _current_month(conn, now=None):
+    """Start of the month retention counts back from: that of `now`, default the newest incident."""
+    return month_start(to_epoch([now])[0]) if now is not None else _newest_month(conn)
+
+
+@timed("partitions.compress_partition")
+def compress_partition(name, archive_dir=ARCHIVE_DIR, compress_after_months=COMPRESS_AFTER_MONTHS, now=None):
+    """
+    Export partition `name` to <archive_dir>/<name>.db.gz (a gzip-compressed SQLite
+    file with one cyber_incidents table) and drop it from the database, the rollups
+    and the search index. Raises ValueError for a month among the newest
+    `compress_after_months` (counted back from `now` like apply_retention()).
+    """
+    with get_connection() as conn:
+        entry = next((p for p in list_partitions(conn, "table") if p["name"] == name), None)
+        current = _current_month(conn, now)
+    if entry is None:
+        raise ValueError(f"No partition table called {name}")
+    if entry["start_epoch"] >= add_months(current, 1 - compress_after_months):
+        raise ValueError(f"{name} is within the newest {compress_after_months} months, which stay readable")
+
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    export = archive_dir / f"{name}.db"
+    target = (archive_dir / f"{name}.db.gz").resolve()
+    export.unlink(missing_ok=True)
+
+    with attached(export) as conn:
+        _create_partition_table(conn, HOT_TABLE, schema="export")
+        columns = ", ".join(ROW_COLUMNS)
+        conn.execute(f"INSERT INTO export.{HOT_TABLE} ({columns}) SELECT {columns} FROM main.{name}")
+    with open(export, "rb") as source, gzip.open(f"{target}.tmp", "wb") as packed:
+        shutil.copyfileobj(source, packed)
+    os.replace(f"{target}.tmp", target)  # the file is complete before the table goes
+    export.unlink()
+
+    with transaction() as conn:
+        conn.execute("BEGIN")
+        conn.execute(f"DELETE FROM {name}")  # through the triggers: out of the rollups and the search index
+        conn.execute(f"DROP TABLE {name}")
+        conn.execute(f"UPDATE {MANIFEST} SET state = 'compressed', archive_file = ?, changed_at = CURRENT_TIMESTAMP "
+                     f"WHERE name = ?", (str(target), name))
+        _drop_empty_counts(conn)
+        _rebuild_view(conn)
+        bump_table_version(conn, HOT_TABLE)
+    return target
+
+
+@timed("partitions.restore_partition")
+def restore_partition(name):
+    """
+    Load a compressed partition back into the database (the view, the rollups and the
+    search index). Deletes the archive file.
+    """
+    with get_connection() as conn:
+        entry = next((p for p in list_partitions(conn, "compressed") if p["name"] == name), None)
+    if entry is None:
+        raise ValueError(f"No compressed partition called {name}")
+    packed = Path(entry["archive_file"])
+    export = packed.with_suffix("")  # .db.gz -> .db
+    with gzip.open(packed, "rb") as source, open(export, "wb") as unpacked:
+        shutil.copyfileobj(source, unpacked)
+
+    try:
+        with attached(export) as conn:
+            _create_partition_table(conn, name)
+            copy_hot_triggers(conn, name)
+            columns = ", ".join(ROW_COLUMNS)
+            conn.execute(f"INSERT INTO main.{name} ({columns}) SELECT {columns} FROM export.{HOT_TABLE}")
+            conn.execute(f"UPDATE {MANIFEST} SET state = 'table', archive_file = NULL, "
+                         f"changed_at = CURRENT_TIMESTAMP WHERE name = ?", (name,))
+            _rebuild_view(conn)
+            bump_table_version(conn, HOT_TABLE)
+    finally:
+        export.unlink(missing_ok=True)
+    packed.unlink()
+
+
+def drop_partition(name):
+    """Delete partition `name` for good: its table or its archive file, and its manifest entry."""
+    with transaction() as conn:
+        conn.execute("BEGIN")
+        entry = next((p for p in list_partitions(conn) if p["name"] == name), None)
+        if entry is None:
+            raise ValueError(f"No partition called {name}")
+        if entry["state"] == "table":
+            conn.execute(f"DELETE FROM {name}")  # through the triggers, like compress_partition()
+            conn.execute(f"DROP TABLE {name}")
+            _drop_empty_counts(conn)
+        conn.execute(f"DELETE FROM {MANIFEST} WHERE name = ?", (name,))
+        _rebuild_view(conn)
+        bump_table_version(conn, HOT_TABLE)
+    if entry["archive_file"]:
+        Path(entry["archive_file"]).unlink(missing_ok=True)
+
+
+# -----------------------------------------
+# Retention
+# -----------------------------------------
+def _newest_month(conn):
+    newest = conn.execute(f"SELECT MAX(timestamp_epoch) FROM {HOT_TABLE}").fetchone()[0]
+    archived = conn.execute(f"SELECT MAX(end_epoch) - 1 FROM {MANIFEST}").fetchone()[0]
+    candidates = [e for e in (newest, archived) if e is not None]
+    return month_start(max(candidates)) if candidates else None
+
+
+@timed("partitions.apply_retention")
+def apply_retention(hot_months=HOT_MONTHS, compress_after_months=COMPRESS_AFTER_MONTHS,
+                    drop_after_months=DROP_AFTER_MONTHS, now=None, archive_dir=ARCHIVE_DIR):
+    """
+    Apply the retention policy (months counted back from the month of `now`, default
+    the newest incident): older than `hot_months` -> partition table, older than
+    `compress_after_months` -> compressed file, older than `drop_after_months` -> deleted.
+    None skips a step. Returns {"moved": {partition: rows}, "compressed": [...], "dropped": [...]}.
+    """
+    if hot_months < 1:
+        raise ValueError("hot_months must be at least 1")
+    for months in (compress_after_months, drop_after_months):
+        if months is not None and months < hot_months:
+            raise ValueError("partitions can't be compressed or dropped before they leave the hot table")
+    flush()  # queued single-row changes must land before their rows move
+
+    with get_connection() as conn:
+        current = _current_month(conn, now)
+        if current is None:
+            return {"moved": {}, "compressed": [], "dropped": []}
+        hot_start = add_months(current, 1 - hot_months)
+    cutoffs = {step: None if months is None else add_months(current, 1 - months)
+               for step, months in (("compress", compress_after_months), ("drop", drop_after_months))}
+
+    result = {"moved": {}, "compressed": [], "dropped": []}
+    compressed = {p["name"] for p in list_partitions(state="compressed")}
+    start = 0
+    while True:
+        # the next month (before hot_start) that still has rows in the hot table
+        with get_connection() as conn:
+            oldest = conn.execute(f"SELECT MIN(timestamp_epoch) FROM {HOT_TABLE} "
+                                  f"WHERE timestamp_epoch >= ? AND timestamp_epoch < ?", (start, hot_start)).fetchone()[0]
+        if oldest is None:
+            break
+        start = month_start(oldest)
+        name = partition_name(start)
+        if name in compressed:
+            restore_partition(name)  # merge the late rows into the archived month, recompressed below
+        result["moved"][name] = _move_month(start, add_months(start, 1))
+        start = add_months(start, 1)
+
+    for p in list_partitions():
+        if cutoffs["drop"] is not None and p["start_epoch"] < cutoffs["drop"]:
+            drop_partition(p["name"])
+            result["dropped"].append(p["name"])
+        elif cutoffs["compress"] is not None and p["start_epoch"] < cutoffs["compress"] and p["state"] == "table":
+            compress_partition(p["name"], archive_dir, compress_after_months, now)
+            result["compressed"].append(p["name"])
+    return result
+
+
+def _print_partitions():
+    partitions = list_partitions()
+    if not partitions:
+        print("No partitions: every incident is in the hot table.")
+    for p in partitions:
+        where = p["archive_file"] if p["state"] == "compressed" else "table"
+        print(f"  {p['name']}  {p['rows']:>10,} rows  {where}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old incidents into monthly partitions and apply retention.")
+    parser.add_argument("--hot-months", type=int, default=HOT_MONTHS)
+    parser.add_argument("--compress-after", type=int, default=COMPRESS_AFTER_MONTHS,
+                        help="months after which partitions are compressed (0 = never)")
+    parser.add_argument("--drop-after", type=int, default=DROP_AFTER_MONTHS,
+                        help="months after which partitions are deleted (default: never)")
+    parser.add_argument("--now", help="count months back from this time instead of the newest incident")
+    parser.add_argument("--archive-dir", default=str(ARCHIVE_DIR))
+    parser.add_argument("--list", action="store_true", help="only list the partitions")
+    parser.add_argument("--restore", metavar="PARTITION", help="load a compressed partition back")
+    args = parser.parse_args()
+
+    if args.restore:
+        restore_partition(args.restore)
+        print(f"✓ restored {args.restore}")
+    elif not args.list:
+        done = apply_retention(args.hot_months, args.compress_after or None, args.drop_after, args.now,
+                               args.archive_dir)
+        for name, rows in done["moved"].items():
+            print(f"✓ moved {rows:,} incidents to {name}")
+        for name in done["compressed"]:
+            print(f"✓ compressed {name}")
+        for name in done["dropped"]:
+            print(f"✓ dropped {name}")
+    _print_partitions()
@@ -0,0 +1,201 @@
+# app/data/queries.py
+"""
+Builds the parameterized SQL behind the dashboard pages, so filtering and
+aggregation run inside SQLite and only the numbers a chart needs come back.
+
+Every builder returns (sql, params), ready for pd.read_sql_query or
+conn.execute. Filter values of None or "All" mean "no filter".
+Counts are read from the pre-aggregated rollup tables (app/data/rollups.py)
+whenever the filters only touch columns a rollup keeps. Time columns are
+sorted and bucketed on their integer epoch column (app/data/timestamps.py).
+"""
+from app.data.rollups import BUCKETS, UNKNOWN_BUCKET, find_rollup
+from app.data.timestamps import epoch_column, to_epoch
+
+# Columns the dashboard may filter or group on. Column names can't be bound
+# as parameters, so anything outside this list is rejected.
+TABLE_COLUMNS = {
+    "users": {"id", "username", "role"},
+    "cyber_incidents": {"id", "incident_id", "timestamp", "timestamp_epoch", "severity", "category",
+                        "status", "description"},
+    "datasets_metadata": {"dataset_id", "name", "rows", "columns", "uploaded_by", "upload_date"},
+    "it_tickets": {"id", "ticket_id", "user", "issue", "status", "created_date", "created_epoch",
+                   "priority", "assigned_to", "resolution_hours"},
+}
+# Every month of incidents, archived partitions included (app/data/partitions.py)
+TABLE_COLUMNS["cyber_incidents_all"] = TABLE_COLUMNS["cyber_incidents"] | {"source_table"}
+
+ALL = "All"
+
+
+def _check(table, *columns):
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"Unknown table: {table}")
+    for column in columns:
+        if column not in TABLE_COLUMNS[table]:
+            raise ValueError(f"Unknown column for {table}: {column}")
+
+
+def build_where(table, filters=None, extra=None):
+    """
+    Turn {"severity": "High", "status": "All"} into (" WHERE severity = ?", ["High"]).
+    `extra` is a list of raw SQL conditions to AND in (no parameters).
+    """
+    clauses, params = [], []
+    for column, value in (filters or {}).items():
+        if value is None or value == ALL:
+            continue
+        _check(table, column)
+        clauses.append(f"{column} = ?")
+        params.append(value)
+    clauses.extend(extra or [])
+    if not clauses:
+        return "", params
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def mutation_where(table, filters=None, time_column=None, before=None, after=None):
+    """
+    WHERE clause for a bulk UPDATE / DELETE: build_where() plus an optional time
+    range on `time_column` (`after` <= time < `before`), compared on its epoch
+    column when it has one. Raises ValueError if nothing would be filtered, so a
+    bulk call can't change every row of a table by accident.
+    """
+    where, params = build_where(table, filters)
+    clauses = [where[len(" WHERE "):]] if where else []
+    if before is not None or after is not None:
+        _check(table, time_column)
+        column = epoch_column(table, time_column) or time_column
+        for operator, value in (("<", before), (">=", after)):
+            if value is None:
+                continue
+            if column != time_column:
+                value = to_epoch([value])[0]
+                if value is None:
+                    raise ValueError(f"Can't read {before if operator == '<' else after!r} as a time")
+            clauses.append(f"{column} {operator} ?")
+            params.append(value)
+    if not clauses:
+        raise ValueError(f"Refusing to change every row of {table}: pass at least one filter")
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def select_rows(table, filters=None, columns=None):
+    """All matching rows (every column unless `columns` is given)."""
+    if columns:
+        _check(table, *columns)
+    where, params = build_where(table, filters)
+    column_sql = ", ".join(columns) if columns else "*"
+    return f"SELECT {column_sql} FROM {table}{where}", params
+
+
+def _active(filters):
+    """Columns that actually filter something (not None / "All")."""
+    return [column for column, value in (filters or {}).items() if value is not None and value != ALL]
+
+
+def count_by(table, column, filters=None):
+    """Row count per value of `column` (NULL shown as 'Unknown'), biggest first."""
+    _check(table, column)
+    where, params = build_where(table, filters)
+    rollup = find_rollup(table, "daily", [column] + _active(filters))
+    if rollup:
+        sql = (f"SELECT {column}, SUM(count) AS count FROM {rollup}{where} "
+               f"GROUP BY 1 HAVING SUM(count) > 0 ORDER BY count DESC")
+    else:
+        sql = (f"SELECT COALESCE({column}, 'Unknown') AS {column}, COUNT(*) AS count "
+               f"FROM {table}{where} GROUP BY 1 ORDER BY count DESC")
+    return sql, params
+
+
+def count_over_time(table, time_column, filters=None, grain="daily"):
+    """
+    Row count per day or hour (`grain` = "daily" / "hourly") of `time_column`,
+    returned as date | count where date is the epoch second the period starts at.
+    Unparseable timestamps are skipped.
+    """
+    _check(table, time_column)
+    seconds = BUCKETS[grain]
+    epoch = epoch_column(table, time_column)
+    rollup = find_rollup(table, grain, _active(filters), epoch) if epoch else None
+    if rollup:
+        where, params = build_where(table, filters, extra=[f"bucket != {UNKNOWN_BUCKET}"])
+        sql = (f"SELECT bucket AS date, SUM(count) AS count FROM {rollup}{where} "
+               f"GROUP BY 1 HAVING SUM(count) > 0 ORDER BY 1")
+    else:
+        # columns without a stored epoch are converted by SQLite on the fly
+        epoch = epoch or f"CAST(strftime('%s', {time_column}) AS INTEGER)"
+        where, params = build_where(table, filters, extra=[f"{epoch} IS NOT NULL"])
+        sql = (f"SELECT {epoch} / {seconds} * {seconds} AS date, COUNT(*) AS count "
+               f"FROM {table}{where} GROUP BY 1 ORDER BY 1")
+    return sql, params
+
+
+def count_per_day(table, time_column, filters=None):
+    """Row count per calendar day of `time_column`; unparseable dates are skipped."""
+    return count_over_time(table, time_column, filters, "daily")
+
+
+# Column used to break ties and resume keyset pagination for each table
+KEY_COLUMNS = {
+    "users": "id",
+    "cyber_incidents": "id",
+    "cyber_incidents_all": "id",
+    "datasets_metadata": "dataset_id",
+    "it_tickets": "id",
+}
+
+
+def count_rows(table, filters=None):
+    """Number of matching rows, summed from a rollup when possible, else one COUNT(*)."""
+    _check(table)
+    where, params = build_where(table, filters)
+    rollup = find_rollup(table, "daily", _active(filters))
+    if rollup:
+        return f"SELECT IFNULL(SUM(count), 0) AS count FROM {rollup}{where}", params
+    return f"SELECT COUNT(*) AS count FROM {table}{where}", params
+
+
+def select_page(table, filters=None, sort_column=None, descending=False, page_size=50, after=None):
+    """
+    One page of rows using keyset pagination: instead of OFFSET, `after` is the
+    (sort value, key) of the last row on the previous page, so every page costs
+    the same however deep the user goes. Use page_cursor() to get `after`.
+    Time columns are sorted on their epoch column, so the cursor is an integer range.
+    """
+    key = KEY_COLUMNS[table]
+    sort_column = sort_column or key
+    _check(table, sort_column)
+    sort_column = epoch_column(table, sort_column) or sort_column
+    direction, compare = ("DESC", "<") if descending else ("ASC", ">")
+
+    if sort_column == key:
+        extra = [f"{key} {compare} ?"] if after is not None else []
+        order = f"{key} {direction}"
+        cursor_params = [after[1]] if after is not None else []
+    else:
+        # NULLs can't be compared, so sort them as '' on both sides of the cursor
+        sort_expr = f"IFNULL({sort_column}, '')"
+        extra = [f"({sort_expr}, {key}) {compare} (?, ?)"] if after is not None else []
+        order = f"{sort_expr} {direction}, {key} {direction}"
+        cursor_params = list(after) if after is not None else []
+
+    where, params = build_where(table, filters, extra)
+    sql = f"SELECT * FROM {table}{where} ORDER BY {order} LIMIT ?"
+    return sql, params + cursor_params + [int(page_size)]
+
+
+def page_cursor(table, last_row, sort_column=None):
+    """
+    Build the `after` cursor for select_page() from the last row of a page
+    (any mapping, e.g. a DataFrame row). Missing values become '' like in the ORDER BY.
+    """
+    key = KEY_COLUMNS[table]
+    sort_column = sort_column or key
+    sort_value = last_row[epoch_column(table, sort_column) or sort_column]
+    if sort_value is None or sort_value != sort_value:  # None or NaN
+        sort_value = ""
+    if hasattr(sort_value, "item"):  # numpy scalar -> plain Python for sqlite3
+        sort_value = sort_value.item()
+    key_value = last_row[key]
+    return (sort_value, int(key_value))
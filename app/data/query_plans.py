@@ -0,0 +1,122 @@
+# app/data/query_plans.py
+"""
+EXPLAIN QUERY PLAN for every statement the app sends to SQLite.
+
+    python -m app.data.query_plans
+
+Keep APP_QUERIES in step with the SQL in app/data/*.py and home.py, so
+a new query that ends up doing a full table scan shows up here.
+"""
+from app.data.correlation import incident_details_query, incident_times_query, ticket_details_query, ticket_times_query
+from app.data.db import get_connection
+from app.data.incidents import UPSERT_INCIDENT_SQL
+from app.data.partitions import ALL_VIEW, HOT_TABLE
+from app.data.tickets import UPSERT_TICKET_SQL
+from app.data.queries import count_by, count_over_time, count_per_day, count_rows, select_page
+from app.data.search import count_matches, search_page
+from app.data.sla import sketch_query
+
+# name -> (sql, sample parameters)
+APP_QUERIES = {
+    # app/data/users.py
+    "users.insert_user": ("INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)", ("u", "h", "user")),
+    "users.get_all_users": ("SELECT id, username, role FROM users", ()),
+    "users.get_user_by_username": ("SELECT * FROM users WHERE username = ?", ("Olaf",)),
+    "users.update_user_role": ("UPDATE users SET role = ? WHERE username = ?", ("admin", "Olaf")),
+    "users.delete_user": ("DELETE FROM users WHERE username = ?", ("Olaf",)),
+    "users.update_user_role_where": ("UPDATE users SET role = ? WHERE role = ?", ("user", "analyst")),
+
+    # app/data/incidents.py
+    "incidents.insert_incident": (UPSERT_INCIDENT_SQL, (1, "", None, "", "", "", "")),
+    "incidents.get_all_incidents": ("SELECT id, incident_id, timestamp, severity, category, status, description FROM cyber_incidents_all", ()),
+    "incidents.update_incident_status": ("UPDATE cyber_incidents SET status = ? WHERE incident_id = ?", ("Closed", 1000)),
+    "incidents.delete_incident": ("DELETE FROM cyber_incidents WHERE incident_id = ?", (1000,)),
+    "incidents.update_incident_status_where": ("UPDATE cyber_incidents SET status = ? WHERE status = ? AND timestamp_epoch < ?",
+                                               ("Closed", "Resolved", 1717200000)),
+
+    # app/data/partitions.py
+    "partitions.list_partitions": ("SELECT name, start_epoch, end_epoch, rows, state, archive_file, changed_at "
+                                   "FROM incident_partitions WHERE state = ? ORDER BY start_epoch", ("table",)),
+    "partitions.locate_incidents": ("SELECT incident_id FROM cyber_incidents WHERE incident_id IN (?, ?)", (1000, 1001)),
+    "partitions.move_month": ("DELETE FROM cyber_incidents WHERE timestamp_epoch >= ? AND timestamp_epoch < ?",
+                              (1704067200, 1706745600)),
+
+    # app/data/datasets.py
+    "datasets.insert_dataset": ("INSERT OR REPLACE INTO datasets_metadata (dataset_id, name, rows, columns, uploaded_by, upload_date) VALUES (?, ?, ?, ?, ?, ?)", (1, "", 0, 0, "", "")),
+    "datasets.get_all_datasets": ("SELECT dataset_id, name, rows, columns, uploaded_by, upload_date FROM datasets_metadata", ()),
+    "datasets.update_dataset_rows": ("UPDATE datasets_metadata SET rows = ? WHERE dataset_id = ?", (10, 1)),
+    "datasets.delete_dataset": ("DELETE FROM datasets_metadata WHERE dataset_id = ?", (1,)),
+
+    # app/data/tickets.py
+    "tickets.insert_ticket": (UPSERT_TICKET_SQL, (1, "", "", "", "", None, "", "", None)),
+    "tickets.get_all_tickets": ("SELECT id, ticket_id, user, issue, status, created_date FROM it_tickets", ()),
+    "tickets.update_ticket_status": ("UPDATE it_tickets SET status = ? WHERE ticket_id = ?", ("Closed", 2000)),
+    "tickets.delete_ticket": ("DELETE FROM it_tickets WHERE ticket_id = ?", (2000,)),
+    "tickets.delete_tickets_where": ("DELETE FROM it_tickets WHERE status = ? AND created_epoch < ?", ("Resolved", 1704067200)),
+
+    # app/data/db.py / app/data/cache.py
+    "db.bump_table_version": ("UPDATE table_versions SET version = version + 1 WHERE table_name = ?", ("cyber_incidents",)),
+    "db.get_table_versions": ("SELECT table_name, version FROM table_versions WHERE table_name IN (?) ORDER BY table_name", ("cyber_incidents",)),
+
+    # app/data/ingest_state.py
+    "ingest_state.get_ingest_state": ("SELECT size, mtime_ns, sha256, offset, rows FROM ingest_state WHERE path = ?", ("DATA/cyber_incidents.csv",)),
+
+    # home.py (built by app/data/queries.py, shown with typical filters)
+    "home.users_page": select_page("users", after=(0, 0)),
+    "home.users_count": count_rows("users"),
+    "home.users_by_role": count_by("users", "role"),
+    "home.incidents_page": select_page(ALL_VIEW, {"severity": "High", "status": "Open"}, after=(0, 1000)),
+    "home.incidents_page_by_timestamp": select_page(ALL_VIEW, {"status": "Open"}, "timestamp", True, after=(1717200000, 1000)),
+    "home.incidents_count": count_rows(ALL_VIEW, {"severity": "High", "status": "Open"}),
+    "home.incidents_by_severity": count_by(ALL_VIEW, "severity", {"category": "Malware"}),
+    "home.incidents_per_day": count_per_day(ALL_VIEW, "timestamp", {"status": "Open"}),
+    "home.incidents_per_hour": count_over_time(ALL_VIEW, "timestamp", {"severity": "High"}, "hourly"),
+    "home.datasets_page": select_page("datasets_metadata"),
+    "home.datasets_count": count_rows("datasets_metadata"),
+    "home.datasets_by_uploader": count_by("datasets_metadata", "uploaded_by"),
+    "home.datasets_per_day": count_per_day("datasets_metadata", "upload_date"),
+    "home.tickets_page": select_page("it_tickets", {"status": "Open"}, after=(0, 1000)),
+    "home.tickets_count": count_rows("it_tickets", {"status": "Open"}),
+    "home.tickets_by_status": count_by("it_tickets", "status", {"status": "Open"}),
+    "home.tickets_per_day": count_per_day("it_tickets", "created_date", {"status": "Open"}),
+    "home.tickets_per_hour": count_over_time("it_tickets", "created_date", {"status": "Open"}, "hourly"),
+    "home.sla_overall": sketch_query((), {"priority": "High"}, "2024-10-01", "2025-01-01"),
+    "home.sla_by_priority_assignee": sketch_query(("priority", "assigned_to"), after="2024-01-01"),
+    "home.sla_by_week": sketch_query(("week",), {"assigned_to": "IT_Support_A"}),
+    "home.correlation_incidents": incident_times_query({"severity": "High", "category": "Phishing"}),
+    "home.correlation_tickets": ticket_times_query(),
+    "home.correlation_incident_details": incident_details_query(range(1000, 1020)),
+    "home.correlation_ticket_details": ticket_details_query(range(2000, 2200)),
+
+    # app/data/search.py (search boxes on the Incidents / Tickets pages; the incident
+    # view shown with the hot table only, the same statement repeats per partition table)
+    "search.incidents_page": search_page(ALL_VIEW, "phish* login", {"status": "Open"}, after=(-1.5, 1000), tables=[HOT_TABLE]),
+    "search.incidents_page_newest": search_page(ALL_VIEW, "login", after=(0.0, 1000), ranked=False, tables=[HOT_TABLE]),
+    "search.incidents_count": count_matches(ALL_VIEW, "phish* login", {"status": "Open"}, tables=[HOT_TABLE]),
+    "search.tickets_page": search_page("it_tickets", "password", {"status": "Open"}),
+    "search.tickets_count": count_matches("it_tickets", "password"),
+}
+
+
+def explain(sql, params=(), conn=None):
+    """Return the EXPLAIN QUERY PLAN detail lines for one statement."""
+    if conn is None:
+        with get_connection() as conn:
+            return explain(sql, params, conn)
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [detail for _, _, _, detail in rows]
+
+
+def dump_query_plans(queries=None):
+    """Print the plan of every query and return {name: [detail, ...]}."""
+    plans = {}
+    for name, (sql, params) in (queries or APP_QUERIES).items():
+        plans[name] = explain(sql, params)
+        print(f"{name}:")
+        for detail in plans[name]:
+            print(f"    {detail}")
+    return plans
+
+
+if __name__ == "__main__":
+    dump_query_plans()
@@ -0,0 +1,171 @@
+# app/data/replica.py
+"""
+Read-only copy of the database for the dashboard, refreshed with SQLite's backup API.
+
+    python -m app.data.replica [--path FILE] [--every SECONDS] [--force]
+
+refresh_replica() copies the main database into a temporary file in one
+backup step (a WAL read transaction, so ingestion keeps committing while it
+runs), switches the copy to rollback-journal mode and renames it to the next
+generation of REPLICA_PATH (intelligence_platform.replica.<n>.db). No file is
+ever replaced while open, which Windows would refuse. Readers opened through
+get_read_connection() move to the newest copy between queries, never see a
+half-written one, and never take a lock on the main database: heavy dashboard queries and the CSV loader stop waiting on
+each other, at the price of data up to one refresh interval old.
+
+In-process mode: APP_READ_REPLICA=1 (or enable_read_replica()) refreshes on a
+background thread every APP_REPLICA_REFRESH_S seconds (default 30) and runs a
+PASSIVE WAL checkpoint after each refresh. With APP_READ_REPLICA=external the
+app only reads the replica and the CLI above (--every) keeps it fresh. A copy
+is only made when some table_versions counter moved since the last one.
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.data import metrics
+from app.data.db import (
+    DB_PATH, checkpoint_wal, configure_read_replica, connect_database, current_replica, get_connection, get_pool,
+    replica_generations,
+)
+
+logger = logging.getLogger("app.replica")
+
+REPLICA_PATH = DB_PATH.with_name("intelligence_platform.replica.db")
+REPLICA_REFRESH_SECONDS = float(os.environ.get("APP_REPLICA_REFRESH_S", 30))
+
+_state = {"versions": None, "refreshed_at": None, "seconds": None, "error": None, "failed_at": None}
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def _versions():
+    with get_connection() as conn:
+        return tuple(conn.execute("SELECT table_name, version FROM table_versions ORDER BY table_name").fetchall())
+
+
+# Older copies kept after a refresh, for readers still on them
+KEEP_OLD_COPIES = 1
+
+
+@metrics.timed("replica.refresh")
+def refresh_replica(path=REPLICA_PATH, force=False):
+    """
+    Copy the main database to a new generation of the replica `path` if anything
+    changed since the last copy, then delete the older copies nobody reads any more.
+    Returns True when a new copy was written.
+    """
+    versions = _versions()
+    if not force and versions == _state["versions"] and current_replica(path) is not None:
+        return False
+
+    start = time.perf_counter()
+    path = Path(path)
+    target = path.with_name(f"{path.stem}.{time.time_ns()}{path.suffix}")
+    tmp = target.with_name(target.name + ".tmp")
+    src = connect_database(get_pool().db_path)
+    dst = connect_database(tmp)
+    try:
+        src.backup(dst)  # one step: a single consistent read of the source
+        # the copy inherits WAL mode; a plain journal lets it be opened immutable / read-only
+        dst.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        dst.close()
+        src.close()
+    os.rename(tmp, target)  # a new name, so nothing has it open; readers switch on their next query
+    _remove_old_copies(path)
+
+    _state.update(versions=versions, refreshed_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                  seconds=time.perf_counter() - start, error=None, failed_at=None)
+    return True
+
+
+def _remove_old_copies(path):
+    # a copy still open on Windows can't be deleted yet; it is retried after the next refresh
+    for old in replica_generations(path)[:-1 - KEEP_OLD_COPIES]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+    for tmp in path.parent.glob(f"{path.stem}.*{path.suffix}.tmp"):  # left by a failed refresh
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def replica_status():
+    """
+    {"refreshed_at", "seconds"} of the last copy made by this process (None before the first),
+    plus {"error", "failed_at"} of the last refresh if it failed.
+    """
+    return {key: _state[key] for key in ("refreshed_at", "seconds", "error", "failed_at")}
+
+
+class ReplicaRefresher:
+    def __init__(self, path=REPLICA_PATH, interval=REPLICA_REFRESH_SECONDS):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="replica-refresher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                refresh_replica(self.path)
+                checkpoint_wal()
+            except Exception as error:
+                logger.warning("replica refresh failed: %s", error)
+                _state.update(error=repr(error), failed_at=datetime.now(timezone.utc).isoformat(timespec="seconds"))
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+def enable_read_replica(path=REPLICA_PATH, interval=REPLICA_REFRESH_SECONDS):
+    """Copy the database now, point get_read_connection() at the copy and keep refreshing it."""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            refresh_replica(path)
+            configure_read_replica(path)
+            _refresher = ReplicaRefresher(path, interval)
+        return _refresher
+
+
+def disable_read_replica():
+    """Stop refreshing and send get_read_connection() back to the main database."""
+    global _refresher
+    with _refresher_lock:
+        refresher, _refresher = _refresher, None
+    if refresher is not None:
+        refresher.stop()
+    configure_read_replica(None)
+
+
+if os.environ.get("APP_READ_REPLICA", "") == "external":
+    configure_read_replica(REPLICA_PATH)
+elif os.environ.get("APP_READ_REPLICA", "") not in ("", "0"):
+    enable_read_replica()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy the database to a read-only replica for the dashboard.")
+    parser.add_argument("--path", default=str(REPLICA_PATH))
+    parser.add_argument("--every", type=float, default=None, help="keep running, refreshing every N seconds")
+    parser.add_argument("--force", action="store_true", help="copy even if nothing changed")
+    args = parser.parse_args()
+    while True:
+        if refresh_replica(args.path, force=args.force):
+            print(f"✓ Replica written to {current_replica(args.path)} in {_state['seconds']:.2f}s")
+        else:
+            print("✓ Replica unchanged, skipped")
+        checkpoint_wal()
+        if args.every is None:
+            break
+        time.sleep(args.every)
@@ -0,0 +1,72 @@
+# app/data/rollups.py
+"""
+Daily and hourly count tables behind the "over time" charts.
+
+Each row counts the source rows whose epoch timestamp falls in one day / hour
+(bucket = epoch second the period starts at, UNKNOWN_BUCKET if unparseable).
+Triggers created by schema migration 5 keep them in step with every write to
+cyber_incidents / it_tickets. The incident rollups count every month: the
+partition tables of archived months have the same triggers (migration 9 and
+app/data/partitions.py), so they count the rows of the cyber_incidents_all view.
+rebuild_rollups() recomputes them from scratch,
+e.g. after restoring a backup or bulk-editing rows with triggers disabled:
+
+    python -m app.data.rollups
+"""
+from app.data.db import bump_table_version, transaction
+from app.data.metrics import timed
+
+# Bucket width in seconds for each grain
+BUCKETS = {
+    "daily": 86400,
+    "hourly": 3600,
+}
+
+UNKNOWN_BUCKET = -1
+
+# rollup table -> (source table or view, epoch column, grain, dimension columns).
+# Must match the triggers in app/data/schema.py.
+ROLLUPS = {
+    "incident_daily_counts": ("cyber_incidents_all", "timestamp_epoch", "daily", ("severity", "category", "status")),
+    "incident_hourly_counts": ("cyber_incidents_all", "timestamp_epoch", "hourly", ("severity", "category", "status")),
+    "ticket_daily_counts": ("it_tickets", "created_epoch", "daily", ("status",)),
+    "ticket_hourly_counts": ("it_tickets", "created_epoch", "hourly", ("status",)),
+}
+
+# Views counted by a rollup -> the table whose table_versions counter covers them
+VERSIONED_AS = {"cyber_incidents_all": "cyber_incidents"}
+
+
+def find_rollup(table, grain, columns=(), time_column=None):
+    """
+    Name of a rollup of `table` at `grain` that has every column in `columns`
+    (and buckets the epoch column `time_column`, if given), or None if the query needs the base table.
+    """
+    for name, (source, ts, rollup_grain, dims) in ROLLUPS.items():
+        if (source == table and rollup_grain == grain and set(columns) <= set(dims)
+                and time_column in (None, ts)):
+            return name
+    return None
+
+
+@timed("rollups.rebuild_rollups")
+def rebuild_rollups(names=None):
+    """Recompute the given rollup tables (all of them by default) in one transaction."""
+    with transaction() as conn:
+        for name in names or ROLLUPS:
+            table, time_column, grain, dims = ROLLUPS[name]
+            seconds = BUCKETS[grain]
+            bucket = f"IFNULL({time_column} / {seconds} * {seconds}, {UNKNOWN_BUCKET})"
+            select = ", ".join([bucket] + [f"IFNULL({d}, 'Unknown')" for d in dims])
+            group_by = ", ".join(str(i) for i in range(1, len(dims) + 2))
+            conn.execute(f"DELETE FROM {name}")
+            conn.execute(f"""
+                INSERT INTO {name} (bucket, {", ".join(dims)}, count)
+                SELECT {select}, COUNT(*) FROM {table} GROUP BY {group_by}
+            """)
+            bump_table_version(conn, VERSIONED_AS.get(table, table))
+            print(f"✓ {name} rebuilt")
+
+
+if __name__ == "__main__":
+    rebuild_rollups()
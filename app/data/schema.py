@@ -1,56 +1,375 @@
 # app/data/schema.py
-from app.data.db import connect_database
+from app.data.db import get_connection, transaction
+from app.data.partitions import MANIFEST_SQL, copy_hot_triggers, view_sql
+from app.data.sla import SLA_SKETCH, sketch_values_sql
 
 def create_tables():
-    conn = connect_database()
-    cur = conn.cursor()
+    """Create the base tables, then bring the DB up to SCHEMA_VERSION."""
+    with transaction() as conn:
+        cur = conn.cursor()
 
-    # USERS TABLE
+        # USERS TABLE
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                role TEXT DEFAULT 'user'
+            );
+        """)
+
+        # CYBER INCIDENTS TABLE
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS cyber_incidents (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                incident_id INTEGER,
+                timestamp TEXT,
+                severity TEXT,
+                category TEXT,
+                status TEXT,
+                description TEXT
+            );
+        """)
+
+        # DATASETS METADATA TABLE
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS datasets_metadata (
+                dataset_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                rows INTEGER,
+                columns INTEGER,
+                uploaded_by TEXT,
+                upload_date TEXT
+            );
+        """)
+
+        # TICKETS TABLE (NOW WITH created_date)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS it_tickets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticket_id INTEGER,
+                user INTEGER,
+                issue TEXT,
+                status TEXT,
+                created_date TEXT
+            );
+        """)
+
+    with get_connection() as conn:
+        migrate(conn)
+
+
+# -----------------------------------------
+# MIGRATIONS
+# -----------------------------------------
+# Each function upgrades the schema by exactly one version. The version a DB
+# file has reached is stored in PRAGMA user_version, so every step runs once.
+# Only ever append to MIGRATIONS; never edit a step that has shipped.
+
+def _add_lookup_indexes(cur):
+    # key lookups used by update_*_status / delete_*
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incidents_incident_id ON cyber_incidents (incident_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tickets_ticket_id ON it_tickets (ticket_id)")
+
+    # dashboard filters (status + severity together, or on their own) and date charts
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incidents_status_severity ON cyber_incidents (status, severity)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incidents_severity ON cyber_incidents (severity)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incidents_category ON cyber_incidents (category)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incidents_timestamp ON cyber_incidents (timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tickets_status ON it_tickets (status)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tickets_created_date ON it_tickets (created_date)")
+
+def _add_table_versions(cur):
+    # one change counter per table, bumped by every insert/update/delete in app/data
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT DEFAULT 'user'
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
         );
     """)
+    cur.executemany(
+        "INSERT OR IGNORE INTO table_versions (table_name) VALUES (?)",
+        [("users",), ("cyber_incidents",), ("datasets_metadata",), ("it_tickets",)],
+    )
 
-    # CYBER INCIDENTS TABLE
+def _add_natural_keys_and_ingest_state(cur):
+    # Earlier loads appended every CSV row on every run. Keep the newest copy of
+    # each incident / ticket so incident_id and ticket_id can become unique keys.
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS cyber_incidents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            incident_id INTEGER,
-            timestamp TEXT,
-            severity TEXT,
-            category TEXT,
-            status TEXT,
-            description TEXT
-        );
+        DELETE FROM cyber_incidents
+        WHERE incident_id IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM cyber_incidents WHERE incident_id IS NOT NULL GROUP BY incident_id
+        )
+    """)
+    cur.execute("""
+        DELETE FROM it_tickets
+        WHERE ticket_id IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM it_tickets WHERE ticket_id IS NOT NULL GROUP BY ticket_id
+        )
     """)
+    cur.execute("UPDATE table_versions SET version = version + 1 WHERE table_name IN ('cyber_incidents', 'it_tickets')")
 
-    # DATASETS METADATA TABLE
+    # the unique indexes replace the plain lookup indexes from version 1
+    cur.execute("DROP INDEX IF EXISTS idx_incidents_incident_id")
+    cur.execute("DROP INDEX IF EXISTS idx_tickets_ticket_id")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_incidents_incident_id ON cyber_incidents (incident_id)")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_tickets_ticket_id ON it_tickets (ticket_id)")
+
+    # what has already been loaded from each source file (see csv_loader)
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS datasets_metadata (
-            dataset_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            rows INTEGER,
-            columns INTEGER,
-            uploaded_by TEXT,
-            upload_date TEXT
+        CREATE TABLE IF NOT EXISTS ingest_state (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            rows INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
         );
     """)
 
-    # TICKETS TABLE (NOW WITH created_date)
+def _add_rollup_tables(cur):
+    # Pre-aggregated counts for the time-series charts, kept up to date by triggers
+    # so every write path (single rows, bulk loads, upserts) maintains them.
+    # day / hour are '' when the source timestamp can't be parsed.
+    for grain, bucket in (("daily", "date({ts})"), ("hourly", "strftime('%Y-%m-%d %H:00:00', {ts})")):
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS incident_{grain}_counts (
+                bucket TEXT NOT NULL,
+                severity TEXT NOT NULL,
+                category TEXT NOT NULL,
+                status TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket, severity, category, status)
+            ) WITHOUT ROWID;
+        """)
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS ticket_{grain}_counts (
+                bucket TEXT NOT NULL,
+                status TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket, status)
+            ) WITHOUT ROWID;
+        """)
+
+        for table, rollup, ts, dims in (
+            ("cyber_incidents", f"incident_{grain}_counts", "timestamp", ("severity", "category", "status")),
+            ("it_tickets", f"ticket_{grain}_counts", "created_date", ("status",)),
+        ):
+            columns = ", ".join(("bucket",) + dims)
+
+            def values(row):
+                parts = [f"IFNULL({bucket.format(ts=f'{row}.{ts}')}, '')"]
+                parts += [f"IFNULL({row}.{d}, 'Unknown')" for d in dims]
+                return ", ".join(parts)
+
+            def add(row, delta):
+                return f"""
+                    INSERT INTO {rollup} ({columns}, count) VALUES ({values(row)}, {delta})
+                    ON CONFLICT ({columns}) DO UPDATE SET count = count + {delta};
+                """
+
+            cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{rollup}_insert AFTER INSERT ON {table} "
+                        f"BEGIN {add('NEW', 1)} END;")
+            cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{rollup}_delete AFTER DELETE ON {table} "
+                        f"BEGIN {add('OLD', -1)} END;")
+            cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{rollup}_update AFTER UPDATE OF {ts}, {', '.join(dims)} ON {table} "
+                        f"BEGIN {add('OLD', -1)} {add('NEW', 1)} END;")
+
+            # backfill from the rows already in the table
+            group_by = ", ".join(str(i) for i in range(1, len(dims) + 2))
+            cur.execute(f"DELETE FROM {rollup}")
+            cur.execute(f"""
+                INSERT INTO {rollup} ({columns}, count)
+                SELECT {values(table)}, COUNT(*) FROM {table} GROUP BY {group_by}
+            """)
+
+def _add_epoch_timestamps(cur):
+    # Integer epoch seconds (UTC) next to the text timestamps, so sorting, ranges
+    # and day / hour buckets are integer arithmetic (see app/data/timestamps.py).
+    # NULL when the text can't be parsed.
+    for table, text_column, epoch_column in (
+        ("cyber_incidents", "timestamp", "timestamp_epoch"),
+        ("it_tickets", "created_date", "created_epoch"),
+    ):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {epoch_column} INTEGER")
+        cur.execute(f"UPDATE {table} SET {epoch_column} = CAST(strftime('%s', {text_column}) AS INTEGER)")
+    cur.execute("UPDATE table_versions SET version = version + 1 WHERE table_name IN ('cyber_incidents', 'it_tickets')")
+    # the loader now also reads created_at as a ticket's created_date: forget what
+    # was loaded so the next load re-reads each CSV once (rows are upserted)
+    cur.execute("DELETE FROM ingest_state WHERE path LIKE '%.csv'")
+
+    # the epoch indexes replace the text timestamp indexes from version 1
+    cur.execute("DROP INDEX IF EXISTS idx_incidents_timestamp")
+    cur.execute("DROP INDEX IF EXISTS idx_tickets_created_date")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incidents_timestamp_epoch ON cyber_incidents (timestamp_epoch)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tickets_created_epoch ON it_tickets (created_epoch)")
+
+    # Rebuild the version 4 rollups on epoch buckets: bucket is the epoch second
+    # the day / hour starts at, or -1 when the timestamp can't be parsed.
+    for grain, seconds in (("daily", 86400), ("hourly", 3600)):
+        for table, rollup, ts, dims in (
+            ("cyber_incidents", f"incident_{grain}_counts", "timestamp_epoch", ("severity", "category", "status")),
+            ("it_tickets", f"ticket_{grain}_counts", "created_epoch", ("status",)),
+        ):
+            for event in ("insert", "delete", "update"):
+                cur.execute(f"DROP TRIGGER IF EXISTS trg_{rollup}_{event}")
+            cur.execute(f"DROP TABLE IF EXISTS {rollup}")
+            dim_columns = "".join(f"{d} TEXT NOT NULL, " for d in dims)
+            columns = ", ".join(("bucket",) + dims)
+            cur.execute(f"""
+                CREATE TABLE {rollup} (
+                    bucket INTEGER NOT NULL,
+                    {dim_columns}
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY ({columns})
+                ) WITHOUT ROWID;
+            """)
+
+            def values(row):
+                parts = [f"IFNULL({row}.{ts} / {seconds} * {seconds}, -1)"]
+                parts += [f"IFNULL({row}.{d}, 'Unknown')" for d in dims]
+                return ", ".join(parts)
+
+            def add(row, delta):
+                return f"""
+                    INSERT INTO {rollup} ({columns}, count) VALUES ({values(row)}, {delta})
+                    ON CONFLICT ({columns}) DO UPDATE SET count = count + {delta};
+                """
+
+            cur.execute(f"CREATE TRIGGER trg_{rollup}_insert AFTER INSERT ON {table} "
+                        f"BEGIN {add('NEW', 1)} END;")
+            cur.execute(f"CREATE TRIGGER trg_{rollup}_delete AFTER DELETE ON {table} "
+                        f"BEGIN {add('OLD', -1)} END;")
+            cur.execute(f"CREATE TRIGGER trg_{rollup}_update AFTER UPDATE OF {ts}, {', '.join(dims)} ON {table} "
+                        f"BEGIN {add('OLD', -1)} {add('NEW', 1)} END;")
+
+            group_by = ", ".join(str(i) for i in range(1, len(dims) + 2))
+            cur.execute(f"""
+                INSERT INTO {rollup} ({columns}, count)
+                SELECT {values(table)}, COUNT(*) FROM {table} GROUP BY {group_by}
+            """)
+
+def _add_search_index(cur):
+    # FTS5 full-text indexes over incident descriptions and ticket issues. They are
+    # "external content" tables (the text lives only in the base table) kept in
+    # step by triggers; prefix='2 3' makes short prefix queries (ph*, mal*) fast.
+    for table, fts, column in (
+        ("cyber_incidents", "incidents_fts", "description"),
+        ("it_tickets", "tickets_fts", "issue"),
+    ):
+        cur.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {column}, content='{table}', content_rowid='id', prefix='2 3'
+            );
+        """)
+        add = f"INSERT INTO {fts} (rowid, {column}) VALUES (NEW.id, NEW.{column});"
+        remove = f"INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', OLD.id, OLD.{column});"
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table} BEGIN {add} END;")
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table} BEGIN {remove} END;")
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {column} ON {table} "
+                    f"BEGIN {remove} {add} END;")
+        cur.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def _add_ticket_sla(cur):
+    # The ticket CSV's priority, assigned_to and resolution_time_hours columns were
+    # never stored. Add them, and forget the loaded ticket files so the next load
+    # re-reads them once and fills the new columns in (rows are upserted).
+    cur.execute("ALTER TABLE it_tickets ADD COLUMN priority TEXT")
+    cur.execute("ALTER TABLE it_tickets ADD COLUMN assigned_to TEXT")
+    cur.execute("ALTER TABLE it_tickets ADD COLUMN resolution_hours REAL")
+    cur.execute("DELETE FROM ingest_state WHERE path LIKE '%it_tickets%.csv'")
+    cur.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = 'it_tickets'")
+
+    # Resolution-time histogram per week / priority / assignee (see app/data/sla.py),
+    # kept up to date by triggers like the rollups. Tickets without a time aren't counted.
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SLA_SKETCH} (
+            week INTEGER NOT NULL,
+            priority TEXT NOT NULL,
+            assigned_to TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (priority, assigned_to, week, bucket)
+        ) WITHOUT ROWID;
+    """)
+
+    def add(row, delta):
+        return f"""
+            INSERT INTO {SLA_SKETCH} (week, priority, assigned_to, bucket, count)
+            SELECT {sketch_values_sql(row)}, {delta} WHERE {row}.resolution_hours IS NOT NULL
+            ON CONFLICT (priority, assigned_to, week, bucket) DO UPDATE SET count = count + {delta};
+        """
+
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{SLA_SKETCH}_insert AFTER INSERT ON it_tickets "
+                f"BEGIN {add('NEW', 1)} END;")
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{SLA_SKETCH}_delete AFTER DELETE ON it_tickets "
+                f"BEGIN {add('OLD', -1)} END;")
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{SLA_SKETCH}_update "
+                f"AFTER UPDATE OF created_epoch, priority, assigned_to, resolution_hours ON it_tickets "
+                f"BEGIN {add('OLD', -1)} {add('NEW', 1)} END;")
+
+def _add_incident_partitions(cur):
+    # Older months of cyber_incidents can be moved into monthly partition tables
+    # (app/data/partitions.py). Starts with no partitions: the view is the hot table.
+    cur.execute(MANIFEST_SQL)
+    cur.execute(view_sql([]))
+
+def _index_archived_incidents(cur):
+    # The rollups and the search index cover the archived months too (app/data/partitions.py):
+    # the search index reads its text from the cyber_incidents_all view, every partition
+    # table gets the hot table's triggers, and both are recomputed from the view.
+    cur.execute("DROP TABLE IF EXISTS incidents_fts")
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS it_tickets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticket_id INTEGER,
-            user INTEGER,
-            issue TEXT,
-            status TEXT,
-            created_date TEXT
+        CREATE VIRTUAL TABLE incidents_fts USING fts5(
+            description, content='cyber_incidents_all', content_rowid='id', prefix='2 3'
         );
     """)
+    cur.execute("INSERT INTO incidents_fts (incidents_fts) VALUES ('rebuild')")
+    for (name,) in cur.execute("SELECT name FROM incident_partitions WHERE state = 'table'").fetchall():
+        copy_hot_triggers(cur, name)
+    for grain, seconds in (("daily", 86400), ("hourly", 3600)):
+        rollup = f"incident_{grain}_counts"
+        cur.execute(f"DELETE FROM {rollup}")
+        cur.execute(f"""
+            INSERT INTO {rollup} (bucket, severity, category, status, count)
+            SELECT IFNULL(timestamp_epoch / {seconds} * {seconds}, -1), IFNULL(severity, 'Unknown'),
+                   IFNULL(category, 'Unknown'), IFNULL(status, 'Unknown'), COUNT(*)
+            FROM cyber_incidents_all GROUP BY 1, 2, 3, 4
+        """)
+    cur.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = 'cyber_incidents'")
+
+MIGRATIONS = [
+    _add_lookup_indexes,    # version 1
+    _add_table_versions,    # version 2
+    _add_natural_keys_and_ingest_state,    # version 3
+    _add_rollup_tables,    # version 4
+    _add_epoch_timestamps,    # version 5
+    _add_search_index,    # version 6
+    _add_ticket_sla,    # version 7
+    _add_incident_partitions,    # version 8
+    _index_archived_incidents,    # version 9
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
 
-    conn.commit()
-    conn.close()
+def migrate(conn):
+    """Apply every migration the DB hasn't seen yet, each in its own transaction."""
+    version = get_schema_version(conn)
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        cur = conn.cursor()
+        cur.execute("BEGIN")  # sqlite3 doesn't open one for DDL by itself
+        try:
+            MIGRATIONS[number - 1](cur)
+            cur.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"✓ schema migrated to version {number}")
+    if version < SCHEMA_VERSION:
+        # refresh planner statistics so the new indexes get used
+        conn.execute("PRAGMA optimize")
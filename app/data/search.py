@@ -0,0 +1,185 @@
+# app/data/search.py
+"""
+Keyword search over incident descriptions and ticket issues.
+
+The FTS5 indexes are created by schema migration 6 and kept in step with
+cyber_incidents / it_tickets by triggers, so every write path is covered.
+The incident index covers every month: it is searched through the
+cyber_incidents_all view, whose partition tables have the same triggers
+(app/data/partitions.py). SQLite would read the whole view to join it to the
+matches, so a search of the view is one join per table, glued with UNION ALL.
+Results are ranked with bm25 (best match first) and paged with a keyset
+cursor, like select_page() in app/data/queries.py. Ranking scores every
+match, so a search matching more than MAX_RANKED_MATCHES rows is shown
+newest first instead, which the index can answer without scoring.
+
+Search text is split into words that must all appear; a word ending in *
+matches any word starting with it ("phish*" finds "phishing").
+
+    python -m app.data.search          # rebuild + optimize both indexes
+"""
+import re
+
+from app.data.db import get_connection, get_read_connection, transaction
+from app.data.metrics import timed
+from app.data.partitions import ALL_VIEW, ROW_COLUMNS, incident_tables
+from app.data.queries import KEY_COLUMNS, build_where
+
+# table or view -> (FTS5 table, indexed column)
+SEARCH_INDEXES = {
+    "cyber_incidents_all": ("incidents_fts", "description"),
+    "it_tickets": ("tickets_fts", "issue"),
+}
+
+# Above this many matches bm25 ranking gets slow (about 2-3 s per million matches)
+MAX_RANKED_MATCHES = 100_000
+
+_WORD_RE = re.compile(r"(\w+)(\*?)")
+
+
+def match_expression(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression, or None if it has no words.
+    Every word is quoted, so FTS5 operators typed by the user are just text.
+    """
+    terms = [f'"{word}"' + ("*" if star else "") for word, star in _WORD_RE.findall(text or "")]
+    return " ".join(terms) if terms else None
+
+
+def _matches(table, expression, filters, score="0.0", extra=None):
+    # FROM clause and parameters shared by search_page() and count_matches().
+    # CROSS JOIN makes SQLite read the index first: otherwise it may walk every
+    # row passing the filters and probe the index once per row.
+    fts, _ = SEARCH_INDEXES[table]
+    key = KEY_COLUMNS[table]
+    where, params = build_where(table, filters, extra)
+    sql = (f"FROM (SELECT rowid, {score} AS score FROM {fts} WHERE {fts} MATCH ?) AS m "
+           f"CROSS JOIN {table} AS t ON t.{key} = m.rowid{where}")
+    return sql, [expression] + params
+
+
+def _view_tables(tables=None):
+    """`tables`, or the hot incident table and every partition table, listed where the dashboard reads."""
+    if tables is not None:
+        return tables
+    with get_read_connection() as conn:
+        return incident_tables(conn)
+
+
+def _view_arms(expression, filters, extra, arm_params, tables, score=None, select=None, tail=""):
+    """
+    One SELECT per table behind the incident view, each joining the matches `m` to the
+    table: a CTE the caller defines, or with `score`, a subquery in every arm.
+    `arm_params` follow the filter parameters of each arm. Returns (arms, params).
+    """
+    fts, _ = SEARCH_INDEXES[ALL_VIEW]
+    where, params = build_where(ALL_VIEW, filters, extra)
+    matches = "m" if score is None else f"(SELECT rowid, {score} AS score FROM {fts} WHERE {fts} MATCH ?) AS m"
+    arms, arms_params = [], []
+    for table in _view_tables(tables):
+        columns = select or f"'{table}' AS source_table, {', '.join(f't.{c}' for c in ROW_COLUMNS)}, m.score"
+        arms.append(f"SELECT {columns} FROM {matches} CROSS JOIN {table} AS t ON t.id = m.rowid{where}{tail}")
+        arms_params += ([] if score is None else [expression]) + params + arm_params
+    return arms, arms_params
+
+
+def search_page(table, text, filters=None, page_size=50, after=None, ranked=True, tables=None):
+    """
+    One page of rows from `table` matching `text`, with a `score` column.
+    ranked=True: best match first (bm25, lower score is better).
+    ranked=False: newest row first, score 0 (pass it when count_matches() > MAX_RANKED_MATCHES).
+    `after` is the (score, key) of the last row on the previous page; use search_cursor() to get it.
+    Returns (sql, params), or None if `text` has nothing to search for. For the incident
+    view, `tables` are the tables behind it (default: incident_tables() on the dashboard's
+    read connection).
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return None
+    fts, _ = SEARCH_INDEXES[table]
+    key = KEY_COLUMNS[table]
+    if ranked:
+        extra = [f"(m.score, t.{key}) > (?, ?)"] if after is not None else []
+        cursor_params = list(after) if after is not None else []
+        score, order = f"bm25({fts})", f"m.score, t.{key}"
+    else:
+        # ordering on m.rowid (not the joined table) lets the index return rows already in order
+        extra = ["m.rowid < ?"] if after is not None else []
+        cursor_params = [after[1]] if after is not None else []
+        score, order = "0.0", "m.rowid DESC"
+    if table == ALL_VIEW and ranked:
+        # with partitions, every match is scored once, then looked up in each table
+        tables = _view_tables(tables)
+        shared = len(tables) > 1
+        arms, params = _view_arms(expression, filters, extra, cursor_params, tables, None if shared else score)
+        head = f"WITH m AS MATERIALIZED (SELECT rowid, {score} AS score FROM {fts} WHERE {fts} MATCH ?)\n"
+        sql = (head if shared else "") + "\nUNION ALL ".join(arms) + f"\nORDER BY score, {key} LIMIT ?"
+        return sql, ([expression] if shared else []) + params + [int(page_size)]
+    if table == ALL_VIEW:
+        # newest first: each table stops after a page of matches
+        arms, params = _view_arms(expression, filters, extra, cursor_params + [int(page_size)], tables, score,
+                                  tail=" ORDER BY m.rowid DESC LIMIT ?")
+        sql = "\nUNION ALL ".join(f"SELECT * FROM ({arm})" for arm in arms) + f"\nORDER BY {key} DESC LIMIT ?"
+        return sql, params + [int(page_size)]
+    from_sql, params = _matches(table, expression, filters, score, extra)
+    sql = f"SELECT t.*, m.score {from_sql} ORDER BY {order} LIMIT ?"
+    return sql, params + cursor_params + [int(page_size)]
+
+
+def count_matches(table, text, filters=None, tables=None):
+    """Number of rows matching `text` (and `filters`) as (sql, params), or None. `tables` as in search_page()."""
+    expression = match_expression(text)
+    if expression is None:
+        return None
+    if not build_where(table, filters)[1]:
+        # no filters: the index alone knows how many rows match
+        fts, _ = SEARCH_INDEXES[table]
+        return f"SELECT COUNT(*) AS count FROM {fts} WHERE {fts} MATCH ?", [expression]
+    if table == ALL_VIEW:
+        fts, _ = SEARCH_INDEXES[table]
+        tables = _view_tables(tables)
+        shared = len(tables) > 1
+        arms, params = _view_arms(expression, filters, None, [], tables, None if shared else "0.0",
+                                  select="COUNT(*) AS count")
+        head = f"WITH m AS MATERIALIZED (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)\n"
+        sql = (head if shared else "") + "SELECT SUM(count) AS count FROM (" + "\nUNION ALL ".join(arms) + ")"
+        return sql, ([expression] if shared else []) + params
+    from_sql, params = _matches(table, expression, filters)
+    return f"SELECT COUNT(*) AS count {from_sql}", params
+
+
+def search_cursor(table, last_row):
+    """The `after` cursor for search_page() from the last row of a page."""
+    score, key_value = last_row["score"], last_row[KEY_COLUMNS[table]]
+    if hasattr(score, "item"):  # numpy scalar -> plain Python for sqlite3
+        score = score.item()
+    return (score, int(key_value))
+
+
+@timed("search.search")
+def search(table, text, filters=None, page_size=50, after=None):
+    """
+    Run search_page() and return the rows as tuples (empty list for blank text).
+    Results are ranked unless there are more than MAX_RANKED_MATCHES of them.
+    """
+    if match_expression(text) is None:
+        return []
+    with get_connection() as conn:
+        tables = incident_tables(conn) if table == ALL_VIEW else None
+        ranked = conn.execute(*count_matches(table, text, filters, tables)).fetchone()[0] <= MAX_RANKED_MATCHES
+        return conn.execute(*search_page(table, text, filters, page_size, after, ranked, tables)).fetchall()
+
+
+@timed("search.rebuild_search_index")
+def rebuild_search_index(tables=None):
+    """Re-read the indexed text from the base tables and merge the index segments."""
+    with transaction() as conn:
+        for table in tables or SEARCH_INDEXES:
+            fts, _ = SEARCH_INDEXES[table]
+            conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+            conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+            print(f"✓ {fts} rebuilt")
+
+
+if __name__ == "__main__":
+    rebuild_search_index()
@@ -0,0 +1,258 @@
+# app/data/sla.py
+"""
+Ticket resolution-time percentiles (p50 / p90 / p99 ...) by priority,
+assignee and week.
+
+Answering "p95 for High priority last quarter" from it_tickets would read
+every ticket in the range. Instead each ticket with a resolution time is
+counted into a small histogram, the sketch table `ticket_sla_sketch`:
+one row per (week, priority, assigned_to, bucket) with a count. Triggers
+created by schema migration 7 update it on every insert / update / delete,
+so it is always current, and any percentile for any mix of priorities,
+assignees and weeks is a sum over a few hundred sketch rows.
+
+Buckets are log-scale, SLA_BUCKETS_PER_OCTAVE per doubling of the hours, so
+a percentile read from the sketch (the upper bound of its bucket) is never
+below the exact value and at most ~9% above it. Times above the last bound
+fall into an open bucket and are reported as infinity. Pass exact=True to
+resolution_percentiles() to compute the percentiles from the ticket rows
+instead (vectorized nearest-rank, same definition as the sketch).
+
+Weeks start on Monday 00:00 UTC; `after` / `before` are rounded down to the
+start of their week. rebuild_sla_sketch() recomputes the table from scratch:
+
+    python -m app.data.sla
+"""
+import numpy as np
+import pandas as pd
+
+from app.data.db import bump_table_version, transaction
+from app.data.frames import read_frame
+from app.data.metrics import timed
+from app.data.queries import ALL
+from app.data.timestamps import to_epoch
+
+SLA_SKETCH = "ticket_sla_sketch"
+SKETCH_DIMENSIONS = ("week", "priority", "assigned_to")
+
+# Upper bounds (hours) of the sketch buckets: 2^-6 h (~1 minute) to 2^14 h (~1.9 years).
+# Stored sketches depend on them: changing them needs a migration that rebuilds the sketch.
+SLA_BUCKETS_PER_OCTAVE = 8
+SLA_BUCKET_HOURS = [float(f"{2 ** (i / SLA_BUCKETS_PER_OCTAVE):.6g}")
+                    for i in range(-6 * SLA_BUCKETS_PER_OCTAVE, 14 * SLA_BUCKETS_PER_OCTAVE + 1)]
+_BUCKET_UPPER = np.array(SLA_BUCKET_HOURS + [np.inf])
+
+WEEK_SECONDS = 7 * 86400
+WEEK_ORIGIN = 4 * 86400  # 1970-01-05, a Monday
+UNKNOWN_WEEK = -1
+
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def _bucket_case(expr, lo, hi):
+    # binary search over the bounds, so a row costs ~8 comparisons instead of ~160
+    if lo == hi:
+        return str(lo)
+    mid = (lo + hi) // 2
+    return (f"CASE WHEN {expr} <= {SLA_BUCKET_HOURS[mid]!r} "
+            f"THEN {_bucket_case(expr, lo, mid)} ELSE {_bucket_case(expr, mid + 1, hi)} END")
+
+
+def bucket_sql(hours):
+    """SQL for the sketch bucket of the hours expression `hours` (len(SLA_BUCKET_HOURS) = above the last bound)."""
+    return _bucket_case(hours, 0, len(SLA_BUCKET_HOURS))
+
+
+def week_sql(epoch):
+    """SQL for the epoch second the week of `epoch` starts at, UNKNOWN_WEEK when it is NULL."""
+    return f"IFNULL(({epoch} - {WEEK_ORIGIN}) / {WEEK_SECONDS} * {WEEK_SECONDS} + {WEEK_ORIGIN}, {UNKNOWN_WEEK})"
+
+
+def sketch_values_sql(row):
+    """week, priority, assigned_to, bucket of ticket `row` (NEW / OLD in a trigger, or the table name)."""
+    return ", ".join([
+        week_sql(f"{row}.created_epoch"),
+        f"IFNULL({row}.priority, 'Unknown')",
+        f"IFNULL({row}.assigned_to, 'Unknown')",
+        bucket_sql(f"{row}.resolution_hours"),
+    ])
+
+
+def week_start(value):
+    """Epoch second of the Monday starting the week `value` (a date / timestamp string) falls in."""
+    epoch = to_epoch([value])[0]
+    if epoch is None:
+        raise ValueError(f"Can't read {value!r} as a time")
+    return (epoch - WEEK_ORIGIN) // WEEK_SECONDS * WEEK_SECONDS + WEEK_ORIGIN
+
+
+def _check_group_by(group_by):
+    unknown = set(group_by) - set(SKETCH_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Can't group ticket SLAs by: {', '.join(sorted(unknown))}")
+
+
+def _where(filters, after, before, sketch):
+    # the sketch stores NULL priority / assignee as 'Unknown' and weeks as week starts
+    clauses, params = [], []
+    for column in ("priority", "assigned_to"):
+        value = (filters or {}).get(column)
+        if value is not None and value != ALL:
+            clauses.append(f"{column} = ?" if sketch else f"IFNULL({column}, 'Unknown') = ?")
+            params.append(value)
+    time_column = "week" if sketch else "created_epoch"
+    if after is not None:
+        clauses.append(f"{time_column} >= ?")
+        params.append(week_start(after))
+    if before is not None:
+        clauses.append(f"{time_column} < ?")
+        params.append(week_start(before))
+        if sketch:
+            clauses.append(f"week != {UNKNOWN_WEEK}")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def sketch_query(group_by=("priority",), filters=None, after=None, before=None):
+    """
+    (sql, params) for the sketch counts behind percentiles_from_sketch(): one row per
+    group and bucket, in group then bucket order. `filters` is {"priority": ..., "assigned_to": ...}
+    ("All" / None = no filter); weeks starting in [after, before) are included.
+    """
+    _check_group_by(group_by)
+    where, params = _where(filters, after, before, sketch=True)
+    keys = "".join(f"{column}, " for column in group_by)
+    sql = (f"SELECT {keys}bucket, SUM(count) AS count FROM {SLA_SKETCH}{where} "
+           f"GROUP BY {keys}bucket HAVING SUM(count) > 0 ORDER BY {keys}bucket")
+    return sql, params
+
+
+def percentile_column(fraction):
+    """Result column for a percentile: 0.5 -> "p50_hours", 0.999 -> "p99.9_hours"."""
+    return f"p{fraction * 100:g}_hours"
+
+
+def percentiles_from_sketch(sketch, group_by=("priority",), percentiles=DEFAULT_PERCENTILES):
+    """
+    Percentiles per group from sketch_query() rows, computed with a grouped cumulative sum.
+    Returns group columns | tickets | p50_hours | ...
+    """
+    keys = list(group_by)
+    sketch = sketch.reset_index(drop=True).astype({"count": "int64"})  # read_frame may narrow it
+    if not keys:
+        keys = ["_all"]
+        sketch = sketch.assign(_all=0)
+    grouped = sketch.groupby(keys, sort=False, observed=True)["count"]
+    running = grouped.cumsum().to_numpy()
+    totals = grouped.transform("sum").to_numpy()
+
+    result = sketch.groupby(keys, sort=False, observed=True)["count"].sum().rename("tickets").to_frame()
+    for fraction in percentiles:
+        # first bucket of each group whose running count reaches the rank
+        reached = sketch.loc[running >= fraction * totals]
+        first = reached.groupby(keys, sort=False, observed=True)["bucket"].first()
+        result[percentile_column(fraction)] = _BUCKET_UPPER[first.reindex(result.index).to_numpy(dtype=np.int64)]
+    result = result.reset_index()
+    return result.drop(columns="_all") if "_all" in result else result
+
+
+def _exact_percentiles(rows, group_by, percentiles):
+    # nearest rank: the smallest value with at least fraction * n values <= it
+    keys = list(group_by)
+    if not keys:
+        rows = rows.assign(_all=0)
+        keys = ["_all"]
+    codes = rows.groupby(keys, sort=True, observed=True).ngroup().to_numpy()
+    hours = rows["resolution_hours"].to_numpy(dtype=float)
+    order = np.lexsort((hours, codes))
+    hours, codes = hours[order], codes[order]
+    sizes = np.bincount(codes)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    result = rows.groupby(keys, sort=True, observed=True).size().rename("tickets").to_frame()
+    for fraction in percentiles:
+        rank = np.maximum(np.ceil(fraction * sizes).astype(np.int64), 1)
+        result[percentile_column(fraction)] = hours[starts + rank - 1]
+    result = result.reset_index()
+    return result.drop(columns="_all") if "_all" in result else result
+
+
+@timed("sla.resolution_percentiles")
+def resolution_percentiles(group_by=("priority",), percentiles=DEFAULT_PERCENTILES, filters=None,
+                           after=None, before=None, exact=False):
+    """
+    Resolution-time percentiles (hours) of the tickets matching `filters`, created in
+    the weeks starting in [after, before), per combination of the `group_by` columns
+    (any of "week", "priority", "assigned_to"; empty = one overall row).
+    Read from the sketch unless exact=True, which reads every matching ticket.
+    """
+    _check_group_by(group_by)
+    if not exact:
+        return percentiles_from_sketch(read_frame(*sketch_query(group_by, filters, after, before)),
+                                       group_by, percentiles)
+
+    where, params = _where(filters, after, before, sketch=False)
+    where = f"{where} AND resolution_hours IS NOT NULL" if where else " WHERE resolution_hours IS NOT NULL"
+    rows = read_frame(
+        f"SELECT {week_sql('created_epoch')} AS week, IFNULL(priority, 'Unknown') AS priority, "
+        f"IFNULL(assigned_to, 'Unknown') AS assigned_to, resolution_hours FROM it_tickets{where}",
+        params,
+    )
+    if rows.empty:
+        return _no_percentiles(group_by, percentiles)
+    return _exact_percentiles(rows, group_by, percentiles)
+
+
+def _no_percentiles(group_by, percentiles):
+    return pd.DataFrame(columns=list(group_by) + ["tickets"] + [percentile_column(p) for p in percentiles])
+
+
+def percentiles_from_tickets(tickets, group_by=("priority",), percentiles=DEFAULT_PERCENTILES, filters=None,
+                             after=None, before=None):
+    """
+    resolution_percentiles(exact=True) for tickets already in memory, e.g. a columnar
+    snapshot: `tickets` has created_epoch (epoch seconds or datetimes), priority,
+    assigned_to and resolution_hours columns.
+    """
+    _check_group_by(group_by)
+    epochs = tickets["created_epoch"]
+    if not pd.api.types.is_numeric_dtype(epochs.dtype):
+        epochs = epochs.astype("datetime64[s]").astype("int64").where(epochs.notna())
+    epochs = epochs.astype("float64")
+    rows = pd.DataFrame({
+        "week": ((epochs - WEEK_ORIGIN) // WEEK_SECONDS * WEEK_SECONDS + WEEK_ORIGIN)
+        .fillna(UNKNOWN_WEEK).astype("int64"),
+        "priority": tickets["priority"].astype(object).fillna("Unknown"),
+        "assigned_to": tickets["assigned_to"].astype(object).fillna("Unknown"),
+        "resolution_hours": tickets["resolution_hours"].astype("float64"),
+    })
+    keep = rows["resolution_hours"].notna()
+    for column in ("priority", "assigned_to"):
+        value = (filters or {}).get(column)
+        if value is not None and value != ALL:
+            keep &= rows[column] == value
+    if after is not None:
+        keep &= epochs >= week_start(after)
+    if before is not None:
+        keep &= epochs < week_start(before)
+    rows = rows[keep.to_numpy()]
+    if rows.empty:
+        return _no_percentiles(group_by, percentiles)
+    return _exact_percentiles(rows, group_by, percentiles)
+
+
+@timed("sla.rebuild_sla_sketch")
+def rebuild_sla_sketch():
+    """Recompute the sketch from it_tickets in one transaction."""
+    with transaction() as conn:
+        conn.execute(f"DELETE FROM {SLA_SKETCH}")
+        conn.execute(f"""
+            INSERT INTO {SLA_SKETCH} (week, priority, assigned_to, bucket, count)
+            SELECT {sketch_values_sql("it_tickets")}, COUNT(*) FROM it_tickets
+            WHERE resolution_hours IS NOT NULL GROUP BY 1, 2, 3, 4
+        """)
+        bump_table_version(conn, "it_tickets")
+    print(f"✓ {SLA_SKETCH} rebuilt")
+
+
+if __name__ == "__main__":
+    rebuild_sla_sketch()
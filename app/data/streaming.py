@@ -0,0 +1,62 @@
+# app/data/streaming.py
+"""
+Whole-table reads that stream instead of building one big list.
+
+get_all_*() returns every row at once, which at tens of millions of rows is
+gigabytes of tuples. The iter_*() functions in users / incidents / tickets /
+datasets are generators over iter_table(): one SELECT ordered by the table's
+key, read with fetchmany() `batch_size` rows at a time, so memory stays at one
+batch however big the table is. The whole iteration is one read transaction
+(a consistent view of the table); in WAL mode writers are not blocked by it.
+
+Options shared by all of them:
+  columns     only these columns (validated like the dashboard queries)
+  after       resume after this key value (the `id` / `dataset_id` of the last row seen)
+  as_objects  yield small __slots__ objects (row.status) instead of plain tuples
+"""
+import functools
+from dataclasses import make_dataclass
+
+from app.data.db import get_connection
+from app.data.queries import KEY_COLUMNS, TABLE_COLUMNS
+
+# Rows fetched from SQLite per fetchmany()
+ITER_BATCH_ROWS = 10_000
+
+
+@functools.lru_cache(maxsize=None)
+def row_class(table, columns):
+    """A slotted class with one attribute per column, e.g. IncidentsRow(id=1, status='Open')."""
+    name = "".join(part.title() for part in table.split("_")) + "Row"
+    return make_dataclass(name, columns, slots=True)
+
+
+def iter_table(table, columns, batch_size=ITER_BATCH_ROWS, after=None, as_objects=False, source=None):
+    """
+    Yield the rows of `table` in key order (see the module docstring for the options).
+    `source` reads another table with the same columns instead (an incident partition).
+    """
+    columns = tuple(columns)
+    unknown = [c for c in columns if c not in TABLE_COLUMNS.get(table, ())]
+    if unknown or not columns:
+        raise ValueError(f"Unknown columns for {table}: {', '.join(unknown) or '(none given)'}")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    key = KEY_COLUMNS[table]
+    where, params = (f" WHERE {key} > ?", (after,)) if after is not None else ("", ())
+    make = row_class(table, columns) if as_objects else None
+
+    with get_connection() as conn:
+        cur = conn.execute(f"SELECT {', '.join(columns)} FROM {source or table}{where} ORDER BY {key}", params)
+        try:
+            while True:
+                batch = cur.fetchmany(batch_size)
+                if not batch:
+                    return
+                if make is None:
+                    yield from batch
+                else:
+                    for row in batch:
+                        yield make(*row)
+        finally:
+            cur.close()  # also when the caller stops early
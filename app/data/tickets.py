@@ -1,36 +1,93 @@
 # app/data/tickets.py
-from app.data.db import connect_database
+from app.data.db import bump_table_version, get_connection
+from app.data.metrics import timed
+from app.data.queries import mutation_where
+from app.data.streaming import ITER_BATCH_ROWS, iter_table
+from app.data.write_behind import write_bulk, write_row, write_transaction
+from app.data.timestamps import to_epoch
 
-def insert_ticket(ticket_id, user, issue, status, created_date=None):
-    conn = connect_database()
-    cur = conn.cursor()
+# ticket_id is unique, so loading the same ticket again updates it instead of duplicating it
+UPSERT_TICKET_SQL = """
+    INSERT INTO it_tickets (ticket_id, user, issue, status, created_date, created_epoch,
+                            priority, assigned_to, resolution_hours)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(ticket_id) DO UPDATE SET
+        user = excluded.user,
+        issue = excluded.issue,
+        status = excluded.status,
+        created_date = excluded.created_date,
+        created_epoch = excluded.created_epoch,
+        priority = excluded.priority,
+        assigned_to = excluded.assigned_to,
+        resolution_hours = excluded.resolution_hours
+"""
 
-    cur.execute("""
-        INSERT INTO it_tickets (ticket_id, user, issue, status, created_date)
-        VALUES (?, ?, ?, ?, ?)
-    """, (ticket_id, user, issue, status, created_date))
+@timed("tickets.insert_ticket")
+def insert_ticket(ticket_id, user, issue, status, created_date=None,
+                  priority=None, assigned_to=None, resolution_hours=None):
+    with write_transaction() as conn:
+        cur = conn.cursor()
+        epoch = to_epoch([created_date])[0]
+        cur.execute(UPSERT_TICKET_SQL, (ticket_id, user, issue, status, created_date, epoch,
+                                        priority, assigned_to, resolution_hours))
+        bump_table_version(conn, "it_tickets")
 
-    conn.commit()
-    conn.close()
+@timed("tickets.insert_tickets_many")
+def insert_tickets_many(conn, rows):
+    """
+    Insert or update many (ticket_id, user, issue, status, created_date, created_epoch,
+    priority, assigned_to, resolution_hours) tuples on an existing connection.
+    The caller owns the transaction
+    (and flushes queued write-behind changes first, like write_transaction()).
+    """
+    cur = conn.executemany(UPSERT_TICKET_SQL, rows)
+    bump_table_version(conn, "it_tickets")
+    return cur.rowcount
 
+@timed("tickets.get_all_tickets")
 def get_all_tickets():
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("SELECT id, ticket_id, user, issue, status, created_date FROM it_tickets")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id, ticket_id, user, issue, status, created_date FROM it_tickets")
+        return cur.fetchall()
 
+# Columns get_all_tickets() returns, and the default for iter_tickets()
+TICKET_ROW_COLUMNS = ("id", "ticket_id", "user", "issue", "status", "created_date")
+
+def iter_tickets(columns=TICKET_ROW_COLUMNS, batch_size=ITER_BATCH_ROWS, after_id=None, as_objects=False):
+    """
+    Stream tickets in id order, `batch_size` rows per fetch (see app/data/streaming.py).
+    `after_id` resumes after the last id seen; `as_objects` yields row objects instead of tuples.
+    """
+    return iter_table("it_tickets", columns, batch_size, after_id, as_objects)
+
+@timed("tickets.update_ticket_status")
 def update_ticket_status(ticket_id, new_status):
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("UPDATE it_tickets SET status = ? WHERE ticket_id = ?", (new_status, ticket_id))
-    conn.commit()
-    conn.close()
+    write_row("it_tickets", "UPDATE it_tickets SET status = ? WHERE ticket_id = ?", (new_status, ticket_id), ticket_id)
 
+@timed("tickets.delete_ticket")
 def delete_ticket(ticket_id):
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM it_tickets WHERE ticket_id = ?", (ticket_id,))
-    conn.commit()
-    conn.close()
+    write_row("it_tickets", "DELETE FROM it_tickets WHERE ticket_id = ?", (ticket_id,), ticket_id)
+
+# Bulk changes: one transaction each, returning the number of rows changed
+@timed("tickets.update_ticket_status_many")
+def update_ticket_status_many(ticket_ids, new_status):
+    return write_bulk("it_tickets", "UPDATE it_tickets SET status = ? WHERE ticket_id = ?",
+                      ((new_status, ticket_id) for ticket_id in ticket_ids))
+
+@timed("tickets.update_ticket_status_where")
+def update_ticket_status_where(new_status, status=None, before=None, after=None):
+    """Set the status of every ticket matching the filters (created in [after, before))."""
+    where, params = mutation_where("it_tickets", {"status": status}, "created_date", before, after)
+    return write_bulk("it_tickets", f"UPDATE it_tickets SET status = ?{where}", [(new_status, *params)])
+
+@timed("tickets.delete_tickets_many")
+def delete_tickets_many(ticket_ids):
+    return write_bulk("it_tickets", "DELETE FROM it_tickets WHERE ticket_id = ?",
+                      ((ticket_id,) for ticket_id in ticket_ids))
+
+@timed("tickets.delete_tickets_where")
+def delete_tickets_where(status=None, before=None, after=None):
+    """Delete every ticket matching the filters (created in [after, before))."""
+    where, params = mutation_where("it_tickets", {"status": status}, "created_date", before, after)
+    return write_bulk("it_tickets", f"DELETE FROM it_tickets{where}", [params])
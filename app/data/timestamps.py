@@ -0,0 +1,47 @@
+# app/data/timestamps.py
+"""
+Timestamps are parsed once, when rows are written, into integer epoch
+seconds (UTC) stored next to the original text in an indexed *_epoch column.
+Sorting, range filters and the per-day / per-hour buckets then run as integer
+arithmetic inside SQLite; the text column is only kept for display.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("app.timestamps")
+
+# table -> {text column: epoch column}
+EPOCH_COLUMNS = {
+    "cyber_incidents": {"timestamp": "timestamp_epoch"},
+    "it_tickets": {"created_date": "created_epoch"},
+}
+
+
+def epoch_column(table, column):
+    """The epoch column stored for `table`.`column`, or None if there isn't one."""
+    return EPOCH_COLUMNS.get(table, {}).get(column)
+
+
+def to_epoch(values):
+    """
+    Parse a whole list of timestamp strings in one vectorized call: ISO-8601 first,
+    then the values that aren't ISO one by one in whatever format pandas recognises
+    (e.g. "03/15/2024 14:30", "15 Mar 2024").
+    Returns a list of int epoch seconds, with None where a value is empty or unparseable.
+    Strings without an offset are taken as UTC, like SQLite's strftime('%s', ...).
+    """
+    texts = pd.Series(values, dtype=object)
+    parsed = pd.to_datetime(texts, errors="coerce", utc=True, format="ISO8601")
+    given = texts.notna() & (texts.astype(str).str.strip() != "")
+    retry = parsed.isna() & given
+    if retry.any():
+        parsed[retry] = pd.to_datetime(texts[retry], errors="coerce", utc=True, format="mixed")
+        unparsed = int((parsed.isna() & given).sum())
+        if unparsed:
+            logger.warning("%d of %d timestamps could not be parsed and are stored without an epoch, e.g. %r",
+                           unparsed, len(texts), texts[parsed.isna() & given].iloc[0])
+    seconds = parsed.dt.tz_localize(None).to_numpy().astype("datetime64[s]").astype(np.int64)
+    missing = parsed.isna().to_numpy()
+    return [None if gap else int(value) for value, gap in zip(seconds, missing)]
@@ -1,45 +1,90 @@
 # app/data/users.py
-from app.data.db import connect_database
+from app.data.db import bump_table_version, get_connection
+from app.data.metrics import timed
+from app.data.queries import mutation_where
+from app.data.streaming import ITER_BATCH_ROWS, iter_table
+from app.data.write_behind import write_bulk, write_row, write_transaction
 
+@timed("users.insert_user")
 def insert_user(username, password_hash, role="user"):
-    conn = connect_database()
-    cur = conn.cursor()
+    with write_transaction() as conn:
+        cur = conn.cursor()
 
-    # use INSERT OR IGNORE so we don't crash on duplicate usernames
-    cur.execute("""
-        INSERT OR IGNORE INTO users (username, password_hash, role)
-        VALUES (?, ?, ?)
-    """, (username, password_hash, role))
+        # use INSERT OR IGNORE so we don't crash on duplicate usernames
+        cur.execute("""
+            INSERT OR IGNORE INTO users (username, password_hash, role)
+            VALUES (?, ?, ?)
+        """, (username, password_hash, role))
+        bump_table_version(conn, "users")
 
-    conn.commit()
-    conn.close()
+@timed("users.insert_users_many")
+def insert_users_many(conn, rows):
+    """
+    Insert many (username, password_hash, role) tuples on an existing connection.
+    Existing users keep their password unless the stored value isn't a bcrypt
+    hash yet (a plaintext-seeded account). The caller owns the transaction
+    (and flushes queued write-behind changes first, like write_transaction()).
+    """
+    cur = conn.executemany("""
+        INSERT INTO users (username, password_hash, role)
+        VALUES (?, ?, ?)
+        ON CONFLICT(username) DO UPDATE SET password_hash = excluded.password_hash
+        WHERE users.password_hash NOT LIKE '$2_$%'
+    """, rows)
+    bump_table_version(conn, "users")
+    return cur.rowcount
 
+@timed("users.get_all_users")
 def get_all_users():
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("SELECT id, username, role FROM users")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id, username, role FROM users")
+        return cur.fetchall()
+
+# Columns get_all_users() returns, and the default for iter_users()
+USER_ROW_COLUMNS = ("id", "username", "role")
+
+def iter_users(columns=USER_ROW_COLUMNS, batch_size=ITER_BATCH_ROWS, after_id=None, as_objects=False):
+    """
+    Stream users in id order, `batch_size` rows per fetch (see app/data/streaming.py).
+    `after_id` resumes after the last id seen; `as_objects` yields row objects instead of tuples.
+    """
+    return iter_table("users", columns, batch_size, after_id, as_objects)
 
+@timed("users.get_user_by_username")
 def get_user_by_username(username):
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM users WHERE username = ?", (username,))
-    row = cur.fetchone()
-    conn.close()
-    return row
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM users WHERE username = ?", (username,))
+        return cur.fetchone()
 
+@timed("users.update_user_role")
 def update_user_role(username, new_role):
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("UPDATE users SET role = ? WHERE username = ?", (new_role, username))
-    conn.commit()
-    conn.close()
+    write_row("users", "UPDATE users SET role = ? WHERE username = ?", (new_role, username), username)
 
+@timed("users.update_user_password")
+def update_user_password(username, password_hash):
+    with write_transaction() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE users SET password_hash = ? WHERE username = ?", (password_hash, username))
+        bump_table_version(conn, "users")
+
+@timed("users.delete_user")
 def delete_user(username):
-    conn = connect_database()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM users WHERE username = ?", (username,))
-    conn.commit()
-    conn.close()
+    write_row("users", "DELETE FROM users WHERE username = ?", (username,), username)
+
+# Bulk changes: one transaction each, returning the number of rows changed
+@timed("users.update_user_role_many")
+def update_user_role_many(usernames, new_role):
+    return write_bulk("users", "UPDATE users SET role = ? WHERE username = ?",
+                      ((new_role, username) for username in usernames))
+
+@timed("users.update_user_role_where")
+def update_user_role_where(new_role, role):
+    """Give everyone who currently has `role` the role `new_role`."""
+    where, params = mutation_where("users", {"role": role})
+    return write_bulk("users", f"UPDATE users SET role = ?{where}", [(new_role, *params)])
+
+@timed("users.delete_users_many")
+def delete_users_many(usernames):
+    return write_bulk("users", "DELETE FROM users WHERE username = ?", ((username,) for username in usernames))
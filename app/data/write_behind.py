@@ -0,0 +1,273 @@
+# app/data/write_behind.py
+"""
+Optional write-behind mode for single-row status / role changes and deletes.
+
+By default write_row() runs the statement in its own transaction, like every
+other CRUD call. With write-behind on (APP_WRITE_BEHIND=1 or
+enable_write_behind()), it only puts the statement on an in-process queue and
+returns. One writer thread wakes every `interval` seconds, or sooner when
+MAX_PENDING changes are waiting, and commits everything queued so far in one
+transaction, bumping each table's version once per batch.
+
+Changes are coalesced per (statement, row key): if the same incident's status
+is set five times before the writer runs, only the last value is written. Each
+coalesced change keeps the place of its first submission, so a delete queued
+after an update still runs after it.
+
+Rows of a table with a router (set_router(); incidents, whose archived months
+live in partition tables) are found when the batch is written: one router call
+per batch, inside its transaction, instead of a lookup per submitted change.
+
+Synchronous writes (inserts, upserts, bulk changes) go through
+write_transaction() / write_bulk(), which flush the queue first: a delete
+still queued can't land after a newer insert of the same row and undo it.
+
+Durability: a queued change is in memory until its batch commits. flush()
+blocks until everything submitted before the call is committed (use it when
+the next read must see the change), and the queue is flushed at interpreter
+exit. A process that is killed loses at most the last interval of queued
+changes.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.data import metrics
+from app.data.db import bump_table_version, transaction
+
+logger = logging.getLogger("app.write_behind")
+
+WRITE_BEHIND_INTERVAL = 0.05  # seconds between group commits
+MAX_PENDING = 10_000          # queued changes that make the writer commit early (and submitters wait)
+
+
+class WriteBehindError(RuntimeError):
+    """Raised by flush() when queued changes could not be written."""
+
+
+class WriteBehindQueue:
+    def __init__(self, interval=WRITE_BEHIND_INTERVAL, max_pending=MAX_PENDING):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = OrderedDict()  # (sql, key) -> (table, params, sequence)
+        self._cond = threading.Condition()
+        self._submitted = 0  # sequence number of the latest submit()
+        self._committed = 0  # every submit() up to this number has been written (or failed)
+        self._flush_to = 0   # a flush() is waiting for every submit() up to this number
+        self._failed = []    # (table, sql, params, error) not yet reported by flush()
+        self._stopping = False
+        self.batches = self.written = self.coalesced = 0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, table, sql, params, key):
+        """Queue one statement; a queued statement with the same sql and key is replaced."""
+        with self._cond:
+            if self._stopping:
+                raise WriteBehindError("write-behind queue is shut down")
+            while len(self._pending) >= self.max_pending:
+                self._cond.notify_all()
+                self._cond.wait()
+            self._submitted += 1
+            slot = (sql, key)
+            if slot in self._pending:
+                self.coalesced += 1
+            self._pending[slot] = (table, tuple(params), self._submitted)  # keeps its original position
+            if len(self._pending) >= self.max_pending:
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Wait until every change submitted so far is committed. Raises WriteBehindError
+        for changes that failed since the last flush(), TimeoutError if `timeout` runs out.
+        """
+        with self._cond:
+            target = self._submitted
+            self._flush_to = max(self._flush_to, target)
+            self._cond.notify_all()  # don't wait for the interval
+            if not self._cond.wait_for(lambda: self._committed >= target, timeout):
+                raise TimeoutError(f"write-behind flush timed out after {timeout}s")
+            failed, self._failed = self._failed, []
+        if failed:
+            raise WriteBehindError(f"{len(failed)} queued change(s) failed, first: {failed[0]}")
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "batches": self.batches,
+                "written": self.written,
+                "coalesced": self.coalesced,
+                "failed": len(self._failed),
+            }
+
+    def shutdown(self, timeout=None):
+        """Write everything still queued and stop the writer thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or len(self._pending) >= self.max_pending
+                                    or self._flush_to > self._committed, self.interval)
+                batch, self._pending = self._pending, OrderedDict()
+                last = self._submitted
+                stopping = self._stopping
+                self._cond.notify_all()  # submitters waiting for room
+            if batch:
+                self._write(batch)
+            with self._cond:
+                self._committed = max(self._committed, last)
+                self._cond.notify_all()
+                if stopping and not self._pending:
+                    return
+
+    def _write(self, batch):
+        ops = [(table, sql, params, key) for (sql, key), (table, params, _) in batch.items()]
+        failed = []
+        try:
+            _commit(ops)
+        except Exception as error:
+            # find the bad statement(s) by writing the batch again one change at a time
+            logger.warning("write-behind batch of %d failed (%s), retrying one by one", len(ops), error)
+            for op in ops:
+                try:
+                    _commit([op])
+                except Exception as op_error:
+                    table, sql, params, _ = op
+                    logger.error("write-behind change failed: %s %s: %s", " ".join(sql.split()), params, op_error)
+                    failed.append((table, " ".join(sql.split()), params, repr(op_error)))
+        with self._cond:
+            self._failed.extend(failed)
+            self.written += len(ops) - len(failed)
+            self.batches += 1
+
+
+@metrics.timed("write_behind.commit")
+def _commit(ops):
+    """Run (table, sql, params, key) changes in one transaction. Returns `ops` (recorded as the row count)."""
+    with transaction() as conn:
+        _execute(conn, ops)
+    return ops
+
+
+# table -> router(conn, keys), see set_router()
+_routers = {}
+
+
+def set_router(table, router):
+    """
+    Let write_row() changes to `table` reach rows stored in other tables. Their sql has
+    a {table} placeholder: router(conn, keys) is called once per written batch with the
+    keys of its `table` changes and returns {key: table} for the rows stored elsewhere;
+    the others get `table`.
+    """
+    _routers[table] = router
+
+
+def _execute(conn, ops):
+    """Run (table, sql, params, key) changes on `conn`, bumping each table's version once."""
+    routes = {}
+    for table, router in _routers.items():
+        keys = [key for op_table, _, _, key in ops if op_table == table]
+        if keys:
+            routes[table] = router(conn, keys)
+    for table, sql, params, key in ops:
+        if table in routes:
+            sql = sql.format(table=routes[table].get(key, table))
+        conn.execute(sql, params)
+    for table in dict.fromkeys(op[0] for op in ops):
+        bump_table_version(conn, table)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def write_behind_enabled():
+    return _queue is not None
+
+
+def enable_write_behind(interval=WRITE_BEHIND_INTERVAL, max_pending=MAX_PENDING):
+    """Start queueing write_row() calls (no-op if already on). Returns the queue."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(interval, max_pending)
+        return _queue
+
+
+def disable_write_behind():
+    """Write everything still queued, stop the writer and go back to synchronous writes."""
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.shutdown()
+        for failed in queue._failed:
+            logger.error("write-behind change lost: %s", failed)
+
+
+def flush(timeout=None):
+    """Block until every queued change is committed (returns at once when write-behind is off)."""
+    queue = _queue
+    if queue is not None:
+        queue.flush(timeout)
+
+
+@contextmanager
+def write_transaction():
+    """
+    transaction() for synchronous writes: queued single-row changes are committed
+    first, so they can't land after (and undo) what is written here.
+    """
+    flush()
+    with transaction() as conn:
+        yield conn
+
+
+def write_bulk(table, sql, param_rows):
+    """
+    Run `sql` once per parameter tuple in `param_rows` (executemany) in a single
+    transaction and return the number of rows changed. Always synchronous; queued
+    single-row changes are flushed first so they can't land after the bulk change.
+    """
+    return write_bulk_statements(table, [(sql, param_rows)])
+
+
+def write_bulk_statements(table, statements):
+    """write_bulk() for several (sql, param_rows) pairs, all in one transaction. Returns the total rows changed."""
+    with write_transaction() as conn:
+        count = sum(conn.executemany(sql, param_rows).rowcount for sql, param_rows in statements)
+        bump_table_version(conn, table)
+    return count
+
+
+def write_row(table, sql, params, key):
+    """
+    Run one single-row UPDATE / DELETE on `table`: queued when write-behind is on,
+    otherwise in its own transaction. `key` identifies the row, for coalescing (and
+    for the table's router, see set_router()).
+    """
+    queue = _queue
+    if queue is not None:
+        try:
+            queue.submit(table, sql, params, key)
+            return
+        except WriteBehindError:
+            pass  # shut down in the meantime: write it directly
+    with transaction() as conn:
+        _execute(conn, [(table, sql, params, key)])
+
+
+if os.environ.get("APP_WRITE_BEHIND", "") not in ("", "0"):
+    enable_write_behind()
+
+# Registered after app.data.db's handler, so it runs first and the pool is still open
+atexit.register(disable_write_behind)
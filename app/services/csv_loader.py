@@ -1,60 +1,132 @@
 # app/services/csv_loader.py
-import csv
-from app.data.incidents import insert_incident
-from app.data.datasets import insert_dataset
-from app.data.tickets import insert_ticket
+import os
+import time
+from itertools import chain, islice
+from pathlib import Path
+from app.data.db import bulk_load_connection, checkpoint_wal
+from app.data.ingest_state import file_sha256, get_ingest_state, save_ingest_state
+from app.data.write_behind import flush
+from app.services.csv_pipeline import (
+    DATASET_COLUMNS, INCIDENT_COLUMNS, TICKET_COLUMNS, stream_rows,
+)
+from app.data.incidents import insert_incidents_many
+from app.data.datasets import insert_datasets_many
+from app.data.tickets import insert_tickets_many
 
-def load_cyber_incidents(path="DATA/cyber_incidents.csv"):
-    try:
-        with open(path, newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # CSV header: incident_id,timestamp,severity,category,status,description
-                incident_id = int(row.get("incident_id") or 0)
-                timestamp = row.get("timestamp", "")
-                severity = row.get("severity", "")
-                category = row.get("category", "")
-                status = row.get("status", "")
-                description = row.get("description", "")
-                insert_incident(incident_id, timestamp, severity, category, status, description)
-        print("✓ cyber_incidents loaded")
-    except FileNotFoundError:
-        print(f"cyber_incidents CSV not found at {path}, skipping.")
+# How many CSV rows go into one executemany() / one transaction
+DEFAULT_CHUNK_SIZE = 5000
 
-def load_datasets_metadata(path="DATA/datasets_metadata.csv"):
-    try:
-        with open(path, newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # CSV header: dataset_id,name,rows,columns,uploaded_by,upload_date
-                dataset_id = int(row.get("dataset_id") or 0)
-                name = row.get("name", "")
-                rows_count = int(row.get("rows") or 0)
-                columns_count = int(row.get("columns") or 0)
-                uploaded_by = row.get("uploaded_by", "")
-                upload_date = row.get("upload_date", "")
-                insert_dataset(dataset_id, name, rows_count, columns_count, uploaded_by, upload_date)
-        print("✓ datasets_metadata loaded")
-    except FileNotFoundError:
-        print(f"datasets_metadata CSV not found at {path}, skipping.")
+def _chunked(rows, size):
+    """Yield lists of at most `size` items from any iterable."""
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _bulk_insert(conn, table, batches, insert_many, chunk_size):
+    """
+    Write parsed batches in chunks, one transaction per chunk, and
+    return a small stats dict (rows, skipped, seconds, rows_per_sec).
+    Rows without a natural key (first field None) are skipped.
+    """
+    total = skipped = 0
+    start = time.perf_counter()
+    for chunk in _chunked(chain.from_iterable(batches), chunk_size):
+        keyed = [row for row in chunk if row[0] is not None]
+        skipped += len(chunk) - len(keyed)
+        with conn:  # commits the chunk (or rolls it back on error)
+            insert_many(conn, keyed)
+        total += len(keyed)
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float(total)
+    print(f"✓ {table} loaded ({total} rows, {rate:,.0f} rows/s)")
+    if skipped:
+        print(f"  skipped {skipped} {table} rows without an id")
+    return {"rows": total, "skipped": skipped, "seconds": elapsed, "rows_per_sec": rate}
+
+def _resume_offset(path, state, size):
+    """
+    Byte offset to continue from if the file was only appended to since the
+    last load (same bytes up to the old offset, which ended on a full line).
+    None means the whole file has to be loaded again.
+    """
+    if state is None or size < state["offset"] or state["offset"] <= 0:
+        return None  # offset 0: nothing (not even a header) was loaded before
+    with open(path, "rb") as fh:
+        fh.seek(state["offset"] - 1)
+        if fh.read(1) != b"\n":
+            return None
+    if file_sha256(path, state["offset"]) != state["sha256"]:
+        return None
+    return state["offset"]
+
+def _load_csv(path, table, columns, insert_many, conn, chunk_size, db_path, workers, full):
+    if conn is None:
+        with bulk_load_connection(db_path) as own_conn:
+            return _load_csv(path, table, columns, insert_many, own_conn, chunk_size, db_path, workers, full)
 
-def load_it_tickets(path="DATA/it_tickets.csv"):
     try:
-        with open(path, newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # attempt to handle many ticket formats; common fields: id,user,issue,status,created_date
-                ticket_id = int(row.get("ticket_id") or row.get("id") or 0)
-                user = row.get("user") or row.get("username") or ""
-                issue = row.get("issue") or row.get("description") or ""
-                status = row.get("status") or ""
-                created_date = row.get("created_date") or row.get("created") or ""
-                insert_ticket(ticket_id, user, issue, status, created_date)
-        print("✓ it_tickets loaded")
+        stat = os.stat(path)
     except FileNotFoundError:
-        print(f"it_tickets CSV not found at {path}, skipping.")
+        print(f"{table} CSV not found at {path}, skipping.")
+        return None
+
+    # Same size and mtime as last time: nothing to do
+    key = str(Path(path).resolve())
+    state = None if full else get_ingest_state(conn, key)
+    if state and state["size"] == stat.st_size and state["mtime_ns"] == stat.st_mtime_ns:
+        print(f"✓ {table} unchanged, skipped")
+        return {"rows": 0, "seconds": 0.0, "rows_per_sec": 0.0, "mode": "unchanged"}
+
+    # Parsing happens in worker processes; this process only writes to SQLite.
+    # Rows are upserted on their natural key, so loading a row twice is harmless.
+    start = _resume_offset(path, state, stat.st_size)
+    flush()  # queued single-row changes land before the rows loaded now, not after them
+    batches = stream_rows(path, columns, workers=workers, start=start, stop_at=stat.st_size)
+    stats = _bulk_insert(conn, table, batches, insert_many, chunk_size)
+    stats["mode"] = "full" if start is None else "append"
+
+    total_rows = stats["rows"] + (state["rows"] if start is not None else 0)
+    with conn:
+        save_ingest_state(conn, key, stat.st_size, stat.st_mtime_ns,
+                          file_sha256(path, stat.st_size), stat.st_size, total_rows)
+    return stats
+
+def load_cyber_incidents(path="DATA/cyber_incidents.csv", conn=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                         db_path=None, workers=None, full=False):
+    return _load_csv(path, "cyber_incidents", INCIDENT_COLUMNS,
+                     insert_incidents_many, conn, chunk_size, db_path, workers, full)
+
+def load_datasets_metadata(path="DATA/datasets_metadata.csv", conn=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                           db_path=None, workers=None, full=False):
+    return _load_csv(path, "datasets_metadata", DATASET_COLUMNS,
+                     insert_datasets_many, conn, chunk_size, db_path, workers, full)
+
+def load_it_tickets(path="DATA/it_tickets.csv", conn=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                    db_path=None, workers=None, full=False):
+    return _load_csv(path, "it_tickets", TICKET_COLUMNS,
+                     insert_tickets_many, conn, chunk_size, db_path, workers, full)
 
-def load_all_csv():
-    load_cyber_incidents()
-    load_datasets_metadata()
-    load_it_tickets()
+def load_all_csv(chunk_size=DEFAULT_CHUNK_SIZE, db_path=None, workers=None, full=False, data_dir="DATA"):
+    """
+    Load every CSV in `data_dir` (DATA/ by default) over a single bulk-load connection.
+    Files that haven't changed are skipped and appended rows are loaded on their own;
+    pass full=True to re-read every file from the start.
+    `workers` is the number of parser processes (default: one per core).
+    Returns {table: stats} so callers can log or compare throughput.
+    """
+    with bulk_load_connection(db_path) as conn:
+        stats = {
+            "cyber_incidents": load_cyber_incidents(f"{data_dir}/cyber_incidents.csv", conn, chunk_size,
+                                                    workers=workers, full=full),
+            "datasets_metadata": load_datasets_metadata(f"{data_dir}/datasets_metadata.csv", conn, chunk_size,
+                                                        workers=workers, full=full),
+            "it_tickets": load_it_tickets(f"{data_dir}/it_tickets.csv", conn, chunk_size,
+                                          workers=workers, full=full),
+        }
+        # A big load leaves a big -wal file; copy it back and empty it now rather than
+        # leaving it to passive checkpoints that may keep skipping pages readers still use
+        checkpoint_wal(conn, "TRUNCATE")
+        return stats
@@ -0,0 +1,209 @@
+# app/services/csv_pipeline.py
+"""
+Streaming CSV parsing used by csv_loader.
+
+    reader  -> splits the file into byte ranges that end on a newline
+    parsers -> a process pool turns each range into a list of typed tuples,
+               using the header position of each column (no dict per row);
+               timestamp columns are converted to epoch seconds per batch
+    writer  -> the caller, pulling batches from a bounded queue
+
+Only a handful of ranges are ever in flight, so memory stays flat no matter
+how large the file is. Ranges are cut on plain newlines, so quoted fields
+must not contain line breaks (true for every file in DATA/).
+"""
+import csv
+import io
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from app.data.timestamps import to_epoch
+
+# Size of one parse job. Small files are parsed inline without a pool.
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+# Parsed batches allowed to wait for the writer before the reader pauses
+DEFAULT_QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+# Converters have to be module-level functions so they can be pickled
+def to_int(value):
+    value = value.strip()
+    return int(value) if value else 0
+
+def to_key(value):
+    # Natural keys have no default: a blank one would make every such row upsert into one
+    value = value.strip()
+    return int(value) if value else None
+
+def to_float(value):
+    value = value.strip()
+    return float(value) if value else None
+
+def to_text(value):
+    return value
+
+# Converters that take a whole column (list of strings) at once. Timestamps are
+# parsed this way, once per batch in the worker, into epoch seconds.
+COLUMN_CONVERTERS = {to_epoch}
+
+
+# Column specs: one (accepted header names, converter) pair per output field,
+# the row's natural key first
+INCIDENT_COLUMNS = [
+    (("incident_id",), to_key),
+    (("timestamp",), to_text),
+    (("timestamp",), to_epoch),
+    (("severity",), to_text),
+    (("category",), to_text),
+    (("status",), to_text),
+    (("description",), to_text),
+]
+
+DATASET_COLUMNS = [
+    (("dataset_id",), to_key),
+    (("name",), to_text),
+    (("rows",), to_int),
+    (("columns",), to_int),
+    (("uploaded_by",), to_text),
+    (("upload_date",), to_text),
+]
+
+# attempt to handle many ticket formats; common fields: id,user,issue,status,created_date
+TICKET_COLUMNS = [
+    (("ticket_id", "id"), to_key),
+    (("user", "username"), to_text),
+    (("issue", "description"), to_text),
+    (("status",), to_text),
+    (("created_date", "created", "created_at"), to_text),
+    (("created_date", "created", "created_at"), to_epoch),
+    (("priority",), to_text),
+    (("assigned_to", "assignee"), to_text),
+    (("resolution_time_hours", "resolution_hours"), to_float),
+]
+
+
+def resolve_columns(header, spec):
+    """
+    Map a column spec onto a CSV header.
+    Returns [(index or None, converter), ...]; None means "column missing".
+    """
+    positions = {name.strip(): i for i, name in enumerate(header)}
+    mapping = []
+    for names, convert in spec:
+        index = next((positions[n] for n in names if n in positions), None)
+        mapping.append((index, convert))
+    return mapping
+
+
+def split_ranges(path, chunk_bytes=DEFAULT_CHUNK_BYTES, start=None, stop_at=None):
+    """
+    Read the header and cut the rest of the file into (start, end) byte ranges
+    that each end just after a newline. `start` skips ahead (e.g. to resume) and
+    `stop_at` ignores anything written after that offset.
+    """
+    size = os.path.getsize(path) if stop_at is None else stop_at
+    with open(path, "rb") as fh:
+        header_line = fh.readline()
+        header = next(csv.reader([header_line.decode("utf-8")]), [])
+        pos = max(fh.tell(), start or 0)
+        ranges = []
+        while pos < size:
+            fh.seek(min(pos + chunk_bytes, size))
+            fh.readline()  # move to the end of the current line
+            end = min(fh.tell(), size)
+            ranges.append((pos, end))
+            pos = end
+    return header, ranges
+
+
+def parse_range(path, start, end, mapping):
+    """Parse one byte range into a list of tuples (runs in a worker process)."""
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        text = fh.read(end - start).decode("utf-8")
+    row_mapping = [(i, to_text if convert in COLUMN_CONVERTERS else convert) for i, convert in mapping]
+    rows = []
+    # newline="": only real line ends split records (str.splitlines() also splits on \x0b, \x1c, \u2028, ...)
+    for fields in csv.reader(io.StringIO(text, newline="")):
+        if not fields:
+            continue
+        width = len(fields)
+        rows.append(tuple(
+            convert(fields[i] if i is not None and i < width else "")
+            for i, convert in row_mapping
+        ))
+
+    # second pass for the column-at-a-time converters
+    column_converted = [n for n, (_, convert) in enumerate(mapping) if convert in COLUMN_CONVERTERS]
+    if rows and column_converted:
+        columns = list(zip(*rows))
+        for n in column_converted:
+            columns[n] = mapping[n][1](columns[n])
+        rows = list(zip(*columns))
+    return rows
+
+
+def _put(out, item, stop):
+    # Blocks while the queue is full, but gives up once the writer has gone away
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(path, ranges, mapping, workers, out, stop):
+    # Keep at most `out.maxsize` parse jobs running ahead of the writer
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for begin, end in ranges:
+                pending.append(pool.submit(parse_range, path, begin, end, mapping))
+                if len(pending) >= out.maxsize and not _put(out, pending.popleft().result(), stop):
+                    break
+            while pending and not stop.is_set():
+                _put(out, pending.popleft().result(), stop)
+            for future in pending:
+                future.cancel()
+        _put(out, _DONE, stop)
+    except BaseException as exc:  # hand the error to the writer thread
+        _put(out, exc, stop)
+
+
+def stream_rows(path, spec, chunk_bytes=DEFAULT_CHUNK_BYTES, workers=None,
+                queue_size=DEFAULT_QUEUE_SIZE, start=None, stop_at=None):
+    """
+    Yield batches (lists of typed tuples) from a CSV file in file order.
+    A missing file raises FileNotFoundError on the first iteration.
+    """
+    header, ranges = split_ranges(path, chunk_bytes, start, stop_at)
+    mapping = resolve_columns(header, spec)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(ranges) <= 1:
+        for begin, end in ranges:
+            yield parse_range(path, begin, end, mapping)
+        return
+
+    out = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce, args=(path, ranges, mapping, workers, out, stop), daemon=True)
+    producer.start()
+    try:
+        while True:
+            batch = out.get()
+            if batch is _DONE:
+                break
+            if isinstance(batch, BaseException):
+                raise batch
+            yield batch
+    finally:
+        stop.set()
+        producer.join()
@@ -0,0 +1,287 @@
+# app/services/snapshots.py
+"""
+Columnar snapshots of the analytics tables, read by the dashboard's analytics mode.
+
+    python -m app.services.snapshots [--format arrow|parquet] [--every SECONDS] [--force]
+
+Each table is written to DATA/snapshots/<table>/month=YYYY-MM/part.<ext>
+(month=unknown for rows without a usable date), with the low-cardinality
+columns dictionary-encoded. Arrow IPC files (the default) are uncompressed, so
+read_snapshot() can memory-map them and hand the columns over without copying
+them into Python objects. Parquet files are smaller and suit other tools.
+
+A table is only rewritten when its table_versions counter has moved since the
+last snapshot (recorded in manifest.json), or its columns changed, so running
+this periodically is cheap. The cyber_incidents snapshot holds every month: it
+is read from the cyber_incidents_all view (app/data/partitions.py), whose
+changes all move the cyber_incidents counter.
+"""
+import argparse
+import json
+import shutil
+import time
+from datetime import datetime, timezone
+from itertools import groupby
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from app.data.db import get_connection, get_table_versions
+from app.data.partitions import ALL_VIEW
+from app.data.queries import ALL
+
+SNAPSHOT_DIR = Path("DATA/snapshots")
+FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+# Rows pulled from SQLite per fetchmany()
+FETCH_SIZE = 50_000
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+_TIME = pa.timestamp("s")
+
+# table -> (text time column, epoch column it's partitioned on, [(column, SQL expression, Arrow type), ...])
+SNAPSHOT_TABLES = {
+    "cyber_incidents": ("timestamp", "timestamp_epoch", [
+        ("id", "id", pa.int64()),
+        ("incident_id", "incident_id", pa.int64()),
+        ("timestamp", "CAST(timestamp AS TEXT)", pa.string()),
+        ("timestamp_epoch", "timestamp_epoch", _TIME),
+        ("severity", "CAST(severity AS TEXT)", _DICT),
+        ("category", "CAST(category AS TEXT)", _DICT),
+        ("status", "CAST(status AS TEXT)", _DICT),
+        ("description", "CAST(description AS TEXT)", pa.string()),
+    ]),
+    "it_tickets": ("created_date", "created_epoch", [
+        ("id", "id", pa.int64()),
+        ("ticket_id", "ticket_id", pa.int64()),
+        ("user", "CAST(user AS TEXT)", pa.string()),
+        ("issue", "CAST(issue AS TEXT)", pa.string()),
+        ("status", "CAST(status AS TEXT)", _DICT),
+        ("created_date", "CAST(created_date AS TEXT)", pa.string()),
+        ("created_epoch", "created_epoch", _TIME),
+        ("priority", "CAST(priority AS TEXT)", _DICT),
+        ("assigned_to", "CAST(assigned_to AS TEXT)", _DICT),
+        ("resolution_hours", "resolution_hours", pa.float64()),
+    ]),
+    "datasets_metadata": ("upload_date", "upload_epoch", [
+        ("dataset_id", "dataset_id", pa.int64()),
+        ("name", "CAST(name AS TEXT)", pa.string()),
+        ("rows", "rows", pa.int64()),
+        ("columns", "columns", pa.int64()),
+        ("uploaded_by", "CAST(uploaded_by AS TEXT)", _DICT),
+        ("upload_date", "CAST(upload_date AS TEXT)", pa.string()),
+        ("upload_epoch", "CAST(strftime('%s', upload_date) AS INTEGER)", _TIME),
+    ]),
+}
+
+
+# Snapshot -> the view its rows are read from (others are read from the table itself)
+SNAPSHOT_SOURCES = {"cyber_incidents": ALL_VIEW}
+# Table or view the dashboard queries -> the snapshot holding its rows
+SNAPSHOT_OF = {view: table for table, view in SNAPSHOT_SOURCES.items()}
+
+
+def snapshot_schema(table):
+    _, _, columns = SNAPSHOT_TABLES[table]
+    return pa.schema([(name, arrow_type) for name, _, arrow_type in columns])
+
+
+def snapshot_time_column(table, column):
+    """The timestamp column a snapshot stores for text column `column`, or None."""
+    time_column, epoch_column, _ = SNAPSHOT_TABLES[table]
+    return epoch_column if column == time_column else None
+
+
+def read_manifest(root=SNAPSHOT_DIR):
+    """What the last write_snapshots() run produced, or None if there are no snapshots."""
+    path = Path(root) / "manifest.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def _to_batch(rows, schema):
+    # rows are (month, value, value, ...) tuples straight from SQLite
+    arrays = []
+    for field, values in zip(schema, list(zip(*rows))[1:]):
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _write_part(folder, month, batches, schema, fmt):
+    # one file per month; combine_chunks() gives every dictionary column a single dictionary
+    data = pa.Table.from_batches(batches, schema).combine_chunks()
+    path = folder / f"month={month}" / f"part{FORMATS[fmt]}"
+    path.parent.mkdir(parents=True)
+    if fmt == "arrow":
+        with pa.OSFile(str(path), "wb") as sink, ipc.new_file(sink, schema) as writer:
+            writer.write_table(data)
+    else:
+        dictionary_columns = [f.name for f in schema if pa.types.is_dictionary(f.type)]
+        pq.write_table(data, path, use_dictionary=dictionary_columns)
+    return data.num_rows
+
+
+def _write_table(conn, table, fmt, folder):
+    """Stream `table` out of SQLite month by month. Returns (rows, months)."""
+    _, epoch_column, columns = SNAPSHOT_TABLES[table]
+    schema = snapshot_schema(table)
+    epoch = dict((name, expr) for name, expr, _ in columns)[epoch_column]
+    select = ", ".join(f"{expr} AS {name}" for name, expr, _ in columns)
+    month = f"IFNULL(strftime('%Y-%m', {epoch}, 'unixepoch'), 'unknown')"
+    folder.mkdir(parents=True)
+
+    # ordered by time, so each month's rows arrive together (NULL dates first)
+    cur = conn.execute(f"SELECT {month}, {select} FROM {SNAPSHOT_SOURCES.get(table, table)} ORDER BY {epoch}")
+    rows_written, months = 0, []
+    current, batches = None, []
+    while True:
+        fetched = cur.fetchmany(FETCH_SIZE)
+        for part_month, rows in groupby(fetched, key=lambda row: row[0]):
+            if part_month != current and batches:
+                rows_written += _write_part(folder, current, batches, schema, fmt)
+                batches = []
+            if part_month != current:
+                current = part_month
+                months.append(part_month)
+            batches.append(_to_batch(list(rows), schema))
+        if not fetched:
+            break
+    if batches:
+        rows_written += _write_part(folder, current, batches, schema, fmt)
+    return rows_written, months
+
+
+def write_snapshots(tables=None, fmt="arrow", root=SNAPSHOT_DIR, force=False):
+    """
+    Snapshot the given tables (all of SNAPSHOT_TABLES by default) whose data
+    changed since the last run. Each table is written to a temporary folder and
+    swapped in whole, so readers never see half a snapshot.
+    Returns {table: {"rows", "months", "seconds"} or "unchanged"}.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown snapshot format: {fmt}")
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(root) or {"tables": {}}
+    results = {}
+
+    with get_connection() as conn:
+        for table in tables or SNAPSHOT_TABLES:
+            conn.execute("BEGIN")  # one read snapshot for the version and the rows
+            try:
+                version = dict(get_table_versions(conn, [table])).get(table, 0)
+                previous = manifest["tables"].get(table)
+                columns = snapshot_schema(table).names
+                if (not force and previous and previous["version"] == version and previous["format"] == fmt
+                        and previous.get("columns") == columns and (root / table).is_dir()):
+                    results[table] = "unchanged"
+                    print(f"✓ {table} snapshot unchanged, skipped")
+                    continue
+
+                start = time.perf_counter()
+                staging = root / f".{table}.tmp"
+                shutil.rmtree(staging, ignore_errors=True)
+                rows, months = _write_table(conn, table, fmt, staging)
+            finally:
+                conn.rollback()
+
+            # swap the new folder in; open memory maps of the old files stay valid
+            old = root / f".{table}.old"
+            shutil.rmtree(old, ignore_errors=True)
+            if (root / table).exists():
+                (root / table).rename(old)
+            staging.rename(root / table)
+            shutil.rmtree(old, ignore_errors=True)
+
+            seconds = time.perf_counter() - start
+            manifest["tables"][table] = {
+                "version": version,
+                "format": fmt,
+                "columns": columns,
+                "rows": rows,
+                "months": months,
+                "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            results[table] = {"rows": rows, "months": len(months), "seconds": seconds}
+            print(f"✓ {table} snapshot written ({rows} rows, {len(months)} months, {seconds:.2f}s)")
+
+    (root / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return results
+
+
+def _equals(column, value):
+    """Row mask for column == value. Dictionary columns compare integer codes, not strings."""
+    if not pa.types.is_dictionary(column.type):
+        return pc.equal(column, value)
+    masks = []
+    for chunk in column.chunks:
+        code = pc.index(chunk.dictionary, value).as_py()  # -1 if the chunk never has the value
+        masks.append(pc.equal(chunk.indices, code))
+    return pa.chunked_array(masks, pa.bool_())
+
+
+def has_snapshot(table, columns=(), root=SNAPSHOT_DIR):
+    """
+    True if `table` has a snapshot with all of `columns`. The manifest can list a
+    table whose folder is gone (a partial run) or whose files predate new columns.
+    """
+    folder = Path(root) / table
+    part = next(folder.glob("month=*/part.*"), None) if folder.is_dir() else None
+    if part is None:
+        return folder.is_dir() and not columns  # an empty table has no files
+    names = ipc.open_file(pa.memory_map(str(part))).schema.names if part.suffix == ".arrow" \
+        else pq.read_schema(part).names
+    return set(columns) <= set(names)
+
+
+def read_snapshot(table, columns=None, filters=None, root=SNAPSHOT_DIR):
+    """
+    The latest snapshot of `table` as a pyarrow Table (one chunk per month file),
+    or None if there isn't one (see has_snapshot()). Arrow files are memory-mapped, so nothing is
+    copied until rows are filtered; `columns` limits which columns are touched.
+    `filters` is {column: value} like the SQL builders (None / "All" = no filter).
+    """
+    folder = Path(root) / table
+    if not folder.is_dir():
+        return None
+    active = {c: v for c, v in (filters or {}).items() if v is not None and v != ALL}
+    needed = list(dict.fromkeys(list(columns) + list(active))) if columns else None
+
+    parts = []
+    for path in sorted(folder.glob("month=*/part.*")):
+        if path.suffix == ".arrow":
+            part = ipc.open_file(pa.memory_map(str(path))).read_all()
+        else:
+            part = pq.read_table(path, memory_map=True)
+        parts.append(part.select(needed) if needed else part)
+    schema = snapshot_schema(table)
+    if needed:
+        schema = pa.schema([schema.field(name) for name in needed])
+    data = pa.concat_tables(parts) if parts else schema.empty_table()
+
+    if active:
+        mask = None
+        for column, value in active.items():
+            condition = _equals(data[column], value)
+            mask = condition if mask is None else pc.and_(mask, condition)
+        data = data.filter(mask)
+    return data.select(columns) if columns else data
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write columnar snapshots of the analytics tables.")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="arrow")
+    parser.add_argument("--root", default=str(SNAPSHOT_DIR))
+    parser.add_argument("--every", type=float, default=None, help="keep running, re-checking every N seconds")
+    parser.add_argument("--force", action="store_true", help="rewrite tables even if unchanged")
+    args = parser.parse_args()
+    while True:
+        write_snapshots(fmt=args.format, root=args.root, force=args.force)
+        if args.every is None:
+            break
+        time.sleep(args.every)
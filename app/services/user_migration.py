@@ -0,0 +1,162 @@
+# app/services/user_migration.py
+"""
+Batch import of user accounts from a users file.
+
+    python -m app.services.user_migration [--path DATA/users.txt] [--cost 12] [--restart]
+
+Each line is `username,password[,role]`. A password that is already a bcrypt
+hash is stored as-is; anything else is treated as a plaintext seed and hashed
+at the target cost in a process pool. Results are written in batched
+transactions together with the file offset reached, so an interrupted run
+picks up where it stopped.
+
+Existing bcrypt hashes can't be re-hashed to a new cost without the password,
+so those accounts are counted as "outdated" and upgraded by AuthService the
+next time the user logs in.
+"""
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import bcrypt
+
+from app.data.db import get_connection
+from app.data.ingest_state import get_ingest_state, save_ingest_state
+from app.data.schema import create_tables
+from app.data.users import insert_users_many
+from app.data.write_behind import write_transaction
+
+BCRYPT_COST = 12
+DEFAULT_BATCH_SIZE = 256
+# Bytes read at a time when re-hashing the already imported part of the file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def bcrypt_cost(value):
+    """Cost factor of a bcrypt hash ($2b$12$...), or None if `value` isn't one."""
+    parts = value.split("$")
+    if len(parts) == 4 and parts[1] in ("2a", "2b", "2y") and parts[2].isdigit() and len(parts[3]) == 53:
+        return int(parts[2])
+    return None
+
+
+def hash_password(args):
+    """(password, cost) -> bcrypt hash string. Module level so worker processes can run it."""
+    password, cost = args
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(cost)).decode()
+
+
+def _resume_point(path, state):
+    """
+    Offset to continue from plus a sha256 object already fed with the bytes
+    before it. Starts from 0 if the file no longer begins with what was imported.
+    """
+    digest = hashlib.sha256()
+    if state is None:
+        return 0, digest
+    remaining = state["offset"]
+    with open(path, "rb") as fh:
+        while remaining > 0:
+            block = fh.read(min(HASH_BLOCK_SIZE, remaining))  # a block at a time, not the whole prefix
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    if remaining or digest.hexdigest() != state["sha256"]:
+        return 0, hashlib.sha256()
+    return state["offset"], digest
+
+
+def _read_batches(path, start, batch_size, digest):
+    """Yield (offset after the batch, [(username, password, role), ...], invalid line count)."""
+    offset = yielded = start
+    batch, invalid = [], 0
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        for raw in fh:
+            offset += len(raw)
+            digest.update(raw)
+            parts = [p.strip() for p in raw.decode("utf-8").strip().split(",")]
+            if len(parts) >= 2 and parts[0] and parts[1]:
+                batch.append((parts[0], parts[1], parts[2] if len(parts) > 2 and parts[2] else "user"))
+            elif any(parts):
+                invalid += 1
+            if len(batch) >= batch_size:
+                yield offset, batch, invalid
+                batch, invalid, yielded = [], 0, offset
+    if offset != yielded:  # last partial batch (or only blank / invalid lines)
+        yield offset, batch, invalid
+
+
+def migrate_users(path="DATA/users.txt", cost=BCRYPT_COST, workers=None,
+                  batch_size=DEFAULT_BATCH_SIZE, restart=False):
+    """
+    Import/hash every account in `path`. Returns a stats dict
+    (users, hashed, kept, outdated, invalid, hashes_per_sec).
+    Raises FileNotFoundError if the file is missing.
+    """
+    stats = {"users": 0, "hashed": 0, "kept": 0, "outdated": 0, "invalid": 0, "hashes_per_sec": 0.0}
+    stat = os.stat(path)
+    key = f"{Path(path).resolve()}#bcrypt{cost}"
+
+    with get_connection() as conn:
+        state = None if restart else get_ingest_state(conn, key)
+    if state and (state["size"], state["mtime_ns"], state["offset"]) == (stat.st_size, stat.st_mtime_ns, stat.st_size):
+        print("✓ users file unchanged, nothing to migrate")
+        return stats
+
+    start, digest = _resume_point(path, state)
+    total_users = state["rows"] if start and state else 0
+    hash_seconds = 0.0
+    workers = workers or os.cpu_count() or 1
+
+    # Worker processes are only started once there is something to hash
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for offset, accounts, invalid in _read_batches(path, start, batch_size, digest):
+            rows, plaintext = [], []
+            for username, password, role in accounts:
+                existing_cost = bcrypt_cost(password)
+                if existing_cost is None:
+                    plaintext.append((username, password, role))
+                    continue
+                rows.append((username, password, role))
+                stats["kept"] += 1
+                if existing_cost != cost:
+                    stats["outdated"] += 1
+
+            if plaintext:
+                began = time.perf_counter()
+                hashes = pool.map(hash_password, [(p, cost) for _, p, _ in plaintext],
+                                  chunksize=max(1, len(plaintext) // (workers * 4)))
+                rows.extend((u, h, r) for (u, _, r), h in zip(plaintext, hashes))
+                hash_seconds += time.perf_counter() - began
+                stats["hashed"] += len(plaintext)
+
+            total_users += len(accounts)
+            with write_transaction() as conn:
+                insert_users_many(conn, rows)
+                save_ingest_state(conn, key, stat.st_size, stat.st_mtime_ns, digest.hexdigest(), offset, total_users)
+            stats["users"] += len(accounts)
+            stats["invalid"] += invalid
+
+    if hash_seconds > 0:
+        stats["hashes_per_sec"] = stats["hashed"] / hash_seconds
+    print(f"✓ {stats['users']} users processed: {stats['hashed']} hashed "
+          f"({stats['hashes_per_sec']:,.1f} hashes/s), {stats['kept']} already hashed "
+          f"({stats['outdated']} at a cost other than {cost}), {stats['invalid']} invalid lines")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import and hash user accounts from a users file.")
+    parser.add_argument("--path", default="DATA/users.txt")
+    parser.add_argument("--cost", type=int, default=BCRYPT_COST, help="bcrypt cost factor for new hashes")
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes (default: one per core)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress and start from the top")
+    args = parser.parse_args()
+    create_tables()
+    migrate_users(args.path, args.cost, args.workers, args.batch_size, args.restart)
@@ -1,23 +1,143 @@
 # app/services/user_service.py
-from app.data.users import insert_user
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from app.data.metrics import timed
+from app.data.users import get_user_by_username, update_user_password
+from app.services.user_migration import BCRYPT_COST, bcrypt_cost, hash_password, migrate_users
 
 def migrate_users_from_txt(path="DATA/users.txt"):
     """
     Reads a users.txt file where each line is:
     username,hashed_password
     and inserts them into the users table.
+    Batched and resumable; see app/services/user_migration.py for the details.
     """
     try:
-        with open(path, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(",")
-                if len(parts) >= 2:
-                    username = parts[0].strip()
-                    hashed = parts[1].strip()
-                    insert_user(username, hashed)
+        migrate_users(path)
         print("✓ Users migrated successfully")
     except FileNotFoundError:
         print(f"Users file not found at {path} — skipping user migration")
+
+
+# -----------------------------------------
+# AUTHENTICATION
+# -----------------------------------------
+# bcrypt at cost 12 takes ~250 ms per check. bcrypt releases the GIL while it hashes,
+# so a small thread pool verifies several logins at the same time, and a short-lived
+# cache lets a user who just logged in skip the hash on the next check.
+# Hashes below the target cost are upgraded on the first successful login, since
+# that is the only moment the plaintext password is available.
+
+# bcrypt on its own, so the Diagnostics page can tell hashing apart from the user lookup
+_checkpw = timed("auth.bcrypt_checkpw")(bcrypt.checkpw)
+
+AUTH_WORKERS = min(8, os.cpu_count() or 1)
+LOGIN_CACHE_TTL = 60           # seconds a successful login is remembered
+LOGIN_CACHE_MAX_ENTRIES = 10000
+
+
+class AuthService:
+    def __init__(self, workers=AUTH_WORKERS, cache_ttl=LOGIN_CACHE_TTL,
+                 max_cached=LOGIN_CACHE_MAX_ENTRIES, target_cost=BCRYPT_COST):
+        self.cache_ttl = cache_ttl
+        self.target_cost = target_cost
+        self.max_cached = max_cached
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._cache = {}  # username -> (fingerprint, password_hash, expires_at)
+        self._lock = threading.Lock()
+        # The cache stores an HMAC of the password under a per-process key, never the password
+        self._key = os.urandom(32)
+
+    def _fingerprint(self, username, password):
+        return hmac.new(self._key, f"{username}\0{password}".encode(), hashlib.sha256).digest()
+
+    def _cached(self, username, fingerprint, password_hash):
+        with self._lock:
+            entry = self._cache.get(username)
+        return (
+            entry is not None
+            and entry[2] > time.monotonic()
+            and entry[1] == password_hash  # a changed password invalidates the entry
+            and hmac.compare_digest(entry[0], fingerprint)
+        )
+
+    def _remember(self, username, fingerprint, password_hash):
+        with self._lock:
+            if len(self._cache) >= self.max_cached:
+                now = time.monotonic()
+                self._cache = {u: e for u, e in self._cache.items() if e[2] > now}
+                if len(self._cache) >= self.max_cached:
+                    self._cache.pop(next(iter(self._cache)))
+            self._cache[username] = (fingerprint, password_hash, time.monotonic() + self.cache_ttl)
+
+    @timed("auth.verify")
+    def verify(self, username, password):
+        """Check credentials on the calling thread. Returns the user's role, or None."""
+        row = get_user_by_username(username)  # (id, username, password_hash, role), indexed lookup
+        if row is None:
+            return None
+        _, _, password_hash, role = row
+        fingerprint = self._fingerprint(username, password)
+        if self.cache_ttl > 0 and self._cached(username, fingerprint, password_hash):
+            return role
+        try:
+            ok = _checkpw(password.encode(), password_hash.encode())
+        except ValueError:  # stored value isn't a bcrypt hash
+            ok = False
+        if not ok:
+            return None
+        if self.target_cost and bcrypt_cost(password_hash) != self.target_cost:
+            password_hash = hash_password((password, self.target_cost))
+            update_user_password(username, password_hash)
+        if self.cache_ttl > 0:
+            self._remember(username, fingerprint, password_hash)
+        return role
+
+    def submit(self, username, password):
+        """Queue a check on the bcrypt pool and return a concurrent.futures.Future."""
+        return self._executor.submit(self.verify, username, password)
+
+    def authenticate(self, username, password):
+        """Blocking login check through the bounded pool. Returns the role, or None."""
+        return self.submit(username, password).result()
+
+    async def authenticate_async(self, username, password):
+        """Awaitable login check; the event loop stays free while bcrypt runs."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.verify, username, password)
+
+    def forget(self, username=None):
+        """Drop cached logins (for one user, or everyone), e.g. on logout or role change."""
+        with self._lock:
+            if username is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(username, None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_auth_service = None
+_auth_lock = threading.Lock()
+
+def get_auth_service():
+    """Return the process-wide AuthService, creating it on first use."""
+    global _auth_service
+    if _auth_service is None:
+        with _auth_lock:
+            if _auth_service is None:
+                _auth_service = AuthService()
+    return _auth_service
+
+def authenticate(username, password):
+    """Check a username/password against the users table. Returns the role, or None."""
+    return get_auth_service().authenticate(username, password)
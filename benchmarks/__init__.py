@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# Run a benchmark from the project root, e.g.  python -m benchmarks.bench_connections
+# The whole-platform suite (JSON results, comparable between commits):  python -m benchmarks.suite --size 10k
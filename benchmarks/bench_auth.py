@@ -0,0 +1,67 @@
+# benchmarks/bench_auth.py
+"""
+Logins per second: one-at-a-time bcrypt checks vs the AuthService thread pool,
+and repeat logins served from its verification cache.
+
+    python -m benchmarks.bench_auth [--users 16] [--logins 64] [--cost 12]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import bcrypt
+
+from app.data.db import configure_pool
+from app.data.schema import create_tables
+from app.data.users import insert_user
+from app.services.user_service import AuthService
+
+
+def _rate(logins, fn):
+    start = time.perf_counter()
+    fn()
+    return logins / (time.perf_counter() - start)
+
+
+def run(users=16, logins=64, cost=12):
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(Path(tmp) / "bench.db")
+        create_tables()
+        password_hash = bcrypt.hashpw(b"secret123", bcrypt.gensalt(cost)).decode()
+        for i in range(users):
+            insert_user(f"user{i}", password_hash)
+        names = [f"user{i % users}" for i in range(logins)]
+
+        serial = AuthService(workers=1, cache_ttl=0, target_cost=cost)
+        pooled = AuthService(cache_ttl=0, target_cost=cost)
+        cached = AuthService(target_cost=cost)
+        for name in names[:users]:
+            cached.verify(name, "secret123")  # warm the cache
+
+        async def burst(service):
+            await asyncio.gather(*(service.authenticate_async(n, "secret123") for n in names))
+
+        results = {
+            "serial": _rate(logins, lambda: [serial.verify(n, "secret123") for n in names]),
+            "thread_pool": _rate(logins, lambda: [f.result() for f in [pooled.submit(n, "secret123") for n in names]]),
+            "thread_pool_async": _rate(logins, lambda: asyncio.run(burst(pooled))),
+            "cached": _rate(logins, lambda: [cached.authenticate(n, "secret123") for n in names]),
+        }
+        for service in (serial, pooled, cached):
+            service.shutdown()
+        configure_pool()
+
+    for name, rate in results.items():
+        print(f"{name:<18} {rate:>10,.1f} logins/s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--cost", type=int, default=12)
+    args = parser.parse_args()
+    run(args.users, args.logins, args.cost)
@@ -0,0 +1,95 @@
+# benchmarks/bench_bulk.py
+"""
+Closing and deleting many tickets: a loop over the single-key functions vs
+the bulk APIs (executemany of ids, and one filtered statement).
+
+    python -m benchmarks.bench_bulk [--rows 200000] [--changes 50000]
+
+Each case runs on its own copy of the same it_tickets table, and the rows
+changed are checked to be the same for every variant of an operation.
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.data.db import bulk_load_connection, configure_pool, get_connection
+from app.data.schema import create_tables
+from app.data.tickets import (
+    delete_ticket, delete_tickets_many, delete_tickets_where, insert_tickets_many, update_ticket_status,
+    update_ticket_status_many, update_ticket_status_where,
+)
+from app.data.timestamps import to_epoch
+
+OTHER_STATUSES = ["Resolved", "Waiting for User", "In Progress"]
+
+
+def _fill(rows, changes):
+    """`changes` tickets are Open and created in January, the rest are other statuses from February on."""
+    rnd = random.Random(42)
+    open_days = [f"2024-01-{rnd.randint(1, 31):02d}" for _ in range(changes)]
+    other_days = [f"2024-{rnd.randint(2, 12):02d}-01" for _ in range(rows - changes)]
+    days = open_days + other_days
+    statuses = ["Open"] * changes + [rnd.choice(OTHER_STATUSES) for _ in range(rows - changes)]
+    with bulk_load_connection() as conn, conn:
+        insert_tickets_many(conn, ((i, "", f"Ticket {i}", status, day, epoch, None, None, None)
+                                   for i, (status, day, epoch) in enumerate(zip(statuses, days, to_epoch(days)))))
+
+
+def _count(sql):
+    with get_connection() as conn:
+        return conn.execute(sql).fetchone()[0]
+
+
+def run(rows=200_000, changes=50_000):
+    ids = list(range(changes))  # the Open, January tickets
+    cases = {
+        "close": {
+            "loop update_ticket_status": lambda: [update_ticket_status(i, "Closed") for i in ids],
+            "update_ticket_status_many": lambda: update_ticket_status_many(ids, "Closed"),
+            "update_ticket_status_where": lambda: update_ticket_status_where("Closed", status="Open"),
+        },
+        "delete": {
+            "loop delete_ticket": lambda: [delete_ticket(i) for i in ids],
+            "delete_tickets_many": lambda: delete_tickets_many(ids),
+            "delete_tickets_where": lambda: delete_tickets_where(before="2024-02-01"),
+        },
+    }
+    checks = {"close": "SELECT COUNT(*) FROM it_tickets WHERE status = 'Closed'",
+              "delete": "SELECT COUNT(*) FROM it_tickets"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "base.db"
+        configure_pool(base)
+        create_tables()
+        _fill(rows, changes)
+        configure_pool()
+
+        results = {}
+        for operation, variants in cases.items():
+            for name, fn in variants.items():
+                db = Path(tmp) / "run.db"
+                shutil.copy(base, db)
+                configure_pool(db)
+                start = time.perf_counter()
+                fn()
+                seconds = time.perf_counter() - start
+                results[f"{operation}: {name}"] = {"seconds": seconds, "rows_per_sec": changes / seconds,
+                                                   "check": _count(checks[operation])}
+                configure_pool()
+                db.unlink()
+
+    print(f"{'operation: API':<42}{'seconds':>9}{'rows/s':>12}{'check':>9}")
+    for name, r in results.items():
+        print(f"{name:<42}{r['seconds']:>9.2f}{r['rows_per_sec']:>12,.0f}{r['check']:>9,}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--changes", type=int, default=50_000)
+    args = parser.parse_args()
+    run(args.rows, args.changes)
@@ -0,0 +1,115 @@
+# benchmarks/bench_charts.py
+"""
+Dashboard chart payloads: the full aggregated series vs the LTTB-downsampled
+one (line charts) and the long tail folded into "Other" (pie charts), plus
+what the chart spec cache saves on a rerun.
+
+    python -m benchmarks.bench_charts [--years 5] [--categories 200] [--repeats 20]
+
+For each chart the Vega-Lite JSON that home.py builds is measured: its size,
+the points or slices the browser has to draw, and the server time per rerun
+for three cases: building the spec from the full data (the old helpers),
+downsampling first (the first draw, a cache miss), and reusing the cached
+spec (hash the data, look it up, parse the JSON). Browser render time is not
+measured here; it grows with the number of marks drawn, which is reported.
+"""
+import argparse
+import json
+import time
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from app.data.cache import LRUCache
+from app.data.chart_data import downsample_series, fold_other, frame_hash
+
+
+def _line(df):
+    return (
+        alt.Chart(df)
+        .mark_line(point=True)
+        .encode(x=alt.X("date:T", title="Date"), y=alt.Y("count:Q", title="Count"), tooltip=["date", "count"])
+        .properties(title="Incidents per Hour", height=320)
+    )
+
+
+def _pie(df):
+    return (
+        alt.Chart(df)
+        .mark_arc()
+        .encode(theta=alt.Theta(field="count", type="quantitative"),
+                color=alt.Color(field="uploaded_by", type="nominal"), tooltip=["uploaded_by", "count"])
+        .properties(title="Datasets Uploaded by User", height=320)
+    )
+
+
+def _series(years, grain, seed=42):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=int(years * (8760 if grain == "h" else 365)), freq=grain)
+    # a slow rhythm, noise and a few incident bursts
+    counts = rng.poisson(20 + 10 * np.sin(np.arange(len(dates)) / 24), len(dates))
+    counts[rng.integers(0, len(dates), 20)] += 400
+    return pd.DataFrame({"date": dates, "count": counts})
+
+
+def _counts(categories, seed=42):
+    rng = np.random.default_rng(seed)
+    sizes = np.sort(rng.zipf(1.6, categories))[::-1]
+    return pd.DataFrame({"uploaded_by": [f"user_{i}" for i in range(categories)], "count": sizes})
+
+
+def _best_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def _rows(spec):
+    return sum(len(rows) for rows in spec["datasets"].values())
+
+
+def _measure(name, data, build, shrink, repeats):
+    cache = LRUCache(sizeof=len)
+    key = lambda: (name, frame_hash(data))
+    full_ms, full = _best_ms(lambda: build(data).to_json(), repeats)
+    miss_ms, small = _best_ms(lambda: build(shrink(data)).to_json(), repeats)
+    cache.lookup(key(), lambda: small)
+    hit_ms, _ = _best_ms(lambda: json.loads(cache.lookup(key(), lambda: small)), repeats)
+    return {
+        "chart": name,
+        "full_kb": len(full) / 1024, "full_marks": _rows(json.loads(full)),
+        "small_kb": len(small) / 1024, "small_marks": _rows(json.loads(small)),
+        "full_ms": full_ms, "miss_ms": miss_ms, "hit_ms": hit_ms,
+    }
+
+
+def run(years=5, categories=200, repeats=20):
+    results = []
+    with alt.data_transformers.disable_max_rows():
+        for grain, label in (("D", "per day"), ("h", "per hour")):
+            series = _series(years, grain)
+            results.append(_measure(f"line, {years} years {label}", series, _line,
+                                    lambda df: downsample_series(df, "date", "count"), repeats))
+        counts = _counts(categories)
+        results.append(_measure(f"pie, {categories} slices", counts, _pie,
+                                lambda df: fold_other(df, "uploaded_by", "count"), repeats))
+
+    print(f"{'chart':<26}{'spec KB':>16}{'marks':>16}{'full ms':>10}{'first ms':>10}{'cached ms':>11}")
+    for r in results:
+        print(f"{r['chart']:<26}{r['full_kb']:>8,.0f} -> {r['small_kb']:>4,.0f}"
+              f"{r['full_marks']:>8,} -> {r['small_marks']:>4,}"
+              f"{r['full_ms']:>10.1f}{r['miss_ms']:>10.1f}{r['hit_ms']:>11.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    run(args.years, args.categories, args.repeats)
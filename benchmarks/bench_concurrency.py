@@ -0,0 +1,152 @@
+# benchmarks/bench_concurrency.py
+"""
+One writer, N dashboard readers: what the readers cost the writer (and the
+other way round) with a rollback journal, with WAL, and with WAL plus the
+read replica from app/data/replica.py.
+
+    python -m benchmarks.bench_concurrency [--rows 200000] [--readers 4] [--seconds 10]
+
+The writer commits batches of incidents through the connection pool, like
+the CSV loader does. Each reader loops over heavy dashboard queries through
+get_read_connection(). Every mode starts from a copy of the same database.
+Reported: rows the writer got in, its commit latency, reader queries per
+second, and "database is locked" errors on either side.
+"""
+import argparse
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from app.data.db import (
+    DEFAULT_PRAGMAS, bulk_load_connection, configure_pool, configure_read_replica, get_read_connection, transaction,
+)
+from app.data.incidents import insert_incidents_many
+from app.data.replica import refresh_replica
+from app.data.schema import create_tables
+
+BATCH_ROWS = 500
+REPLICA_REFRESH_SECONDS = 2
+READER_QUERIES = [
+    "SELECT * FROM cyber_incidents",
+    "SELECT category, severity, COUNT(*) FROM cyber_incidents GROUP BY category, severity",
+    "SELECT status, COUNT(*) FROM cyber_incidents WHERE description LIKE '%5%' GROUP BY status",
+]
+# mode -> journal mode the copy is switched to before the run. The pool then opens it
+# without the journal_mode PRAGMA: changing it needs the file to itself.
+MODES = {"rollback journal": "DELETE", "WAL": "WAL", "WAL + replica": "WAL"}
+POOL_PRAGMAS = {name: value for name, value in DEFAULT_PRAGMAS.items() if name != "journal_mode"}
+
+
+def _rows(start, count):
+    return ((i, "2024-01-01 00:00:00", 1704067200, "Low", "Malware", "Open", f"Incident {i}")
+            for i in range(start, start + count))
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+def _writer(stop, next_id, result):
+    latencies, locked = [], 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with transaction() as conn:
+                insert_incidents_many(conn, _rows(next_id, BATCH_ROWS))
+        except sqlite3.OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            locked += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        next_id += BATCH_ROWS
+    result.update(latencies=latencies, locked=locked)
+
+
+def _reader(stop, result):
+    queries = locked = 0
+    while not stop.is_set():
+        try:
+            with get_read_connection() as conn:
+                conn.execute(READER_QUERIES[queries % len(READER_QUERIES)]).fetchall()
+        except sqlite3.OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            locked += 1
+            continue
+        queries += 1
+    result.update(queries=queries, locked=locked)
+
+
+def _refresher(stop, path):
+    while not stop.wait(REPLICA_REFRESH_SECONDS):
+        refresh_replica(path)
+
+
+def run(rows=200_000, readers=4, seconds=10):
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "base.db"
+        configure_pool(base)
+        create_tables()
+        with bulk_load_connection() as conn, conn:
+            insert_incidents_many(conn, _rows(0, rows))
+        configure_pool()
+
+        results = {}
+        for mode, journal_mode in MODES.items():
+            db = Path(tmp) / "run.db"
+            shutil.copy(base, db)
+            conn = sqlite3.connect(db)
+            conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+            conn.close()
+            configure_pool(db, POOL_PRAGMAS)
+            stop = threading.Event()
+            threads = []
+            if mode == "WAL + replica":
+                replica = Path(tmp) / "run.replica.db"
+                refresh_replica(replica, force=True)
+                configure_read_replica(replica)
+                threads.append(threading.Thread(target=_refresher, args=(stop, replica)))
+
+            writer = {}
+            reader_results = [{} for _ in range(readers)]
+            threads.append(threading.Thread(target=_writer, args=(stop, rows, writer)))
+            threads += [threading.Thread(target=_reader, args=(stop, r)) for r in reader_results]
+            for thread in threads:
+                thread.start()
+            time.sleep(seconds)
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+            results[mode] = {
+                "rows_per_sec": len(writer["latencies"]) * BATCH_ROWS / seconds,
+                "commit_p50_ms": _percentile(writer["latencies"], 0.5),
+                "commit_max_ms": max(writer["latencies"], default=0.0),
+                "reader_queries_per_sec": sum(r["queries"] for r in reader_results) / seconds,
+                "locked": writer["locked"] + sum(r["locked"] for r in reader_results),
+            }
+            configure_read_replica(None)
+            configure_pool()
+            for path in Path(tmp).glob("run*"):
+                path.unlink()
+
+    print(f"{'mode':<18}{'writer rows/s':>15}{'commit p50 ms':>15}{'commit max ms':>15}"
+          f"{'reads/s':>10}{'locked':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<18}{r['rows_per_sec']:>15,.0f}{r['commit_p50_ms']:>15.1f}{r['commit_max_ms']:>15.1f}"
+              f"{r['reader_queries_per_sec']:>10.1f}{r['locked']:>8}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    run(args.rows, args.readers, args.seconds)
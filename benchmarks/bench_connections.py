@@ -0,0 +1,70 @@
+# benchmarks/bench_connections.py
+"""
+Compares CRUD throughput of the old "connect, execute, commit, close" pattern
+with the pooled connections from app/data/db.py.
+
+    python -m benchmarks.bench_connections [--ops 5000]
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from app.data.db import configure_pool
+from app.data.schema import create_tables
+from app.data.incidents import insert_incident, update_incident_status
+from app.data.users import insert_user, get_user_by_username
+
+
+def _per_call_lookup(db_path, username):
+    # What every data function used to do before the pool existed
+    conn = sqlite3.connect(str(db_path))
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM users WHERE username = ?", (username,))
+    row = cur.fetchone()
+    conn.close()
+    return row
+
+
+def _per_call_update(db_path, incident_id, status):
+    conn = sqlite3.connect(str(db_path))
+    cur = conn.cursor()
+    cur.execute("UPDATE cyber_incidents SET status = ? WHERE incident_id = ?", (status, incident_id))
+    conn.commit()
+    conn.close()
+
+
+def _ops_per_sec(fn, ops):
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return ops / (time.perf_counter() - start)
+
+
+def run(ops=5000):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        configure_pool(db_path)
+        create_tables()
+        for i in range(100):
+            insert_user(f"user{i}", "hash")
+            insert_incident(i, "2024-01-01 00:00:00", "Low", "Malware", "Open", "bench")
+
+        results = {
+            "lookup_per_call": _ops_per_sec(lambda i: _per_call_lookup(db_path, f"user{i % 100}"), ops),
+            "lookup_pooled": _ops_per_sec(lambda i: get_user_by_username(f"user{i % 100}"), ops),
+            "update_per_call": _ops_per_sec(lambda i: _per_call_update(db_path, i % 100, "Closed"), ops),
+            "update_pooled": _ops_per_sec(lambda i: update_incident_status(i % 100, "Closed"), ops),
+        }
+        configure_pool()
+
+    for name, rate in results.items():
+        print(f"{name:<18} {rate:>12,.0f} ops/s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=5000)
+    run(parser.parse_args().ops)
@@ -0,0 +1,145 @@
+# benchmarks/bench_correlation.py
+"""
+Incident -> ticket correlation (app/data/correlation.py): tickets opened within
+N hours after each incident.
+
+    python -m benchmarks.bench_correlation [--incidents 1000000] [--tickets 1000000]
+                                           [--hours 24] [--small 2000] [--repeats 3]
+
+Three ways of getting the per-incident ticket counts are timed on the full
+tables:
+  sorted search   read both sides in time order, np.searchsorted the windows
+  SQL range join  one correlated COUNT(*) per incident over idx_tickets_created_epoch
+and the pandas cross join (merge how="cross" + filter) only on the first
+--small incidents and tickets, since it materialises N x M rows. The counts
+of all methods are checked against each other, and the listed pairs of the
+sorted search against the cross join.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.data.correlation import incident_times_query, ticket_counts, ticket_pairs, ticket_times_query
+from app.data.db import bulk_load_connection, configure_pool, get_connection
+from app.data.frames import read_frame
+from app.data.incidents import insert_incidents_many
+from app.data.schema import create_tables
+from app.data.tickets import insert_tickets_many
+
+LOAD_BATCH = 100_000
+YEAR_START = 1704067200  # 2024-01-01
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+CATEGORIES = ["Phishing", "Malware", "DDoS", "Unauthorized Access"]
+
+RANGE_JOIN_SQL = """
+    SELECT i.incident_id,
+           (SELECT COUNT(*) FROM it_tickets t
+            WHERE t.created_epoch BETWEEN i.timestamp_epoch AND i.timestamp_epoch + ?) AS tickets
+    FROM cyber_incidents i
+    WHERE i.timestamp_epoch IS NOT NULL
+    ORDER BY i.timestamp_epoch
+"""
+
+
+def _stamps(rng, rows):
+    seconds = YEAR_START + rng.integers(0, 366 * 24 * 3600, rows)
+    text = [s.replace("T", " ") for s in np.datetime_as_string(seconds.astype("datetime64[s]")).tolist()]
+    return seconds.tolist(), text
+
+
+def _fill(incidents, tickets, seed=42):
+    rng = np.random.default_rng(seed)
+    incident_epochs, incident_text = _stamps(rng, incidents)
+    ticket_epochs, ticket_text = _stamps(rng, tickets)
+    with bulk_load_connection() as conn:
+        for first in range(0, incidents, LOAD_BATCH):
+            with conn:
+                insert_incidents_many(conn, (
+                    (i, incident_text[i], incident_epochs[i], SEVERITIES[i % 4], CATEGORIES[i % 3 % 4], "Open",
+                     f"Incident {i}") for i in range(first, min(first + LOAD_BATCH, incidents))))
+        for first in range(0, tickets, LOAD_BATCH):
+            with conn:
+                insert_tickets_many(conn, (
+                    (i, "", f"Ticket {i}", "Open", ticket_text[i], ticket_epochs[i], None, None, None)
+                    for i in range(first, min(first + LOAD_BATCH, tickets))))
+
+
+def _best(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def _sorted_search(hours):
+    incidents = read_frame(*incident_times_query())
+    tickets = read_frame(*ticket_times_query())
+    return ticket_counts(incidents, tickets, hours)
+
+
+def _range_join(hours):
+    with get_connection() as conn:
+        return pd.read_sql_query(RANGE_JOIN_SQL, conn, params=[int(hours * 3600)])
+
+
+def _cross_join(incidents, tickets, hours):
+    pairs = incidents.merge(tickets, how="cross")
+    delta = pairs["created_epoch"].astype("int64") - pairs["timestamp_epoch"].astype("int64")
+    return pairs[(delta >= 0) & (delta <= hours * 3600)]
+
+
+def _small(incidents, tickets, hours, size, repeats):
+    """Cross join vs sorted search on the first `size` incidents and tickets (both time-sorted)."""
+    incidents, tickets = incidents.head(size), tickets.head(size)
+    cross_s, cross = _best(lambda: _cross_join(incidents, tickets, hours), repeats)
+    sorted_s, pairs = _best(lambda: ticket_pairs(incidents, tickets, hours), repeats)
+    expected = sorted(zip(cross["incident_id"], cross["ticket_id"]))
+    assert sorted(zip(pairs["incident_id"], pairs["ticket_id"])) == expected, "pairs differ from the cross join"
+    return cross_s, sorted_s, len(expected)
+
+
+def run(incidents=1_000_000, tickets=1_000_000, hours=24, small=2000, repeats=3):
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(Path(tmp) / "correlation.db")
+        create_tables()
+        _fill(incidents, tickets)
+
+        read_s, (incident_times, ticket_times) = _best(
+            lambda: (read_frame(*incident_times_query()), read_frame(*ticket_times_query())), repeats)
+        search_s, _ = _best(lambda: ticket_counts(incident_times, ticket_times, hours), repeats)
+        total_s, counts = _best(lambda: _sorted_search(hours), repeats)
+        pairs_s, pairs = _best(lambda: ticket_pairs(incident_times, ticket_times, hours, limit=1000), repeats)
+        sql_s, sql_counts = _best(lambda: _range_join(hours), 1)
+        assert (counts["tickets"].to_numpy() == sql_counts["tickets"].to_numpy()).all(), "SQL counts differ"
+        cross_s, small_s, small_pairs = _small(incident_times, ticket_times, hours, small, repeats)
+        configure_pool()
+
+    print(f"{incidents:,} incidents x {tickets:,} tickets, {hours} h window: "
+          f"{int(counts['tickets'].sum()):,} pairs, {int((counts['tickets'] > 0).sum()):,} incidents with a ticket")
+    print(f"  read both sides in time order   {read_s:8.2f} s")
+    print(f"  searchsorted counts (in memory) {search_s * 1000:8.1f} ms")
+    print(f"  sorted search, read + count     {total_s:8.2f} s")
+    print(f"  first {len(pairs):,} pairs (in memory)  {pairs_s * 1000:8.1f} ms")
+    print(f"  SQL range join counts           {sql_s:8.2f} s")
+    print(f"{small:,} x {small:,} subset ({small_pairs:,} pairs):")
+    print(f"  pandas cross join               {cross_s * 1000:8.1f} ms")
+    print(f"  sorted search, all pairs        {small_s * 1000:8.1f} ms")
+    return {"read_s": read_s, "search_s": search_s, "sorted_total_s": total_s, "pairs_s": pairs_s,
+            "sql_range_join_s": sql_s, "cross_join_small_s": cross_s, "sorted_small_s": small_s}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incidents", type=int, default=1_000_000)
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--small", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run(args.incidents, args.tickets, args.hours, args.small, args.repeats)
@@ -0,0 +1,93 @@
+# benchmarks/bench_frames.py
+"""
+Memory and filter speed of an incidents DataFrame read with plain
+pd.read_sql_query vs app.data.frames.read_frame (Categoricals, narrow ints).
+
+    python -m benchmarks.bench_frames [--rows 5000000] [--repeats 20]
+
+The rows are generated inside SQLite into a bare cyber_incidents table (no
+triggers or indexes), since only reading them back is being measured.
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from app.data.frames import read_frame
+
+QUERY = "SELECT id, incident_id, timestamp_epoch, severity, category, status FROM cyber_incidents"
+
+# (severity, status) pairs to filter on, like the Incidents page dropdowns
+FILTERS = [("High", "Open"), ("Low", "Closed"), ("Critical", "In Progress")]
+
+
+def _fill(conn, rows):
+    conn.execute("""
+        CREATE TABLE cyber_incidents (
+            id INTEGER PRIMARY KEY, incident_id INTEGER, timestamp_epoch INTEGER,
+            severity TEXT, category TEXT, status TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO cyber_incidents
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        SELECT i, 1000 + i, 1704067200 + abs(random()) % 31622400,
+               CASE abs(random()) % 4 WHEN 0 THEN 'Low' WHEN 1 THEN 'Medium' WHEN 2 THEN 'High' ELSE 'Critical' END,
+               CASE abs(random()) % 5 WHEN 0 THEN 'Phishing' WHEN 1 THEN 'DDoS' WHEN 2 THEN 'Malware'
+                                      WHEN 3 THEN 'Misconfiguration' ELSE 'Unauthorized Access' END,
+               CASE abs(random()) % 5 WHEN 0 THEN 'Resolved' WHEN 1 THEN 'Open' WHEN 2 THEN 'Waiting for User'
+                                      WHEN 3 THEN 'In Progress' ELSE 'Closed' END
+        FROM n
+    """, (rows,))
+    conn.commit()
+
+
+def _time_filters(df, repeats):
+    # average ms for one severity + status filter, the pandas way
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for severity, status in FILTERS:
+            df[(df["severity"] == severity) & (df["status"] == status)]
+    return (time.perf_counter() - start) / (repeats * len(FILTERS)) * 1000
+
+
+def run(rows=5_000_000, repeats=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / "bench.db")
+        _fill(conn, rows)
+
+        results = {}
+        for name, read in (("read_sql_query", lambda: pd.read_sql_query(QUERY, conn)),
+                           ("read_frame", lambda: read_frame(QUERY, conn=conn))):
+            start = time.perf_counter()
+            df = read()
+            load_seconds = time.perf_counter() - start
+            results[name] = {
+                "load_s": load_seconds,
+                "memory_mb": df.memory_usage(deep=True).sum() / 1024 / 1024,
+                "filter_ms": _time_filters(df, repeats),
+                "dtypes": {column: str(dtype) for column, dtype in df.dtypes.items()},
+            }
+            del df
+        conn.close()
+
+    before, after = results["read_sql_query"], results["read_frame"]
+    print(f"{'reader':<16}{'load (s)':>10}{'memory (MB)':>13}{'filter (ms)':>13}")
+    for name, r in results.items():
+        print(f"{name:<16}{r['load_s']:>10.2f}{r['memory_mb']:>13.1f}{r['filter_ms']:>13.2f}")
+    print(f"memory {before['memory_mb'] / after['memory_mb']:.1f}x smaller, "
+          f"filters {before['filter_ms'] / after['filter_ms']:.1f}x faster")
+    for name, r in results.items():
+        print(f"{name} dtypes: {r['dtypes']}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.repeats)
@@ -0,0 +1,99 @@
+# benchmarks/bench_indexes.py
+"""
+Times the key lookups and dashboard filters with and without the indexes
+added by the schema migrations: the secondary idx_* indexes and the unique
+ux_* ones behind the incident_id / ticket_id lookups and upserts.
+
+    python -m benchmarks.bench_indexes [--rows 1000000] [--lookups 200]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.data.db import bulk_load_connection, configure_pool, get_connection
+from app.data.schema import create_tables
+from app.data.incidents import insert_incidents_many
+from app.data.tickets import insert_tickets_many
+from app.data.timestamps import to_epoch
+
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+CATEGORIES = ["Phishing", "DDoS", "Malware", "Misconfiguration", "Unauthorized Access"]
+STATUSES = ["Resolved", "Open", "Waiting for User", "In Progress", "Closed"]
+
+QUERIES = {
+    "incident by incident_id": ("SELECT * FROM cyber_incidents WHERE incident_id = ?", lambda r: (r.randrange(ROWS),)),
+    "ticket by ticket_id": ("SELECT * FROM it_tickets WHERE ticket_id = ?", lambda r: (r.randrange(ROWS),)),
+    "incidents status+severity": ("SELECT COUNT(*) FROM cyber_incidents WHERE status = ? AND severity = ?",
+                                  lambda r: (r.choice(STATUSES), r.choice(SEVERITIES))),
+    "incidents one day": ("SELECT COUNT(*) FROM cyber_incidents WHERE timestamp_epoch >= ? AND timestamp_epoch < ?",
+                          lambda r: (1709251200, 1709337600)),  # 2024-03-01 .. 2024-03-02 UTC
+    "tickets by status": ("SELECT COUNT(*) FROM it_tickets WHERE status = ?", lambda r: (r.choice(STATUSES),)),
+}
+ROWS = 0
+
+
+def _fill(rows):
+    rnd = random.Random(42)
+    stamps = [f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} {rnd.randint(0, 23):02d}:00:00"
+              for _ in range(rows)]
+    days = [f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}" for _ in range(rows)]
+    with bulk_load_connection() as conn:
+        with conn:
+            insert_incidents_many(conn, (
+                (i, stamp, epoch, rnd.choice(SEVERITIES), rnd.choice(CATEGORIES), rnd.choice(STATUSES), f"Incident {i}")
+                for i, (stamp, epoch) in enumerate(zip(stamps, to_epoch(stamps)))))
+            insert_tickets_many(conn, (
+                (i, "", f"Ticket {i}", rnd.choice(STATUSES), day, epoch, None, None, None)
+                for i, (day, epoch) in enumerate(zip(days, to_epoch(days)))))
+
+
+def _time_queries(lookups):
+    rnd = random.Random(7)
+    results = {}
+    with get_connection() as conn:
+        for name, (sql, params) in QUERIES.items():
+            start = time.perf_counter()
+            for _ in range(lookups):
+                conn.execute(sql, params(rnd)).fetchall()
+            results[name] = (time.perf_counter() - start) / lookups * 1000
+    return results
+
+
+def run(rows=1_000_000, lookups=200):
+    global ROWS
+    ROWS = rows
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(Path(tmp) / "bench.db")
+        create_tables()
+        _fill(rows)
+
+        # "before": same tables, none of the migrations' indexes (the unique key ones included,
+        # or the key lookups would be indexed on both sides)
+        with get_connection() as conn:
+            indexes = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                                   "AND (name LIKE 'idx\\_%' ESCAPE '\\' OR name LIKE 'ux\\_%' ESCAPE '\\')").fetchall()
+            for name, _ in indexes:
+                conn.execute(f"DROP INDEX {name}")
+        before = _time_queries(max(1, lookups // 20))  # full scans are slow; sample fewer
+
+        with get_connection() as conn:
+            for _, sql in indexes:
+                conn.execute(sql)
+            conn.execute("PRAGMA optimize")
+        after = _time_queries(lookups)
+        configure_pool()
+
+    print(f"{'query':<28}{'no index (ms)':>15}{'indexed (ms)':>15}")
+    for name in QUERIES:
+        print(f"{name:<28}{before[name]:>15.3f}{after[name]:>15.3f}")
+    return {"before_ms": before, "after_ms": after}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+    run(args.rows, args.lookups)
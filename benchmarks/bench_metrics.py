@@ -0,0 +1,63 @@
+# benchmarks/bench_metrics.py
+"""
+Cost of the @timed wrapper from app/data/metrics.py: the same call unwrapped,
+wrapped with metrics off (the default) and wrapped with metrics on.
+
+    python -m benchmarks.bench_metrics [--calls 200000]
+
+Measured on an empty function (pure wrapper cost) and on
+get_user_by_username (an indexed SQLite lookup, the cheapest real query).
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.data import metrics
+from app.data.db import configure_pool
+from app.data.schema import create_tables
+from app.data.users import get_user_by_username, insert_user
+
+
+@metrics.timed("bench.noop")
+def noop():
+    return None
+
+
+def _per_call_us(fn, args, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(*args)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def run(calls=200_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(Path(tmp) / "bench.db")
+        create_tables()
+        insert_user("olaf", "hash")
+
+        results = {}
+        for name, fn, args, n in (("empty function", noop, (), calls),
+                                  ("get_user_by_username", get_user_by_username, ("olaf",), calls // 10)):
+            metrics.enable(False)
+            unwrapped = _per_call_us(fn.__wrapped__, args, n)
+            off = _per_call_us(fn, args, n)
+            metrics.enable(True)
+            on = _per_call_us(fn, args, n)
+            metrics.enable(False)
+            results[name] = {"unwrapped_us": unwrapped, "off_us": off, "on_us": on}
+        metrics.reset()
+        configure_pool()
+
+    print(f"{'call':<22}{'unwrapped (us)':>16}{'metrics off':>13}{'metrics on':>12}")
+    for name, r in results.items():
+        print(f"{name:<22}{r['unwrapped_us']:>16.3f}{r['off_us']:>13.3f}{r['on_us']:>12.3f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+    run(args.calls)
@@ -0,0 +1,137 @@
+# benchmarks/bench_partitions.py
+"""
+Monthly incident partitions (app/data/partitions.py): queries on recent data,
+pruned history queries, file size, VACUUM and backup, on one big
+cyber_incidents table vs the same data after apply_retention().
+
+    python -m benchmarks.bench_partitions [--months 36] [--per-month 40000] [--repeats 5]
+
+The history is loaded once. Everything is measured on the single table, then
+retention keeps the newest 3 months hot, moves the rest into partition tables
+and compresses the partitions older than 12 months, and everything is
+measured again. "dashboard" queries are the Incidents page's, on the
+cyber_incidents_all view (every month not compressed); "recent" ones read the
+hot table only; "history" reads one old month through the pruned
+incidents_query() and through the view.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.data.db import bulk_load_connection, configure_pool, get_connection
+from app.data.incidents import insert_incidents_many
+from app.data.partitions import ALL_VIEW, add_months, apply_retention, incidents_query, month_start
+from app.data.queries import count_by, select_page
+from app.data.search import search_page
+from app.data.schema import create_tables
+
+LOAD_BATCH = 100_000
+START = 1577836800  # 2020-01-01
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+CATEGORIES = ["Phishing", "Malware", "DDoS", "Unauthorized Access", "Misconfiguration"]
+STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+
+
+def _fill(months, per_month, seed=42):
+    rng = np.random.default_rng(seed)
+    end = add_months(START, months)
+    rows = months * per_month
+    epochs = np.sort(rng.integers(START, end, rows))
+    text = [s.replace("T", " ") for s in np.datetime_as_string(epochs.astype("datetime64[s]")).tolist()]
+    epochs = epochs.tolist()
+    with bulk_load_connection() as conn:
+        for first in range(0, rows, LOAD_BATCH):
+            with conn:
+                insert_incidents_many(conn, (
+                    (i, text[i], epochs[i], SEVERITIES[i % 4], CATEGORIES[i % 5], STATUSES[i % 7 % 4],
+                     f"Incident {i}: suspicious activity reported on host-{i % 997}")
+                    for i in range(first, min(first + LOAD_BATCH, rows))))
+    return end
+
+
+def _best_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def _queries(newest, old_month):
+    """name -> (sql, params) measured before and after partitioning (built again after: they list the tables)."""
+    recent = newest - 30 * 86400
+    old_after, old_before = (time.strftime("%Y-%m-%d", time.gmtime(e)) for e in (old_month, add_months(old_month, 1)))
+    return {
+        "dashboard: first page (Open)": select_page(ALL_VIEW, {"status": "Open"}),
+        "dashboard: newest page (Open)": select_page(ALL_VIEW, {"status": "Open"}, "timestamp", True),
+        "dashboard: severity counts (Malware)": count_by(ALL_VIEW, "severity", {"category": "Malware"}),
+        "dashboard: search, 3 words": search_page(ALL_VIEW, "suspicious host 42"),
+        "recent: last 30 days, text match": (
+            "SELECT severity, COUNT(*) FROM cyber_incidents WHERE timestamp_epoch >= ? "
+            "AND description LIKE '%host-42%' GROUP BY severity", (recent,)),
+        "recent: full scan by status": ("SELECT status, COUNT(*) FROM cyber_incidents GROUP BY status", ()),
+        "history: one month, pruned": incidents_query({"severity": "High"}, old_after, old_before),
+        "history: one month, view": (
+            f"SELECT * FROM {ALL_VIEW} WHERE severity = ? AND timestamp_epoch >= ? AND timestamp_epoch < ?",
+            ("High", old_month, add_months(old_month, 1))),
+    }
+
+
+def _measure(db, queries, repeats):
+    results = {}
+    with get_connection() as conn:
+        for name, (sql, params) in queries.items():
+            results[f"{name} (ms)"] = _best_ms(lambda: conn.execute(sql, params).fetchall(), repeats)
+        start = time.perf_counter()
+        conn.execute("VACUUM")
+        results["VACUUM (ms)"] = (time.perf_counter() - start) * 1000
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    results["file size after VACUUM (MB)"] = os.path.getsize(db) / 1024 / 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        with sqlite3.connect(db) as source, sqlite3.connect(Path(tmp) / "backup.db") as target:
+            source.backup(target)
+        results["backup (ms)"] = (time.perf_counter() - start) * 1000
+    return results
+
+
+def run(months=36, per_month=40_000, repeats=5):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "partitions.db"
+        configure_pool(db)
+        create_tables()
+        end = _fill(months, per_month)
+        newest = end - 1
+        old_month = add_months(month_start(newest), -6)
+
+        single = _measure(db, _queries(newest, old_month), repeats)
+        start = time.perf_counter()
+        archive = Path(tmp) / "archive"
+        done = apply_retention(hot_months=3, compress_after_months=12, archive_dir=archive)
+        retention_s = time.perf_counter() - start
+        partitioned = _measure(db, _queries(newest, old_month), repeats)
+        archive_mb = sum(f.stat().st_size for f in archive.glob("*.db.gz")) / 1024 / 1024
+        configure_pool()
+
+    print(f"{months * per_month:,} incidents over {months} months; retention moved "
+          f"{sum(done['moved'].values()):,} rows into {len(done['moved'])} partitions and compressed "
+          f"{len(done['compressed'])} of them ({archive_mb:,.1f} MB of .db.gz) in {retention_s:.1f} s")
+    print(f"{'':<44}{'one table':>12}{'partitioned':>13}")
+    for name in single:
+        print(f"{name:<44}{single[name]:>12,.1f}{partitioned[name]:>13,.1f}")
+    return {"single": single, "partitioned": partitioned, "retention_s": retention_s, "archive_mb": archive_mb}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--per-month", type=int, default=40_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    run(args.months, args.per_month, args.repeats)
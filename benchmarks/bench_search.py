@@ -0,0 +1,110 @@
+# benchmarks/bench_search.py
+"""
+Keyword search latency over the FTS5 index vs a LIKE '%word%' scan,
+on a synthetic cyber_incidents table (Zipf-distributed vocabulary).
+
+    python -m benchmarks.bench_search [--docs 1000000] [--lookups 20]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.data.db import bulk_load_connection, configure_pool, get_connection
+from app.data.incidents import insert_incidents_many
+from app.data.partitions import ALL_VIEW
+from app.data.schema import create_tables
+from app.data.search import MAX_RANKED_MATCHES, count_matches, search_cursor, search_page
+
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+CATEGORIES = ["Phishing", "DDoS", "Malware", "Misconfiguration", "Unauthorized Access"]
+STATUSES = ["Resolved", "Open", "Waiting for User", "In Progress", "Closed"]
+COMMON_WORDS = ["login", "user", "server", "email", "phishing", "malware", "password", "firewall",
+                "alert", "access", "blocked", "suspicious", "network", "endpoint", "credential"]
+VOCABULARY = COMMON_WORDS + [f"term{i}" for i in range(5000)]
+
+# name -> (search text, filters, pages to step through)
+QUERIES = {
+    "common word": ("login", None, 1),
+    "two words": ("phishing credential", None, 1),
+    "rare word": ("term4321", None, 1),
+    "prefix (2 chars)": ("cr*", None, 1),
+    "prefix (5 chars)": ("suspi*", None, 1),
+    "word + status filter": ("firewall", {"status": "Open"}, 1),
+    "common word, page 10": ("login", None, 10),
+}
+
+
+def _fill(docs):
+    rnd = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+    start = time.perf_counter()
+    with bulk_load_connection() as conn:
+        for first in range(0, docs, 50_000):
+            rows = []
+            for i in range(first, min(first + 50_000, docs)):
+                words = rnd.choices(VOCABULARY, weights, k=rnd.randint(6, 14))
+                rows.append((i, "2024-01-01 00:00:00", 1704067200, rnd.choice(SEVERITIES),
+                             rnd.choice(CATEGORIES), rnd.choice(STATUSES), " ".join(words)))
+            with conn:
+                insert_incidents_many(conn, rows)
+    return time.perf_counter() - start
+
+
+def _time_fts(text, filters, pages, lookups):
+    # average ms for the match count plus `pages` pages of 50, the way home.py pages through results
+    with get_connection() as conn:
+        start = time.perf_counter()
+        for _ in range(lookups):
+            total = conn.execute(*count_matches(ALL_VIEW, text, filters)).fetchone()[0]
+            after = None
+            for _ in range(pages):
+                cur = conn.execute(*search_page(ALL_VIEW, text, filters, 50, after, total <= MAX_RANKED_MATCHES))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+                after = search_cursor(ALL_VIEW, dict(zip([d[0] for d in cur.description], rows[-1])))
+        return (time.perf_counter() - start) / lookups * 1000, total
+
+
+def _time_like(text, lookups):
+    word = text.rstrip("*").split()[0]
+    with get_connection() as conn:
+        start = time.perf_counter()
+        for _ in range(lookups):
+            conn.execute("SELECT COUNT(*) FROM cyber_incidents WHERE description LIKE ?", (f"%{word}%",)).fetchone()
+        return (time.perf_counter() - start) / lookups * 1000
+
+
+def run(docs=1_000_000, lookups=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(Path(tmp) / "bench.db")
+        create_tables()
+        fill_seconds = _fill(docs)
+        print(f"✓ {docs:,} documents indexed in {fill_seconds:.1f}s ({docs / fill_seconds:,.0f} rows/s)")
+
+        results = {}
+        for name, (text, filters, pages) in QUERIES.items():
+            fts_ms, matches = _time_fts(text, filters, pages, lookups)
+            results[name] = {
+                "matches": matches,
+                "ranked": matches <= MAX_RANKED_MATCHES,
+                "fts_ms": fts_ms,
+                "like_ms": _time_like(text, max(1, lookups // 10)),  # full scans are slow; sample fewer
+            }
+        configure_pool()
+
+    print(f"{'query':<26}{'matches':>10}{'ranked':>8}{'FTS5 (ms)':>12}{'LIKE (ms)':>12}")
+    for name, timing in results.items():
+        print(f"{name:<26}{timing['matches']:>10,}{'yes' if timing['ranked'] else 'no':>8}"
+              f"{timing['fts_ms']:>12.2f}{timing['like_ms']:>12.2f}")
+    return {"docs": docs, "fill_seconds": fill_seconds, "queries": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20)
+    args = parser.parse_args()
+    run(args.docs, args.lookups)
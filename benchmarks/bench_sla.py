@@ -0,0 +1,120 @@
+# benchmarks/bench_sla.py
+"""
+Ticket SLA percentiles (app/data/sla.py): the sketch table vs reading every
+matching ticket, and what keeping the sketch up to date costs the loader.
+
+    python -m benchmarks.bench_sla [--rows 1000000] [--repeats 5]
+
+Tickets are loaded twice into fresh databases, with and without the sketch
+triggers. Each question is then answered from the sketch and exactly, and
+the range of the sketch's relative error over the exact answers is reported
+(it should stay between 0 and ~9%).
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.data.db import bulk_load_connection, configure_pool, transaction
+from app.data.schema import create_tables
+from app.data.sla import SLA_SKETCH, resolution_percentiles
+from app.data.tickets import insert_tickets_many
+from app.data.timestamps import to_epoch
+
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+ASSIGNEES = [f"IT_Support_{c}" for c in "ABCDEFGH"]
+LOAD_BATCH = 50_000
+
+# name -> resolution_percentiles() keyword arguments
+QUESTIONS = {
+    "p95 High, last quarter": dict(group_by=(), percentiles=(0.95,), filters={"priority": "High"},
+                                   after="2024-10-01", before="2025-01-01"),
+    "p50/p90/p99 by priority": dict(group_by=("priority",)),
+    "p50/p90/p99 by priority x assignee": dict(group_by=("priority", "assigned_to")),
+    "p50/p90/p99 by week, one assignee": dict(group_by=("week",), filters={"assigned_to": "IT_Support_A"}),
+}
+
+
+def _tickets(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    seconds = 1704067200 + rng.integers(0, 366 * 24, rows) * 3600
+    stamps = [s.replace("T", " ") for s in np.datetime_as_string(seconds.astype("datetime64[s]")).tolist()]
+    priority = rng.choice(PRIORITIES, rows)
+    assignee = rng.choice(ASSIGNEES, rows)
+    hours = np.round(rng.lognormal(3.2, 0.8, rows), 2)
+    for first in range(0, rows, LOAD_BATCH):
+        last = min(first + LOAD_BATCH, rows)
+        epochs = to_epoch(stamps[first:last])
+        yield [(i, "", f"Ticket {i}", "Resolved", stamps[i], epochs[i - first],
+                str(priority[i]), str(assignee[i]), float(hours[i])) for i in range(first, last)]
+
+
+def _load(rows):
+    start = time.perf_counter()
+    with bulk_load_connection() as conn:
+        for batch in _tickets(rows):
+            with conn:
+                insert_tickets_many(conn, batch)
+    return rows / (time.perf_counter() - start)
+
+
+def _best(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def _max_error(sketch, exact):
+    columns = [c for c in exact.columns if c.endswith("_hours")]
+    keys = [c for c in exact.columns if c not in columns and c != "tickets"]
+    if keys:
+        sketch = sketch.astype({k: str for k in keys}).set_index(keys).sort_index()
+        exact = exact.astype({k: str for k in keys}).set_index(keys).sort_index()
+    ratios = sketch[columns].to_numpy() / exact[columns].to_numpy() - 1
+    return float(ratios.min()), float(ratios.max())
+
+
+def run(rows=1_000_000, repeats=5):
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(Path(tmp) / "no_sketch.db")
+        create_tables()
+        with transaction() as conn:
+            for event in ("insert", "delete", "update"):
+                conn.execute(f"DROP TRIGGER trg_{SLA_SKETCH}_{event}")
+        load_without = _load(rows)
+
+        configure_pool(Path(tmp) / "sla.db")
+        create_tables()
+        load_with = _load(rows)
+
+        results = {"load": {"rows_per_sec_without_sketch": load_without, "rows_per_sec_with_sketch": load_with}}
+        for name, question in QUESTIONS.items():
+            sketch_ms, sketch = _best(lambda: resolution_percentiles(**question), repeats)
+            exact_ms, exact = _best(lambda: resolution_percentiles(**question, exact=True), repeats)
+            low, high = _max_error(sketch, exact)
+            results[name] = {"sketch_ms": sketch_ms, "exact_ms": exact_ms, "groups": len(exact),
+                             "error_min": low, "error_max": high}
+        configure_pool()
+
+    load = results.pop("load")
+    print(f"load: {load['rows_per_sec_without_sketch']:,.0f} rows/s without the sketch, "
+          f"{load['rows_per_sec_with_sketch']:,.0f} rows/s with it")
+    print(f"{'question':<38}{'sketch ms':>11}{'exact ms':>11}{'groups':>8}{'error':>16}")
+    for name, r in results.items():
+        error = f"{r['error_min']:+.1%}..{r['error_max']:+.1%}"
+        print(f"{name:<38}{r['sketch_ms']:>11.2f}{r['exact_ms']:>11.1f}{r['groups']:>8}{error:>16}")
+    results["load"] = load
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeats)
@@ -0,0 +1,110 @@
+# benchmarks/bench_snapshots.py
+"""
+Load time and memory of the cyber_incidents table as a DataFrame: SQLite via
+pd.read_sql_query vs the columnar snapshots (memory-mapped Arrow IPC, Parquet).
+
+    python -m benchmarks.bench_snapshots [--rows 1000000]
+
+Each reader runs in a fresh process so its RSS isn't mixed up with the
+others. RSS counts the mapped Arrow pages that were touched, but those pages
+belong to the OS page cache and are shared between processes reading the same files.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from app.data.db import bulk_load_connection, configure_pool, get_connection
+from app.data.incidents import insert_incidents_many
+from app.data.schema import create_tables
+from app.services.snapshots import read_snapshot, write_snapshots
+
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+CATEGORIES = ["Phishing", "DDoS", "Malware", "Misconfiguration", "Unauthorized Access"]
+STATUSES = ["Resolved", "Open", "Waiting for User", "In Progress", "Closed"]
+READERS = ["sqlite", "arrow", "parquet"]
+
+
+def _fill(rows):
+    rnd = random.Random(42)
+    with bulk_load_connection() as conn:
+        for first in range(0, rows, 50_000):
+            batch = []
+            for i in range(first, min(first + 50_000, rows)):
+                epoch = 1704067200 + rnd.randrange(366 * 86400)
+                batch.append((i, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch)), epoch,
+                              rnd.choice(SEVERITIES), rnd.choice(CATEGORIES), rnd.choice(STATUSES),
+                              f"Incident {i} description"))
+            with conn:
+                insert_incidents_many(conn, batch)
+
+
+def _rss_mb():
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _measure(reader, db_path, root):
+    """Load the table with one reader and time a typical chart aggregation on it."""
+    configure_pool(db_path)
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    if reader == "sqlite":
+        with get_connection() as conn:
+            df = pd.read_sql_query("SELECT * FROM cyber_incidents", conn)
+    else:
+        df = read_snapshot("cyber_incidents", root=root).to_pandas(types_mapper=pd.ArrowDtype)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df["severity"].value_counts()
+    df.loc[df["status"] == "Open", "category"].value_counts()
+    query_seconds = time.perf_counter() - start
+    return {"rows": len(df), "load_s": load_seconds, "query_s": query_seconds, "rss_mb": _rss_mb() - rss_before}
+
+
+def run(rows=1_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        configure_pool(db_path)
+        create_tables()
+        _fill(rows)
+        write_snapshots(["cyber_incidents"], "arrow", Path(tmp) / "arrow")
+        write_snapshots(["cyber_incidents"], "parquet", Path(tmp) / "parquet")
+        configure_pool()
+
+        results = {}
+        for reader in READERS:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_snapshots", "--measure", reader,
+                 "--db", str(db_path), "--root", str(Path(tmp) / reader)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[reader] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"{'reader':<10}{'load (s)':>10}{'query (s)':>11}{'RSS (MB)':>10}")
+    for reader, r in results.items():
+        print(f"{reader:<10}{r['load_s']:>10.3f}{r['query_s']:>11.3f}{r['rss_mb']:>10.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--measure", choices=READERS, help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        print(json.dumps(_measure(args.measure, args.db, args.root)))
+    else:
+        run(args.rows)
@@ -0,0 +1,91 @@
+# benchmarks/bench_streaming.py
+"""
+Peak memory of reading a whole table: get_all_incidents() (one list of
+tuples) vs the streaming iter_incidents() in its different shapes.
+
+    python -m benchmarks.bench_streaming [--rows 2000000] [--batch 10000]
+
+Every mode runs in its own Python process against the same database and
+reports that process's peak RSS (ru_maxrss), so the modes can't inflate
+each other's numbers. "baseline" only imports the app, for reference.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from app.data.db import bulk_load_connection, configure_pool
+from app.data.incidents import get_all_incidents, insert_incidents_many, iter_incidents
+from app.data.schema import create_tables
+
+LOAD_BATCH = 100_000
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+
+# mode -> what the child process does with the table (`batch` = fetchmany size)
+MODES = {
+    "baseline": lambda batch: None,
+    "get_all_incidents": lambda batch: len(get_all_incidents()),
+    "iter_incidents (tuples)": lambda batch: deque(iter_incidents(batch_size=batch), maxlen=0),
+    "iter_incidents (objects)": lambda batch: deque(iter_incidents(batch_size=batch, as_objects=True), maxlen=0),
+    "iter_incidents (2 columns)": lambda batch: deque(iter_incidents(("id", "severity"), batch), maxlen=0),
+    "main.py-style summary": lambda batch: Counter(row.severity for row in iter_incidents(batch_size=batch,
+                                                                                          as_objects=True)),
+}
+
+
+def _fill(rows):
+    with bulk_load_connection() as conn:
+        for first in range(0, rows, LOAD_BATCH):
+            with conn:
+                insert_incidents_many(conn, (
+                    (i, "2024-01-01 00:00:00", 1704067200, SEVERITIES[i % 4], "Malware", "Open",
+                     f"Incident {i} description text of a typical length for this table")
+                    for i in range(first, min(first + LOAD_BATCH, rows))))
+
+
+def _child(mode, db, batch):
+    configure_pool(Path(db))
+    start = time.perf_counter()
+    MODES[mode](batch)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def run(rows=2_000_000, batch=10_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "stream.db"
+        configure_pool(db)
+        create_tables()
+        _fill(rows)
+        configure_pool()
+
+        results = {}
+        for mode in MODES:
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_streaming", "--child", mode,
+                                  "--db", str(db), "--batch", str(batch)],
+                                 capture_output=True, text=True, check=True).stdout
+            results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"{'mode':<30}{'seconds':>9}{'peak RSS (MB)':>15}")
+    for mode, r in results.items():
+        print(f"{mode:<30}{r['seconds']:>9.2f}{r['peak_rss_mb']:>15,.0f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--child", choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.db, args.batch)
+    else:
+        run(args.rows, args.batch)
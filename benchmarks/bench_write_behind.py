@@ -0,0 +1,102 @@
+# benchmarks/bench_write_behind.py
+"""
+Triage throughput: one transaction per status change vs the write-behind queue
+(app/data/write_behind.py), on a cyber_incidents table of --rows rows.
+
+    python -m benchmarks.bench_write_behind [--rows 100000] [--changes 5000]
+
+"spread" changes random incidents; "hot" keeps changing the same 100 incidents,
+so the queue can coalesce them. Each run starts from a copy of the same
+database, and the final table contents of both modes are compared.
+"""
+import argparse
+import hashlib
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.data.db import bulk_load_connection, configure_pool, get_connection
+from app.data.incidents import delete_incident, insert_incidents_many, update_incident_status
+from app.data.schema import create_tables
+from app.data.write_behind import disable_write_behind, enable_write_behind, flush
+
+STATUSES = ["Resolved", "Open", "Waiting for User", "In Progress", "Closed"]
+
+
+def _fill(rows):
+    with bulk_load_connection() as conn, conn:
+        insert_incidents_many(conn, ((i, "2024-01-01 00:00:00", 1704067200, "Low", "Malware", "Open", f"Incident {i}")
+                                     for i in range(rows)))
+
+
+def _changes(rows, count, hot):
+    rnd = random.Random(42)
+    ids = range(100) if hot else range(rows)
+    changes = [("update", rnd.choice(ids), rnd.choice(STATUSES)) for _ in range(count)]
+    changes += [("delete", i, None) for i in rnd.sample(ids, 10)]
+    return changes
+
+
+def _fingerprint():
+    with get_connection() as conn:
+        rows = conn.execute("SELECT incident_id, status FROM cyber_incidents ORDER BY incident_id").fetchall()
+    return hashlib.sha256(repr(rows).encode()).hexdigest()
+
+
+def _apply(changes):
+    for op, incident_id, status in changes:
+        if op == "update":
+            update_incident_status(incident_id, status)
+        else:
+            delete_incident(incident_id)
+
+
+def run(rows=100_000, changes=5000):
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "base.db"
+        configure_pool(base)
+        create_tables()
+        _fill(rows)
+        configure_pool()
+
+        results = {}
+        for workload in ("spread", "hot"):
+            work = _changes(rows, changes, workload == "hot")
+            fingerprints = {}
+            for mode in ("sync", "write_behind"):
+                db = Path(tmp) / f"{workload}-{mode}.db"
+                shutil.copy(base, db)
+                configure_pool(db)
+                queue = enable_write_behind() if mode == "write_behind" else None
+
+                start = time.perf_counter()
+                _apply(work)
+                submitted = time.perf_counter() - start
+                flush()
+                total = time.perf_counter() - start
+
+                results[f"{workload} / {mode}"] = {
+                    "changes_per_sec": len(work) / total,
+                    "call_us": submitted / len(work) * 1e6,
+                    "batches": queue.stats()["batches"] if queue else len(work),
+                }
+                disable_write_behind()
+                fingerprints[mode] = _fingerprint()
+                configure_pool()
+            results[f"{workload} / write_behind"]["same_result"] = fingerprints["sync"] == fingerprints["write_behind"]
+
+    print(f"{'workload / mode':<26}{'changes/s':>12}{'per call (us)':>15}{'commits':>9}{'same result':>13}")
+    for name, r in results.items():
+        same = "" if "same_result" not in r else ("yes" if r["same_result"] else "NO")
+        print(f"{name:<26}{r['changes_per_sec']:>12,.0f}{r['call_us']:>15.1f}{r['batches']:>9}{same:>13}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.rows, args.changes)
@@ -0,0 +1,272 @@
+# benchmarks/suite.py
+"""
+Whole-platform benchmark on synthetic data, with results saved as JSON.
+
+    python -m benchmarks.suite [--size 10k|1m|10m] [--repeats 20] [--out FILE]
+    python -m benchmarks.suite --compare OLD.json NEW.json [--threshold 0.2]
+
+A run generates (or reuses) the data set from benchmarks/synthetic.py, loads
+it into a fresh database and times, in this order:
+    import     migrate_users_from_txt and load_all_csv (full, then unchanged)
+    dashboard  every home.* / search.* query in app/data/query_plans.APP_QUERIES,
+               read into a DataFrame the way home.load_df does (no query cache)
+    crud       every insert / get / update / delete function in app/data/*,
+               and the streaming iter_* reads
+
+Results go to benchmarks/results/<size>-<commit>.json unless --out is given.
+--compare lists every timing that moved by more than the threshold between
+two such files and exits with status 1 if anything got slower.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.data.datasets import (
+    delete_dataset, get_all_datasets, insert_dataset, iter_datasets, update_dataset_rows,
+)
+from app.data.db import configure_pool
+from app.data.frames import read_frame
+from app.data.incidents import (
+    delete_incident, get_all_incidents, insert_incident, iter_incidents, update_incident_status,
+)
+from app.data.query_plans import APP_QUERIES
+from app.data.schema import create_tables
+from app.data.tickets import delete_ticket, get_all_tickets, insert_ticket, iter_tickets, update_ticket_status
+from app.data.users import (
+    delete_user, get_all_users, get_user_by_username, insert_user, iter_users, update_user_password, update_user_role,
+)
+from app.services.csv_loader import load_all_csv
+from app.services.user_service import migrate_users_from_txt
+from benchmarks.synthetic import PASSWORD_HASH, generate, size_rows
+
+RESULTS_DIR = Path("benchmarks/results")
+# get_all_* return every row as Python tuples; above this many rows that no
+# longer fits comfortably in memory, so they are skipped unless asked for
+FULL_READ_MAX_ROWS = 2_000_000
+FULL_READ_REPEATS = 3
+# ids far above the synthetic ones, for rows the CRUD benchmark inserts and deletes again
+NEW_ID = 1_000_000_000
+
+
+def _summary(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "median_ms": statistics.median(ms),
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        "min_ms": ms[0],
+        "repeats": len(ms),
+    }
+
+
+def _time_calls(fn, calls):
+    """Call fn(*args) for every args tuple in `calls`, timing each call."""
+    samples = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+def bench_import(folder):
+    """Time the user import and the CSV load of one synthetic data set."""
+    files = json.loads((folder / "manifest.json").read_text())["files"]
+    results = {}
+
+    start = time.perf_counter()
+    migrate_users_from_txt(str(folder / "users.txt"))
+    seconds = time.perf_counter() - start
+    results["migrate_users_from_txt"] = {"seconds": seconds, "rows": files["users.txt"],
+                                         "rows_per_sec": files["users.txt"] / seconds}
+
+    start = time.perf_counter()
+    tables = load_all_csv(data_dir=str(folder), full=True)
+    results["load_all_csv"] = {"seconds": time.perf_counter() - start,
+                               "tables": {t: {k: v for k, v in s.items() if k != "mode"} for t, s in tables.items()}}
+
+    # second run: every file is unchanged, so this is the cost of a no-op startup
+    start = time.perf_counter()
+    load_all_csv(data_dir=str(folder))
+    results["load_all_csv_unchanged"] = {"seconds": time.perf_counter() - start}
+    return results
+
+
+def bench_dashboard(repeats):
+    """Time the dashboard's queries, including conversion to a DataFrame."""
+    results = {}
+    for name, (sql, params) in APP_QUERIES.items():
+        if name.startswith(("home.", "search.")):
+            results[name] = _time_calls(read_frame, [(sql, params)] * repeats)
+    return results
+
+
+def bench_crud(rows, repeats, full_reads):
+    """
+    Time each CRUD function in app/data on `repeats` calls. Inserts use new ids,
+    which the deletes then remove again; reads and updates hit random existing rows.
+    """
+    rnd = random.Random(7)
+    new_ids = range(NEW_ID, NEW_ID + repeats)
+    # users and datasets are scaled down from `rows` by the generator
+    users, datasets = max(2, rows // 100), max(5, rows // 1000)
+
+    def existing(first, count):
+        return [first + rnd.randrange(count) for _ in new_ids]
+
+    calls = {
+        "users.insert_user": (insert_user, [(f"bench_user{i}", PASSWORD_HASH) for i in new_ids]),
+        "users.get_user_by_username": (get_user_by_username, [(f"user{i}",) for i in existing(0, users)]),
+        "users.update_user_role": (update_user_role, [(f"user{i}", "analyst") for i in existing(0, users)]),
+        "users.update_user_password": (update_user_password,
+                                       [(f"user{i}", PASSWORD_HASH) for i in existing(0, users)]),
+        "users.delete_user": (delete_user, [(f"bench_user{i}",) for i in new_ids]),
+
+        "incidents.insert_incident": (insert_incident, [
+            (i, "2024-06-01 12:00:00", "High", "Malware", "Open", f"Benchmark incident {i}") for i in new_ids]),
+        "incidents.update_incident_status": (update_incident_status, [(i, "Closed") for i in existing(1000, rows)]),
+        "incidents.delete_incident": (delete_incident, [(i,) for i in new_ids]),
+
+        "datasets.insert_dataset": (insert_dataset, [
+            (i, f"Benchmark_{i}", 1000, 10, "data_scientist", "2024-06-01") for i in new_ids]),
+        "datasets.update_dataset_rows": (update_dataset_rows, [(i, 2000) for i in existing(1, datasets)]),
+        "datasets.delete_dataset": (delete_dataset, [(i,) for i in new_ids]),
+
+        "tickets.insert_ticket": (insert_ticket, [
+            (i, "bench", f"Benchmark ticket {i}", "Open", "2024-06-01 12:00:00") for i in new_ids]),
+        "tickets.update_ticket_status": (update_ticket_status, [(i, "Resolved") for i in existing(2000, rows)]),
+        "tickets.delete_ticket": (delete_ticket, [(i,) for i in new_ids]),
+    }
+    results = {name: _time_calls(fn, args) for name, (fn, args) in calls.items()}
+
+    for name, fn in (("users.get_all_users", get_all_users), ("datasets.get_all_datasets", get_all_datasets),
+                     ("incidents.get_all_incidents", get_all_incidents), ("tickets.get_all_tickets", get_all_tickets)):
+        if full_reads or rows <= FULL_READ_MAX_ROWS or name.startswith(("users.", "datasets.")):
+            results[name] = _time_calls(fn, [()] * FULL_READ_REPEATS)
+        else:
+            results[name] = {"skipped": f"more than {FULL_READ_MAX_ROWS:,} rows (use --full-reads)"}
+    # the streaming versions hold one batch at a time, so they always run
+    for name, fn in (("users.iter_users", iter_users), ("datasets.iter_datasets", iter_datasets),
+                     ("incidents.iter_incidents", iter_incidents), ("tickets.iter_tickets", iter_tickets)):
+        results[name] = _time_calls(lambda: deque(fn(), maxlen=0), [()] * FULL_READ_REPEATS)
+    return results
+
+
+def _git(*args):
+    try:
+        out = subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out
+
+
+def _meta(size, rows, seed, repeats):
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "size": str(size),
+        "rows": rows,
+        "seed": seed,
+        "repeats": repeats,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def flatten(results, prefix=""):
+    """{"crud.users.insert_user": ms, ...}: the median (or single run) time of every entry."""
+    flat = {}
+    for name, value in results.items():
+        key = f"{prefix}{name}"
+        if not isinstance(value, dict):
+            continue
+        if "median_ms" in value:
+            flat[key] = value["median_ms"]
+        elif "seconds" in value:
+            flat[key] = value["seconds"] * 1000
+        flat.update(flatten(value, key + "."))
+    return flat
+
+
+def compare(old_path, new_path, threshold=0.2, min_ms=0.5):
+    """
+    Print the timings that changed by more than `threshold` (0.2 = 20%) and
+    by at least `min_ms` between two result files (sub-millisecond timings
+    jitter too much to judge). Returns the names of the ones that got slower.
+    """
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    if old["meta"]["size"] != new["meta"]["size"]:
+        print(f"Warning: comparing different sizes ({old['meta']['size']} vs {new['meta']['size']})")
+    before, after = flatten(old["results"]), flatten(new["results"])
+
+    slower = []
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']} ({new['meta']['size']})")
+    print(f"{'benchmark':<52}{'old (ms)':>12}{'new (ms)':>12}{'change':>9}")
+    for name in sorted(before.keys() & after.keys()):
+        ratio = after[name] / before[name] if before[name] else 1.0
+        if abs(ratio - 1) <= threshold or abs(after[name] - before[name]) < min_ms:
+            continue
+        if ratio > 1:
+            slower.append(name)
+        print(f"{name:<52}{before[name]:>12.2f}{after[name]:>12.2f}{(ratio - 1) * 100:>+8.0f}%")
+    for name in sorted(before.keys() ^ after.keys()):
+        print(f"{name:<52} only in {'old' if name in before else 'new'} results")
+    print(f"✓ {len(slower)} slower, threshold {threshold:.0%}")
+    return slower
+
+
+def run(size="10k", repeats=20, seed=42, full_reads=False, out=None, tmp_dir=None):
+    rows = size_rows(size)
+    folder = generate(size, seed)
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        configure_pool(Path(tmp) / "bench.db")
+        create_tables()
+        results = {"import": bench_import(folder)}
+        print("✓ import timed")
+        results["dashboard"] = bench_dashboard(repeats)
+        print("✓ dashboard queries timed")
+        results["crud"] = bench_crud(rows, repeats, full_reads)
+        print("✓ CRUD functions timed")
+        configure_pool()
+
+    report = {"meta": _meta(size, rows, seed, repeats), "results": results}
+    out = Path(out) if out else RESULTS_DIR / f"{size}-{report['meta']['commit'] or 'unknown'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+
+    print(f"{'benchmark':<52}{'ms':>12}")
+    for name, ms in flatten(results).items():
+        print(f"{name:<52}{ms:>12.2f}")
+    print(f"✓ results written to {out}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="10k", help="10k, 1m, 10m or a row count")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--full-reads", action="store_true",
+                        help=f"also time get_all_* above {FULL_READ_MAX_ROWS:,} rows")
+    parser.add_argument("--out", default=None, help="result file (default: benchmarks/results/<size>-<commit>.json)")
+    parser.add_argument("--tmp", default=None, help="folder for the scratch database (default: system temp)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files instead")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change to report (0.2 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore changes smaller than this")
+    args = parser.parse_args()
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold, args.min_ms) else 0)
+    run(args.size, args.repeats, args.seed, args.full_reads, args.out, args.tmp)
@@ -0,0 +1,159 @@
+# benchmarks/synthetic.py
+"""
+Deterministic synthetic copies of the files in DATA/, at benchmark sizes.
+
+    python -m benchmarks.synthetic [--size 10k|1m|10m] [--seed 42] [--force]
+
+Writes benchmarks/data/<size>/ with the same four files and formats as DATA/
+(cyber_incidents.csv, it_tickets.csv, datasets_metadata.csv, users.txt), so
+the loaders can be pointed at it unchanged. `size` is the number of incident
+and ticket rows; users and datasets are scaled down from it. Values are drawn
+with the frequencies seen in DATA/, and the same size and seed always give
+byte-identical files. A folder that was already generated with the same
+settings is reused.
+"""
+import argparse
+import json
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DATA_DIR = Path("benchmarks/data")
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+# Bump when the generated content changes, so old folders are regenerated
+GENERATOR_VERSION = 1
+# Rows formatted and written at a time
+WRITE_CHUNK_ROWS = 200_000
+
+YEAR_START = 1704067200  # 2024-01-01 00:00:00 UTC
+YEAR_HOURS = 366 * 24
+
+# (value, weight) pairs, weighted like the sample files in DATA/
+SEVERITIES = [("Low", 35), ("Medium", 49), ("High", 26), ("Critical", 5)]
+CATEGORIES = [("Phishing", 62), ("Malware", 22), ("DDoS", 13), ("Misconfiguration", 9), ("Unauthorized Access", 9)]
+INCIDENT_STATUSES = [("Resolved", 41), ("In Progress", 33), ("Open", 22), ("Closed", 19)]
+TICKET_STATUSES = [("Resolved", 89), ("Open", 26), ("In Progress", 22), ("Waiting for User", 13)]
+PRIORITIES = [("Medium", 65), ("Low", 40), ("High", 36), ("Critical", 9)]
+ASSIGNEES = [("IT_Support_A", 55), ("IT_Support_B", 46), ("IT_Support_C", 49)]
+UPLOADERS = [("data_scientist", 3), ("cyber_admin", 1), ("it_admin", 1)]
+
+# Free text, so keyword search has common and rare words to find
+INCIDENT_TEXT = [
+    "suspicious login from unknown host", "phishing email reported by user",
+    "malware detected on endpoint", "firewall blocked outbound traffic",
+    "credential stuffing against web portal", "misconfigured storage bucket exposed",
+    "ddos traffic spike on public server", "unauthorized access to admin panel",
+]
+TICKET_TEXT = [
+    "password reset request", "vpn connection drops", "laptop will not boot",
+    "email not syncing on phone", "printer offline", "access request for shared drive",
+    "software install request", "slow network in office",
+]
+
+# bcrypt hash of "secret123" at cost 12; users.txt holds hashes, not passwords
+PASSWORD_HASH = "$2b$12$2Ov9RVUglJ7A9dBAGXyNTObGwBwXzYkiruJnBDbSJJzESNycCA01e"
+
+
+def size_rows(size):
+    """Rows for a size name ("10k", "1m", "10m") or a plain number."""
+    return SIZES[size] if size in SIZES else int(size)
+
+
+def _pick(rng, choices, n):
+    values, weights = zip(*choices)
+    p = np.array(weights, dtype=float)
+    return np.array(values, dtype=object)[rng.choice(len(values), n, p=p / p.sum())]
+
+
+def _stamps(rng, n, unit="h"):
+    # random whole hours (or days) in 2024, as "YYYY-MM-DD HH:MM:SS" / "YYYY-MM-DD" strings
+    seconds = YEAR_START + rng.integers(0, YEAR_HOURS, n) * 3600
+    stamps = np.datetime_as_string(seconds.astype("datetime64[s]"), unit="D" if unit == "D" else "s")
+    return [s.replace("T", " ") for s in stamps.tolist()]
+
+
+def _write_csv(path, header, rows, make_chunk, seed):
+    """Write `rows` lines with make_chunk(rng, first, n) -> list of lines, chunk by chunk."""
+    rng = np.random.default_rng(seed)
+    with open(path, "w", newline="") as fh:
+        if header:
+            fh.write(header + "\n")
+        for first in range(0, rows, WRITE_CHUNK_ROWS):
+            lines = make_chunk(rng, first, min(WRITE_CHUNK_ROWS, rows - first))
+            fh.write("\n".join(lines) + "\n")
+
+
+def _incidents(rng, first, n):
+    stamps = _stamps(rng, n)
+    severity, category = _pick(rng, SEVERITIES, n), _pick(rng, CATEGORIES, n)
+    status, text = _pick(rng, INCIDENT_STATUSES, n), rng.integers(0, len(INCIDENT_TEXT), n)
+    return [f"{1000 + first + i},{stamps[i]}.000000,{severity[i]},{category[i]},{status[i]},"
+            f"Incident {first + i} {INCIDENT_TEXT[text[i]]}" for i in range(n)]
+
+
+def _tickets(rng, first, n):
+    stamps = _stamps(rng, n)
+    priority, status = _pick(rng, PRIORITIES, n), _pick(rng, TICKET_STATUSES, n)
+    assignee, text = _pick(rng, ASSIGNEES, n), rng.integers(0, len(TICKET_TEXT), n)
+    hours = rng.integers(1, 96, n)
+    return [f"{2000 + first + i},{priority[i]},Ticket {first + i} {TICKET_TEXT[text[i]]},{status[i]},"
+            f"{assignee[i]},{stamps[i]},{hours[i]}" for i in range(n)]
+
+
+def _datasets(rng, first, n):
+    days = _stamps(rng, n, unit="D")
+    uploader = _pick(rng, UPLOADERS, n)
+    rows, columns = rng.integers(1_000, 1_000_000, n), rng.integers(5, 30, n)
+    return [f"{1 + first + i},Dataset_{first + i},{rows[i]},{columns[i]},{uploader[i]},{days[i]}" for i in range(n)]
+
+
+def _users(rng, first, n):
+    return [f"user{first + i},{PASSWORD_HASH}" for i in range(n)]
+
+
+def generate(size="10k", seed=42, root=BENCH_DATA_DIR, force=False):
+    """
+    Write the four synthetic files for `size` into root/<size>/ (skipped if
+    they already exist for the same settings) and return that folder.
+    """
+    rows = size_rows(size)
+    folder = Path(root) / str(size)
+    settings = {"rows": rows, "seed": seed, "version": GENERATOR_VERSION}
+    manifest = folder / "manifest.json"
+    if not force and manifest.exists() and json.loads(manifest.read_text()).get("settings") == settings:
+        print(f"✓ synthetic data for {size} already in {folder}")
+        return folder
+
+    shutil.rmtree(folder, ignore_errors=True)
+    folder.mkdir(parents=True)
+    counts = {
+        "cyber_incidents.csv": rows,
+        "it_tickets.csv": rows,
+        "datasets_metadata.csv": max(5, rows // 1000),
+        "users.txt": max(2, rows // 100),
+    }
+    start = time.perf_counter()
+    # each file gets its own seed, so changing one generator doesn't shift the others
+    _write_csv(folder / "cyber_incidents.csv", "incident_id,timestamp,severity,category,status,description",
+               counts["cyber_incidents.csv"], _incidents, seed)
+    _write_csv(folder / "it_tickets.csv",
+               "ticket_id,priority,description,status,assigned_to,created_at,resolution_time_hours",
+               counts["it_tickets.csv"], _tickets, seed + 1)
+    _write_csv(folder / "datasets_metadata.csv", "dataset_id,name,rows,columns,uploaded_by,upload_date",
+               counts["datasets_metadata.csv"], _datasets, seed + 2)
+    _write_csv(folder / "users.txt", None, counts["users.txt"], _users, seed + 3)
+    manifest.write_text(json.dumps({"settings": settings, "files": counts}, indent=2))
+    print(f"✓ synthetic data for {size} written to {folder} in {time.perf_counter() - start:.1f}s")
+    return folder
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="10k", help="10k, 1m, 10m or a row count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--root", default=str(BENCH_DATA_DIR))
+    parser.add_argument("--force", action="store_true", help="regenerate even if the folder is up to date")
+    args = parser.parse_args()
+    generate(args.size, args.seed, args.root, args.force)
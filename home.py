@@ -1,8 +1,29 @@
+import json
+
 import streamlit as st
 import pandas as pd
-import sqlite3
 import altair as alt
 
+from app.data import metrics
+from app.data.cache import LRUCache, QueryCache
+from app.data.chart_data import downsample_series, fold_other, frame_hash
+from app.data.correlation import (
+    incident_details_query, incident_times_query, ticket_counts, ticket_details_query, ticket_pairs,
+    ticket_times_query, with_details,
+)
+from app.data.db import get_read_connection
+from app.data.frames import read_frame
+from app.data.metrics import timed
+from app.data.partitions import ALL_VIEW
+from app.data.replica import replica_status
+from app.data.queries import count_by, count_over_time, count_rows, page_cursor, select_page
+from app.data.search import MAX_RANKED_MATCHES, count_matches, match_expression, search_cursor, search_page
+from app.data.sla import percentile_column, percentiles_from_sketch, percentiles_from_tickets, sketch_query
+from app.services.snapshots import (
+    SNAPSHOT_OF, SNAPSHOT_TABLES, has_snapshot, read_manifest, read_snapshot, snapshot_schema, snapshot_time_column,
+)
+from app.services.user_service import authenticate
+
 # -----------------------------------------
 # Streamlit page settings (title + layout)
 # -----------------------------------------
@@ -26,6 +47,8 @@ VALID_PASSWORD = "admin123"
 # st.session_state lets us "remember" things like whether the user has logged in.
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
+    st.session_state.username = None
+    st.session_state.role = None
 
 
 # -----------------------------------------
@@ -40,11 +63,20 @@ def login_page():
     username = st.text_input("Username")
     password = st.text_input("Password", type="password")
 
-    # When button is clicked it validates the credentials of the user
+    # When button is clicked it validates the credentials of the user.
+    # Accounts from the users table are checked by the auth service (bcrypt runs on a
+    # small thread pool and recent successful logins are cached for a minute).
     if st.button("Login"):
         if username == VALID_USERNAME and password == VALID_PASSWORD:
-            # If correct -> set logged_in flag to True and refresh the app
+            role = "admin"
+        else:
+            role = authenticate(username, password)
+
+        if role is not None:
+            # If correct -> remember who logged in and refresh the app
             st.session_state.logged_in = True
+            st.session_state.username = username
+            st.session_state.role = role
             st.rerun()
         else:
             # If incorrect -> show error message
@@ -60,37 +92,240 @@ if not st.session_state.logged_in:
 # -----------------------------------------
 # DB HELPERS
 # -----------------------------------------
-# This is the path to your SQLite database file.
-# IMPORTANT: it’s a relative path which means it can run streamlit from the project root folder.
-DB_PATH = "app/data/intelligence_platform.db"
+# The database file and connection settings live in app/data/db.py.
+# get_read_connection() hands out one long-lived connection per thread from a shared pool,
+# so a Streamlit rerun doesn't pay for opening and closing the SQLite file every time.
+# With APP_READ_REPLICA=1 it reads a copy of the database that is refreshed every 30s
+# (app/data/replica.py), so big dashboard queries never make the CSV loader wait.
+
+# Query results are cached because Streamlit re-runs this whole script on every click.
+# The cache notices when a table changes (every insert/update/delete bumps a counter),
+# so it never shows stale data. Entries also expire after QUERY_CACHE_TTL seconds.
+QUERY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+QUERY_CACHE_TTL = 300
+
+# Finished chart specs (the Vega-Lite JSON sent to the browser) are cached too, keyed by
+# a hash of the chart's data, so an unchanged chart isn't rebuilt on every rerun.
+CHART_CACHE_MAX_BYTES = 32 * 1024 * 1024
+CHART_CACHE_TTL = 3600
 
+# Functions marked @timed(...) record how long they take (and how many rows they return)
+# while metrics are switched on. Admins see the numbers on the Diagnostics page.
 
-def get_conn():
+
+@st.cache_resource
+def get_query_cache() -> QueryCache:
     """
-    Opens a connection to the SQLite database.
-    We wrap this in a function so it’s easy to reuse.
+    One cache shared by every browser session (st.cache_resource keeps the object alive
+    between reruns). Entry size is measured with DataFrame.memory_usage so the cache
+    stays within QUERY_CACHE_MAX_BYTES.
     """
-    return sqlite3.connect(DB_PATH)
+    return QueryCache(
+        max_bytes=QUERY_CACHE_MAX_BYTES,
+        ttl=QUERY_CACHE_TTL,
+        sizeof=lambda df: int(df.memory_usage(deep=True).sum()),
+        connect=get_read_connection,  # table versions come from the same copy as the rows
+    )
+
 
+@st.cache_resource
+def get_chart_cache() -> LRUCache:
+    """Chart specs shared by every browser session, sized by the length of their JSON."""
+    return LRUCache(max_bytes=CHART_CACHE_MAX_BYTES, ttl=CHART_CACHE_TTL, sizeof=len)
 
-def load_df(query: str) -> pd.DataFrame:
+
+@timed("home.load_df", detail=lambda query, params=(): " ".join(query.split()))
+def load_df(query: str, params=()) -> pd.DataFrame:
     """
     Runs a SQL query and returns the results as a Pandas DataFrame.
-    We also make sure the DB connection always closes (finally block).
+    `params` fills in the ? placeholders (the query builders in app/data/queries.py return both).
+    Columns like severity / status come back as compact Categoricals (see app/data/frames.py).
+    Results come from the query cache when the tables haven't changed,
+    so treat the returned DataFrame as read-only (use .copy() before changing it).
+    """
+    def run_query():
+        with get_read_connection() as conn:
+            return read_frame(query, params, conn)
+
+    return get_query_cache().get_or_load(query, params, run_query)
+
+
+def load_daily(query: str, params=()) -> pd.DataFrame:
+    """
+    Loads a per-day (or per-hour) count (date | count) computed by SQLite.
+    SQLite returns each date as epoch seconds, so turning it into a datetime
+    for the line chart is plain number conversion (no string parsing).
+    """
+    daily = load_df(query, params).copy()
+    daily["date"] = pd.to_datetime(daily["date"], unit="s")
+    return daily
+
+
+# -----------------------------------------
+# Analytics mode (columnar snapshots)
+# -----------------------------------------
+# `python -m app.services.snapshots` writes Arrow files of the incidents, tickets and
+# datasets tables (DATA/snapshots). In analytics mode the charts are computed from
+# those files instead of SQLite. The files are memory-mapped, so pandas uses the
+# columns straight from them instead of building a Python object for every cell.
+# The paged tables and search always read SQLite, which has the newest rows.
+# Queries on the incident view are answered from the cyber_incidents snapshot (SNAPSHOT_OF).
+def analytics_mode() -> bool:
+    return st.session_state.get("analytics_mode", False)
+
+
+def use_snapshot(table: str, columns=()) -> bool:
+    """True when analytics mode is on and `table` has a snapshot with `columns` (else read SQLite)."""
+    table = SNAPSHOT_OF.get(table, table)
+    return analytics_mode() and table in SNAPSHOT_TABLES and has_snapshot(table, columns)
+
+
+@timed("home.load_snapshot_df")
+def load_snapshot_df(table: str, columns: list, filters=None) -> pd.DataFrame:
     """
-    conn = get_conn()
-    try:
-        return pd.read_sql_query(query, conn)
-    finally:
-        conn.close()
+    The load_df alternative for analytics mode: only `columns` of the latest snapshot
+    of `table`, as an Arrow-backed DataFrame that shares memory with the mapped files.
+    `filters` works like in the query builders ({"status": "Open"}, "All" = no filter).
+    """
+    table = SNAPSHOT_OF.get(table, table)
+    data = read_snapshot(table, columns, filters)
+    if data is None:  # the table's folder is gone: no rows rather than a crash
+        data = snapshot_schema(table).empty_table().select(columns)
+    return data.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def load_counts(table: str, column: str, filters=None) -> pd.DataFrame:
+    """Rows per value of `column` (column | count, biggest first), for the pie charts."""
+    if not use_snapshot(table, [column, *(filters or {})]):
+        return load_df(*count_by(table, column, filters))
+    counts = load_snapshot_df(table, [column], filters)[column].value_counts(dropna=False)
+    counts = counts.rename_axis(column).reset_index()
+    counts[column] = counts[column].astype(object).fillna("Unknown")
+    counts["count"] = counts["count"].astype("int64")
+    return counts
+
+
+def load_over_time(table: str, time_column: str, filters=None, grain: str = "daily") -> pd.DataFrame:
+    """Rows per day or hour (date | count) of `time_column`, for the line charts."""
+    snapshot = SNAPSHOT_OF.get(table, table)
+    if not (snapshot in SNAPSHOT_TABLES
+            and use_snapshot(table, [snapshot_time_column(snapshot, time_column), *(filters or {})])):
+        return load_daily(*count_over_time(table, time_column, filters, grain))
+    stamps = load_snapshot_df(table, [snapshot_time_column(snapshot, time_column)], filters).iloc[:, 0]
+    counts = stamps.dropna().dt.floor("D" if grain == "daily" else "h").value_counts().sort_index()
+    return pd.DataFrame({
+        "date": counts.index.astype("datetime64[s]"),
+        "count": counts.to_numpy(dtype="int64"),
+    })
+
+
+# Day / Hour choices for the "Over Time" charts -> rollup grain in app/data/rollups.py
+GRAIN_OPTIONS = {"Day": "daily", "Hour": "hourly"}
+
+
+def choose_grain(key: str) -> str:
+    """Small radio that lets the user switch a time chart between days and hours."""
+    label = st.radio("Group by", list(GRAIN_OPTIONS), horizontal=True, key=key)
+    return GRAIN_OPTIONS[label]
+
+
+# -----------------------------------------
+# Paginated tables
+# -----------------------------------------
+# Sending a whole table to st.dataframe gets very slow once a table has hundreds of
+# thousands of rows, so only one page is fetched from SQLite and sent to the browser.
+# Pages use "keyset" pagination: we remember the last row of every page we've shown
+# (in st.session_state) and ask SQLite for the rows that come after it.
+PAGE_SIZE_OPTIONS = [25, 50, 100, 250, 500]
+
+
+def _page_state(key: str, signature) -> dict:
+    """Remembered page cursors for one table; starts again from page 1 when `signature` changes."""
+    state = st.session_state.setdefault(f"{key}_pages", {"signature": signature, "cursors": [None]})
+    if state["signature"] != signature:
+        state["signature"], state["cursors"] = signature, [None]
+    return state
+
+
+def _show_page(page: pd.DataFrame, state: dict, key: str, total: int, page_size: int, make_cursor):
+    """Draws one page plus the Previous / Next buttons. `make_cursor(last_row)` builds the next cursor."""
+    # *_epoch columns are the machine-readable copy of a timestamp, only needed for sorting
+    st.dataframe(page[[c for c in page.columns if not c.endswith("_epoch")]], use_container_width=True)
+
+    page_number = len(state["cursors"])
+    last_page = max(1, -(-total // page_size))  # ceiling division
+    prev_col, info_col, next_col = st.columns([1, 3, 1])
+    info_col.caption(f"Page {page_number} of {last_page} ({total:,} rows)")
+    if prev_col.button("Previous", key=f"{key}_prev", disabled=page_number == 1):
+        state["cursors"].pop()
+        st.rerun()
+    if next_col.button("Next", key=f"{key}_next", disabled=page_number >= last_page or page.empty):
+        state["cursors"].append(make_cursor(page.iloc[-1]))
+        st.rerun()
+
+
+def paged_table(table: str, columns: list, filters=None, key: str = "table"):
+    """
+    Shows one page of `table` with page size / sort controls and Previous / Next buttons.
+    `key` must be unique per table on the page (it namespaces the widgets and session state).
+    """
+    colA, colB, colC = st.columns(3)
+    page_size = colA.selectbox("Rows per page", PAGE_SIZE_OPTIONS, index=1, key=f"{key}_size")
+    sort_column = colB.selectbox("Sort by", columns, key=f"{key}_sort")
+    descending = colC.checkbox("Descending", key=f"{key}_desc")
+
+    # Start again from page 1 whenever the filters or sorting change
+    signature = (tuple(sorted((filters or {}).items())), page_size, sort_column, descending)
+    state = _page_state(key, signature)
+
+    total = int(load_df(*count_rows(table, filters))["count"].iloc[0])
+    page = load_df(*select_page(table, filters, sort_column, descending, page_size, state["cursors"][-1]))
+    _show_page(page, state, key, total, page_size, lambda row: page_cursor(table, row, sort_column))
 
 
+# -----------------------------------------
+# Keyword search
+# -----------------------------------------
+# Searching goes through SQLite's full-text index (app/data/search.py) instead of
+# loading every row and filtering text in pandas. Results come best match first.
+SEARCH_HELP = "All words must appear. End a word with * to match its start, e.g. phish*"
+
+
+def search_table(table: str, text: str, filters=None, key: str = "search"):
+    """Like paged_table, but shows the rows matching `text` (ranked, lower score = better match)."""
+    page_size = st.selectbox("Rows per page", PAGE_SIZE_OPTIONS, index=1, key=f"{key}_size")
+    signature = (text, tuple(sorted((filters or {}).items())), page_size)
+    state = _page_state(key, signature)
+
+    total = int(load_df(*count_matches(table, text, filters))["count"].iloc[0])
+    if total == 0:
+        st.info(f"No matches for \"{text}\" (after filtering).")
+        return
+    # Ranking scores every match, so very broad searches are listed newest first instead
+    ranked = total <= MAX_RANKED_MATCHES
+    if not ranked:
+        st.caption("Too many matches to rank, showing the newest first. Add words to narrow the search.")
+    page = load_df(*search_page(table, text, filters, page_size, state["cursors"][-1], ranked))
+    _show_page(page, state, key, total, page_size, lambda row: search_cursor(table, row))
+
 # -----------------------------------------
 # Chart helper functions (Altair)
 # -----------------------------------------
 # NOTE: We use Altair here because it usually works out of the box with Streamlit.
 # I previously hit errors using matplotlib/plotly because they weren’t installed / configured.
 # Altair is lightweight and integrates well with st.altair_chart().
+def show_chart(kind: str, data: pd.DataFrame, build, *options):
+    """
+    Draws the Altair chart `build(data)` returns. The finished spec is cached under `kind`,
+    `options` (title, column names, ...) and a hash of `data`, so when a rerun draws the
+    same chart from the same numbers, the spec is reused instead of built again.
+    """
+    key = (kind, *options, frame_hash(data))
+    spec = get_chart_cache().lookup(key, lambda: build(data).to_json())
+    st.vega_lite_chart(json.loads(spec), use_container_width=True)
+
+
+@timed("home.pie_chart")
 def pie_chart(count_df: pd.DataFrame, label_col: str, value_col: str, title: str):
     """
     Builds a pie chart from a "count_df" DataFrame that looks like:
@@ -98,21 +333,25 @@ def pie_chart(count_df: pd.DataFrame, label_col: str, value_col: str, title: str
     ---------------------
     A         | 10
     B         | 5
+    Only the biggest slices are drawn; the small ones are added up into one "Other" slice.
     """
-    # Altair pie chart
-    chart = (
-        alt.Chart(count_df)
-        .mark_arc()
-        .encode(
-            theta=alt.Theta(field=value_col, type="quantitative"),
-            color=alt.Color(field=label_col, type="nominal"),
-            tooltip=[label_col, value_col],
+    def build(df: pd.DataFrame) -> alt.Chart:
+        # Altair pie chart
+        return (
+            alt.Chart(fold_other(df, label_col, value_col))
+            .mark_arc()
+            .encode(
+                theta=alt.Theta(field=value_col, type="quantitative"),
+                color=alt.Color(field=label_col, type="nominal"),
+                tooltip=[label_col, value_col],
+            )
+            .properties(title=title, height=320)
         )
-        .properties(title=title, height=320)
-    )
-    st.altair_chart(chart, use_container_width=True)
+
+    show_chart("pie", count_df, build, label_col, value_col, title)
 
 
+@timed("home.line_chart")
 def line_chart(time_df: pd.DataFrame, time_col: str, value_col: str, title: str):
     """
     Builds a line chart from a DataFrame with a datetime column and a numeric column.
@@ -121,26 +360,69 @@ def line_chart(time_df: pd.DataFrame, time_col: str, value_col: str, title: str)
     ------------------
     2024-01-01 | 2
     2024-01-02 | 5
+    Long series are thinned out to about one point per two pixels of chart width
+    (keeping the peaks and dips, see app/data/chart_data.py) before they are drawn.
     """
-    chart = (
-        alt.Chart(time_df)
-        .mark_line(point=True)
-        .encode(
-            x=alt.X(time_col + ":T", title="Date"),
-            y=alt.Y(value_col + ":Q", title="Count"),
-            tooltip=[time_col, value_col],
+    def build(df: pd.DataFrame) -> alt.Chart:
+        return (
+            alt.Chart(downsample_series(df, time_col, value_col))
+            .mark_line(point=True)
+            .encode(
+                x=alt.X(time_col + ":T", title="Date"),
+                y=alt.Y(value_col + ":Q", title="Count"),
+                tooltip=[time_col, value_col],
+            )
+            .properties(title=title, height=320)
         )
-        .properties(title=title, height=320)
-    )
-    st.altair_chart(chart, use_container_width=True)
+
+    show_chart("line", time_df, build, time_col, value_col, title)
+
+
+@timed("home.percentile_chart")
+def percentile_chart(weekly: pd.DataFrame, columns: list, title: str):
+    """
+    One line per percentile column over the weeks, from a DataFrame like:
+    week       | p50_hours | p90_hours
+    ----------------------------------
+    2024-01-01 | 20.7      | 64.0
+    """
+    def build(df: pd.DataFrame) -> alt.Chart:
+        long = df.melt(id_vars="week", value_vars=columns, var_name="percentile", value_name="hours")
+        return (
+            alt.Chart(long)
+            .mark_line(point=True)
+            .encode(
+                x=alt.X("week:T", title="Week"),
+                y=alt.Y("hours:Q", title="Resolution time (hours)"),
+                color=alt.Color("percentile:N", title="Percentile"),
+                tooltip=["week", "percentile", "hours"],
+            )
+            .properties(title=title, height=320)
+        )
+
+    show_chart("percentiles", weekly, build, tuple(columns), title)
+
+
+# -----------------------------------------
+# Ticket SLA percentiles
+# -----------------------------------------
+# Resolution-time percentiles are read from a small histogram table that SQLite keeps
+# up to date as tickets are loaded or changed (app/data/sla.py), so asking for
+# "p95 of High priority tickets last quarter" never re-reads the tickets themselves.
+# Ticket columns the SLA page needs from the snapshot in analytics mode
+SLA_SNAPSHOT_COLUMNS = ["created_epoch", "priority", "assigned_to", "resolution_hours"]
 
 
-def safe_to_datetime(series: pd.Series) -> pd.Series:
+def load_sla(group_by: tuple, filters=None, after=None, before=None, percentiles=(0.5, 0.9, 0.99)) -> pd.DataFrame:
     """
-    Converts a column to datetime safely.
-    errors="coerce" means invalid dates become NaT (so they can be dropped).
+    Percentiles (hours) of ticket resolution time per `group_by` group (week / priority / assigned_to).
+    Read from the SLA sketch, or computed exactly from the tickets snapshot in analytics mode.
     """
-    return pd.to_datetime(series, errors="coerce")
+    if use_snapshot("it_tickets", SLA_SNAPSHOT_COLUMNS):
+        tickets = load_snapshot_df("it_tickets", SLA_SNAPSHOT_COLUMNS)
+        return percentiles_from_tickets(tickets, group_by, percentiles, filters, after, before)
+    sketch = load_df(*sketch_query(group_by, filters, after, before))
+    return percentiles_from_sketch(sketch, group_by, percentiles)
 
 
 # -----------------------------------------
@@ -150,7 +432,44 @@ st.title("Cyber Intelligence Dashboard")
 st.caption("Streamlit dashboard pulling data from SQLite")
 
 # Sidebar navigation: lets the user switch between different datasets/pages.
-page = st.sidebar.selectbox("Navigation", ["Users", "Cyber Incidents", "Datasets", "Tickets"])
+# The Diagnostics page (timings of the app itself) is only offered to admins.
+pages = ["Users", "Cyber Incidents", "Datasets", "Tickets", "Tickets SLA"]
+if st.session_state.role == "admin":
+    pages.append("Diagnostics")
+page = st.sidebar.selectbox("Navigation", pages)
+
+
+# Analytics mode switch (only offered once snapshots have been written)
+snapshot_manifest = read_manifest()
+if snapshot_manifest:
+    st.sidebar.toggle(
+        "Analytics mode",
+        key="analytics_mode",
+        help="Draw the charts from the columnar snapshots (python -m app.services.snapshots) instead of SQLite.",
+    )
+    if analytics_mode():
+        written = min(info["written_at"] for info in snapshot_manifest["tables"].values())
+        st.sidebar.caption(f"Charts use snapshots written at {written} (UTC).")
+
+# Read replica note (only when the dashboard reads from a copy of the database)
+replica = replica_status()
+if replica["refreshed_at"]:
+    st.sidebar.caption(f"Reading a copy of the database made at {replica['refreshed_at']} (UTC).")
+if replica["error"]:
+    st.sidebar.warning(f"The database copy could not be refreshed at {replica['failed_at']} (UTC), "
+                       f"so the data shown may be out of date: {replica['error']}")
+
+
+def show_cache_stats():
+    """Small sidebar panel showing how well the query cache is doing."""
+    stats = get_query_cache().stats()
+    st.sidebar.subheader("Query Cache")
+    st.sidebar.caption(
+        f"{stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)  \n"
+        f"{stats['entries']} entries, {stats['bytes'] / 1024 / 1024:.1f} MB, {stats['evictions']} evicted"
+    )
+    charts = get_chart_cache().stats()
+    st.sidebar.caption(f"Chart specs: {charts['hits']} reused / {charts['misses']} built ({charts['entries']} cached)")
 
 
 # =========================================================
@@ -159,35 +478,33 @@ page = st.sidebar.selectbox("Navigation", ["Users", "Cyber Incidents", "Datasets
 if page == "Users":
     st.header("Users Table")
 
-    # Loads in full users table into a DataFrame
-    df = load_df("SELECT * FROM users;")
-    st.dataframe(df, use_container_width=True)
+    # Shows the users table one page at a time
+    paged_table("users", ["id", "username", "role"], key="users")
 
-    # Pie chart: how many users are in each role
+    # Pie chart: how many users are in each role (counted by SQLite with GROUP BY)
     st.subheader("Users by Role (Pie)")
-    if "role" in df.columns and not df.empty:
-        role_count = df["role"].fillna("Unknown").value_counts().reset_index()
-        role_count.columns = ["role", "count"]
+    role_count = load_counts("users", "role")
+    if not role_count.empty:
         pie_chart(role_count, "role", "count", "Users by Role")
     else:
-        st.info("No 'role' column found (or table is empty), so no pie chart.")
+        st.info("The users table is empty, so no pie chart.")
 
     # Line chart: users over time
     # NOTE: users table doesn’t have a real created_date, so this creates a fake / proxy timeline to make the line chart possible.
     st.subheader("Cumulative Users (Line)")
-    if "id" in df.columns and not df.empty:
-        tmp = df[["id"]].copy()
-        tmp["id"] = pd.to_numeric(tmp["id"], errors="coerce")
-        tmp = tmp.dropna().sort_values("id")
-
-        # Fake a cumulative line by id order (since there’s no created_date for users)
-        tmp["date"] = pd.date_range("2024-01-01", periods=len(tmp), freq="D")
-        tmp["count"] = range(1, len(tmp) + 1)
-
-        line_chart(tmp[["date", "count"]], "date", "count", "Cumulative Users (proxy)")
+    user_total = int(load_df(*count_rows("users"))["count"].iloc[0])
+    if user_total:
+        # Fake a cumulative line by id order (since there’s no created_date for users),
+        # which only needs the number of users, not the users themselves
+        tmp = pd.DataFrame({
+            "date": pd.date_range("2024-01-01", periods=user_total, freq="D"),
+            "count": range(1, user_total + 1),
+        })
+
+        line_chart(tmp, "date", "count", "Cumulative Users (proxy)")
         st.caption("Note: users table has no created_date, so this is a simple proxy trend.")
     else:
-        st.info("No 'id' column found (or table is empty), so no line chart.")
+        st.info("The users table is empty, so no line chart.")
 
 
 # =========================================================
@@ -196,8 +513,16 @@ if page == "Users":
 elif page == "Cyber Incidents":
     st.header("Cyber Incidents")
 
-    # Loads the incidents table
-    df = load_df("SELECT * FROM cyber_incidents;")
+    # Older months are moved into partition tables by `python -m app.data.partitions`; this
+    # page reads them all through the cyber_incidents_all view. Only compressed months
+    # (past the retention window) are left out, so say so when there are any.
+    archived = load_df("SELECT COUNT(*) AS months, SUM(rows) AS incidents FROM incident_partitions "
+                       "WHERE state = 'compressed'")
+    if int(archived["months"].iloc[0]):
+        st.caption(
+            f"{int(archived['incidents'].iloc[0]):,} older incidents in {int(archived['months'].iloc[0])} compressed "
+            "months are not included below (see app/data/partitions.py)."
+        )
 
     # Filters (dropdowns) so user can narrow down results
     st.subheader("Filters")
@@ -211,42 +536,71 @@ elif page == "Cyber Incidents":
     category = colB.selectbox("Category", cat_options)
     status = colC.selectbox("Status", status_options)
 
-    # Apply filters to a copy of the dataframe (so we don’t modify original df)
-    f = df.copy()
-    if severity != "All" and "severity" in f.columns:
-        f = f[f["severity"] == severity]
-    if category != "All" and "category" in f.columns:
-        f = f[f["category"] == category]
-    if status != "All" and "status" in f.columns:
-        f = f[f["status"] == status]
+    # The selections become a parameterized WHERE clause, so SQLite does the filtering
+    # and only matching rows (or just the counts, for the charts) come back.
+    filters = {"severity": severity, "category": category, "status": status}
+
+    # Keyword search over the descriptions (uses the same filters)
+    search_text = st.text_input("Search descriptions", key="incidents_search", help=SEARCH_HELP)
 
-    # Show filtered table
-    st.dataframe(f, use_container_width=True)
+    # Show filtered table (one page at a time), or the search results if something was typed
+    if match_expression(search_text):
+        search_table(ALL_VIEW, search_text, filters, key="incidents_found")
+    else:
+        paged_table(
+            ALL_VIEW,
+            ["id", "incident_id", "timestamp", "severity", "category", "status"],
+            filters,
+            key="incidents",
+        )
 
     # Pie chart: severity distribution after filtering
     st.subheader("Severity Distribution (Pie)")
-    if "severity" in f.columns and not f.empty:
-        sev_count = f["severity"].fillna("Unknown").value_counts().reset_index()
-        sev_count.columns = ["severity", "count"]
+    sev_count = load_counts(ALL_VIEW, "severity", filters)
+    if not sev_count.empty:
         pie_chart(sev_count, "severity", "count", "Incident Severity Breakdown")
     else:
         st.info("No data for severity pie chart (after filtering).")
 
-    # Line chart: incidents over time (grouped per day)
+    # Line chart: incidents over time (read from the pre-counted daily / hourly rollups)
     st.subheader("Incidents Over Time (Line)")
-    if "timestamp" in f.columns and not f.empty:
-        tmp = f.copy()
-        tmp["timestamp"] = safe_to_datetime(tmp["timestamp"])
-        tmp = tmp.dropna(subset=["timestamp"])
-        if tmp.empty:
-            st.info("No valid timestamps to chart.")
-        else:
-            tmp["date"] = tmp["timestamp"].dt.date
-            daily = tmp.groupby("date").size().reset_index(name="count")
-            daily["date"] = pd.to_datetime(daily["date"])
-            line_chart(daily, "date", "count", "Incidents per Day")
+    grain = choose_grain("incidents_grain")
+    daily = load_over_time(ALL_VIEW, "timestamp", filters, grain)
+    if daily.empty:
+        st.info("No valid timestamps to chart (after filtering).")
     else:
-        st.info("No 'timestamp' column found (or no data after filtering).")
+        line_chart(daily, "date", "count", "Incidents per Day" if grain == "daily" else "Incidents per Hour")
+
+    # Related tickets: which IT tickets were opened within N hours after these incidents.
+    # Both lists are read sorted by time and matched with binary searches
+    # (app/data/correlation.py) instead of comparing every incident with every ticket.
+    # It reads every matching incident and ticket, so it only runs when switched on,
+    # and only ids and times are read for the match: the text columns are read
+    # for the rows shown.
+    st.subheader("Tickets Opened After These Incidents")
+    if st.toggle("Match incidents with tickets", key="correlation_on"):
+        window = st.slider("Hours after the incident", min_value=1, max_value=168, value=24, key="correlation_hours")
+        incident_times = load_df(*incident_times_query(filters))
+        ticket_times = load_df(*ticket_times_query())
+        related = ticket_counts(incident_times, ticket_times, window)
+
+        colA, colB, colC = st.columns(3)
+        colA.metric("Incidents", f"{len(related):,}")
+        colB.metric("With a ticket in the window", f"{int((related['tickets'] > 0).sum()):,}")
+        colC.metric("Incident / ticket pairs", f"{int(related['tickets'].sum()):,}")
+
+        if related["tickets"].sum() == 0:
+            st.info(f"No tickets were opened within {window} hours after these incidents.")
+        else:
+            st.caption("Incidents followed by the most tickets")
+            busiest = related.nlargest(20, "tickets")[["incident_id", "tickets"]]
+            busiest = with_details(busiest, load_df(*incident_details_query(busiest["incident_id"])))
+            st.dataframe(busiest, use_container_width=True, hide_index=True)
+            st.caption("Matched pairs (oldest incidents first, up to 200)")
+            pairs = ticket_pairs(incident_times, ticket_times, window, limit=200)
+            pairs = with_details(pairs, load_df(*incident_details_query(pairs["incident_id"])),
+                                 load_df(*ticket_details_query(pairs["ticket_id"])))
+            st.dataframe(pairs, use_container_width=True, hide_index=True)
 
 
 # =========================================================
@@ -255,34 +609,28 @@ elif page == "Cyber Incidents":
 elif page == "Datasets":
     st.header("Datasets Metadata")
 
-    # Loads the datasets table
-    df = load_df("SELECT * FROM datasets_metadata;")
-    st.dataframe(df, use_container_width=True)
+    # Shows the datasets table
+    paged_table(
+        "datasets_metadata",
+        ["dataset_id", "name", "rows", "columns", "uploaded_by", "upload_date"],
+        key="datasets",
+    )
 
     # Pie chart: datasets uploaded by which user
     st.subheader("Uploads by User (Pie)")
-    if "uploaded_by" in df.columns and not df.empty:
-        uploader_count = df["uploaded_by"].fillna("Unknown").value_counts().reset_index()
-        uploader_count.columns = ["uploaded_by", "count"]
+    uploader_count = load_counts("datasets_metadata", "uploaded_by")
+    if not uploader_count.empty:
         pie_chart(uploader_count, "uploaded_by", "count", "Datasets Uploaded by User")
     else:
-        st.info("No 'uploaded_by' column found (or table is empty).")
+        st.info("The datasets table is empty.")
 
     # Line chart: uploads over time (grouped per day)
     st.subheader("Uploads Over Time (Line)")
-    if "upload_date" in df.columns and not df.empty:
-        tmp = df.copy()
-        tmp["upload_date"] = safe_to_datetime(tmp["upload_date"])
-        tmp = tmp.dropna(subset=["upload_date"])
-        if tmp.empty:
-            st.info("No valid upload_date values to chart.")
-        else:
-            tmp["date"] = tmp["upload_date"].dt.date
-            daily = tmp.groupby("date").size().reset_index(name="count")
-            daily["date"] = pd.to_datetime(daily["date"])
-            line_chart(daily, "date", "count", "Dataset Uploads per Day")
+    daily = load_over_time("datasets_metadata", "upload_date")
+    if daily.empty:
+        st.info("No valid upload_date values to chart.")
     else:
-        st.info("No 'upload_date' column found (or table is empty).")
+        line_chart(daily, "date", "count", "Dataset Uploads per Day")
 
 
 # =========================================================
@@ -291,44 +639,139 @@ elif page == "Datasets":
 elif page == "Tickets":
     st.header("IT Tickets")
 
-    # Loads the tickets table
-    df = load_df("SELECT * FROM it_tickets;")
-
     # Status filter dropdown (matches your coursework requirement)
     st.subheader("Filter by Status")
     ticket_status_options = ["All", "Resolved", "Open", "Waiting for User", "In Progress"]
     ticket_status = st.selectbox("Ticket Status", ticket_status_options)
+    filters = {"status": ticket_status}
 
-    # Apply ticket status filter
-    f = df.copy()
-    if ticket_status != "All" and "status" in f.columns:
-        f = f[f["status"] == ticket_status]
+    # Keyword search over the ticket issues (uses the same status filter)
+    search_text = st.text_input("Search issues", key="tickets_search", help=SEARCH_HELP)
 
-    # Show filtered tickets table
-    st.dataframe(f, use_container_width=True)
+    # Show filtered tickets table (filtered by SQLite, one page at a time), or the search results
+    if match_expression(search_text):
+        search_table("it_tickets", search_text, filters, key="tickets_found")
+    else:
+        paged_table("it_tickets", ["id", "ticket_id", "status", "created_date"], filters, key="tickets")
 
     # Pie chart: ticket status breakdown
     st.subheader("Ticket Status Breakdown (Pie)")
-    if "status" in f.columns and not f.empty:
-        status_count = f["status"].fillna("Unknown").value_counts().reset_index()
-        status_count.columns = ["status", "count"]
+    status_count = load_counts("it_tickets", "status", filters)
+    if not status_count.empty:
         pie_chart(status_count, "status", "count", "Ticket Status Breakdown")
     else:
         st.info("No data for ticket status pie chart (after filtering).")
 
-    # Line chart: tickets created over time
-    # NOTE: This requires a real created_date column in your it_tickets table.
+    # Line chart: tickets created over time (read from the daily / hourly rollups)
     st.subheader("Tickets Over Time (Line)")
-    if "created_date" in f.columns and not f.empty:
-        tmp = f.copy()
-        tmp["created_date"] = safe_to_datetime(tmp["created_date"])
-        tmp = tmp.dropna(subset=["created_date"])
-        if tmp.empty:
-            st.info("created_date exists, but none of the values are valid dates.")
-        else:
-            tmp["date"] = tmp["created_date"].dt.date
-            daily = tmp.groupby("date").size().reset_index(name="count")
-            daily["date"] = pd.to_datetime(daily["date"])
-            line_chart(daily, "date", "count", "Tickets Created per Day")
+    grain = choose_grain("tickets_grain")
+    daily = load_over_time("it_tickets", "created_date", filters, grain)
+    if daily.empty:
+        st.warning("No valid created_date values in it_tickets (after filtering), so no time chart.")
     else:
-        st.warning("No 'created_date' column found in it_tickets (or no data). Add it to enable time charts.")
\ No newline at end of file
+        line_chart(daily, "date", "count", "Tickets Created per Day" if grain == "daily" else "Tickets Created per Hour")
+
+
+# =========================================================
+# PAGE 5: TICKETS SLA
+# =========================================================
+elif page == "Tickets SLA":
+    st.header("Ticket Resolution Times (SLA)")
+    if use_snapshot("it_tickets", SLA_SNAPSHOT_COLUMNS):
+        st.caption("Percentiles of resolution_time_hours, computed exactly from the tickets snapshot.")
+    else:
+        st.caption("Percentiles of resolution_time_hours. Values are rounded up to the sketch's "
+                   "bucket edge, so they can read up to ~9% high but never low.")
+
+    # Choices come from the sketch itself (priorities / assignees that have resolution times)
+    by_week = load_sla(("week",), percentiles=(0.5,))
+    if by_week.empty:
+        st.info("No tickets with a resolution time yet. Load DATA/it_tickets.csv first.")
+        st.stop()
+    priorities = ["All"] + sorted(load_sla(("priority",), percentiles=(0.5,))["priority"].astype(str))
+    assignees = ["All"] + sorted(load_sla(("assigned_to",), percentiles=(0.5,))["assigned_to"].astype(str))
+
+    colA, colB, colC = st.columns(3)
+    filters = {
+        "priority": colA.selectbox("Priority", priorities),
+        "assigned_to": colB.selectbox("Assigned to", assignees),
+    }
+    first_week = pd.to_datetime(by_week["week"].loc[by_week["week"] >= 0].min(), unit="s").date()
+    last_week = pd.to_datetime(by_week["week"].max(), unit="s").date()
+    period = colC.date_input("Created between", value=(first_week, last_week + pd.Timedelta(days=6)),
+                             help="Whole weeks (Monday to Sunday) are counted.")
+    if len(period) != 2:
+        st.stop()  # the user is still picking the end date
+    # weeks starting in [after, before): push `before` past the end date's week
+    after, before = str(period[0]), str(period[1] + pd.Timedelta(days=7))
+
+    # Headline numbers, plus any percentile the user asks for
+    wanted = st.number_input("Percentile", min_value=1.0, max_value=100.0, value=95.0, step=1.0) / 100
+    fractions = tuple(dict.fromkeys((0.5, 0.9, 0.99, wanted)))
+    overall = load_sla((), filters, after, before, fractions)
+    if overall.empty:
+        st.info("No resolved tickets for these filters.")
+        st.stop()
+    cols = st.columns(len(fractions) + 1)
+    cols[0].metric("Tickets", f"{int(overall['tickets'].iloc[0]):,}")
+    for col, fraction in zip(cols[1:], fractions):
+        col.metric(f"p{fraction * 100:g}", f"{overall[percentile_column(fraction)].iloc[0]:.1f} h")
+
+    # Table: every priority x assignee combination
+    st.subheader("By Priority and Assignee")
+    st.dataframe(load_sla(("priority", "assigned_to"), filters, after, before).round(1), use_container_width=True)
+
+    # Line chart: p50 / p90 / p99 week by week
+    st.subheader("Week by Week")
+    weekly = load_sla(("week",), filters, after, before)
+    weekly = weekly[weekly["week"] >= 0].copy()
+    weekly["week"] = pd.to_datetime(weekly["week"], unit="s")
+    columns = [percentile_column(f) for f in (0.5, 0.9, 0.99)]
+    percentile_chart(weekly, columns, "Resolution Time Percentiles per Week")
+
+
+# =========================================================
+# PAGE 6: DIAGNOSTICS (admins only)
+# =========================================================
+# Shows where the app spends its time: SQLite calls (users.*, incidents.*, db.* ...),
+# DataFrame loads (frames.read_frame, home.load_df), Altair charts (home.*_chart)
+# and password checks (auth.*). The numbers come from app/data/metrics.py.
+elif page == "Diagnostics" and st.session_state.role == "admin":
+    st.header("Diagnostics")
+
+    colA, colB = st.columns(2)
+    recording = colA.toggle("Record timings", value=metrics.enabled(),
+                            help="Off by default; recording adds a little work to every timed call.")
+    metrics.enable(recording)
+    slow_ms = colB.number_input("Slow call threshold (ms)", min_value=1, value=int(metrics.SLOW_CALL_MS), step=50)
+    metrics.set_slow_threshold(slow_ms)
+
+    snapshot = metrics.snapshot()
+    if not snapshot["calls"]:
+        st.info("Nothing recorded yet. Switch on \"Record timings\" and use the other pages.")
+    else:
+        # One row per timed function, most total time first.
+        # Calls nest (home.load_df includes frames.read_frame), so totals overlap between rows.
+        st.subheader("Timed calls")
+        calls = pd.DataFrame.from_dict(snapshot["calls"], orient="index").rename_axis("call").reset_index()
+        calls.insert(0, "layer", calls["call"].str.split(".").str[0])
+        st.dataframe(calls.sort_values("total_ms", ascending=False).round(2), use_container_width=True)
+        st.caption("p50 / p95 / p99 are read from a latency histogram, so they are upper bounds "
+                   "accurate to within a factor of two.")
+
+        st.subheader(f"Slow calls (over {metrics.SLOW_CALL_MS:.0f} ms)")
+        if snapshot["slow"]:
+            st.dataframe(pd.DataFrame(snapshot["slow"][::-1]), use_container_width=True)
+        else:
+            st.info("No slow calls so far.")
+
+    colA, colB = st.columns(2)
+    colA.download_button("Download metrics (JSON)", json.dumps(snapshot, indent=2),
+                         file_name="metrics.json", mime="application/json")
+    if colB.button("Reset timings"):
+        metrics.reset()
+        st.rerun()
+
+
+# Drawn last so the numbers include the queries this rerun just made
+show_cache_stats()
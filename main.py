@@ -1,12 +1,37 @@
 # main.py
+from collections import Counter
+
 from app.data.schema import create_tables
 from app.services.user_service import migrate_users_from_txt
 from app.services.csv_loader import load_all_csv
 
-from app.data.users import get_all_users
-from app.data.incidents import get_all_incidents
-from app.data.datasets import get_all_datasets
-from app.data.tickets import get_all_tickets
+from app.data.users import iter_users
+from app.data.incidents import iter_incidents
+from app.data.datasets import iter_datasets
+from app.data.tickets import iter_tickets
+
+# Rows printed from each table; the rest are only counted
+PREVIEW_ROWS = 5
+
+def print_summary(title, rows, count_by=None):
+    """
+    Print the first PREVIEW_ROWS rows, the total and (optionally) rows per value of the
+    `count_by` attribute. `rows` is streamed, so a huge table never sits in memory at once.
+    """
+    print(f"\n{title}:")
+    counts = Counter()
+    total = 0
+    for row in rows:
+        if total < PREVIEW_ROWS:
+            print(f"    {row}")
+        if count_by:
+            counts[getattr(row, count_by)] += 1
+        total += 1
+    if total > PREVIEW_ROWS:
+        print(f"    ... {total - PREVIEW_ROWS:,} more")
+    print(f"  {total:,} rows")
+    if counts:
+        print(f"  by {count_by}: " + ", ".join(f"{value} {n:,}" for value, n in counts.most_common()))
 
 def main():
     print("STEP 1: Creating tables...")
@@ -18,17 +43,10 @@ def main():
     print("\nSTEP 3: Loading CSV files...")
     load_all_csv()
 
-    print("\nUsers in DB:")
-    print(get_all_users())
-
-    print("\nIncidents in DB:")
-    print(get_all_incidents())
-
-    print("\nDatasets in DB:")
-    print(get_all_datasets())
-
-    print("\nTickets in DB:")
-    print(get_all_tickets())
+    print_summary("Users in DB", iter_users(as_objects=True), count_by="role")
+    print_summary("Incidents in DB", iter_incidents(as_objects=True), count_by="severity")
+    print_summary("Datasets in DB", iter_datasets(as_objects=True), count_by="uploaded_by")
+    print_summary("Tickets in DB", iter_tickets(as_objects=True), count_by="status")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,14 @@
+# tests/conftest.py
+import pytest
+
+from app.data.db import configure_pool
+from app.data.schema import create_tables
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh, migrated database in tmp_path behind the process-wide pool."""
+    configure_pool(tmp_path / "test.db")
+    create_tables()
+    yield tmp_path / "test.db"
+    configure_pool()
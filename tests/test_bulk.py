@@ -0,0 +1,45 @@
+# tests/test_bulk.py
+import pytest
+
+from app.data.db import get_connection
+from app.data.incidents import (
+    delete_incidents_where, insert_incident, update_incident_status_many, update_incident_status_where,
+)
+from app.data.queries import mutation_where
+from app.data.tickets import insert_ticket, update_ticket_status_many
+
+
+def test_mutation_where_refuses_an_unfiltered_change():
+    with pytest.raises(ValueError, match="every row"):
+        mutation_where("cyber_incidents")
+    with pytest.raises(ValueError, match="every row"):
+        mutation_where("cyber_incidents", {"severity": "All", "status": None})
+
+
+def test_mutation_where_filters_and_time_range():
+    where, params = mutation_where("cyber_incidents", {"severity": "High"}, "timestamp",
+                                   before="2024-02-01", after="2024-01-01")
+    assert where == " WHERE severity = ? AND timestamp_epoch < ? AND timestamp_epoch >= ?"
+    assert params == ["High", 1706745600, 1704067200]
+
+
+def test_mutation_where_rejects_unknown_columns_and_bad_times():
+    with pytest.raises(ValueError):
+        mutation_where("cyber_incidents", {"no_such_column": "x"})
+    with pytest.raises(ValueError, match="as a time"):
+        mutation_where("cyber_incidents", None, "timestamp", before="not a date")
+
+
+def test_bulk_updates_and_deletes(db):
+    for i, (severity, day) in enumerate([("High", "01"), ("High", "15"), ("Low", "20")]):
+        insert_incident(i, f"2024-01-{day} 10:00:00", severity, "Malware", "Open", f"incident {i}")
+    for i in range(3):
+        insert_ticket(i, "u", f"ticket {i}", "Open", "2024-01-01")
+
+    assert update_incident_status_many([0, 2, 99], "Closed") == 2
+    assert update_ticket_status_many([0, 1], "Resolved") == 2
+    assert update_incident_status_where("Escalated", severity="High", after="2024-01-10") == 1
+    assert delete_incidents_where(status="Closed") == 2
+    with get_connection() as conn:
+        assert conn.execute("SELECT incident_id, status FROM cyber_incidents").fetchall() == [(1, "Escalated")]
+        assert conn.execute("SELECT COUNT(*) FROM it_tickets WHERE status = 'Resolved'").fetchone() == (2,)
@@ -0,0 +1,29 @@
+# tests/test_chart_data.py
+import pandas as pd
+
+from app.data.chart_data import OTHER_LABEL, fold_other
+
+
+def _counts(values):
+    return pd.DataFrame({"assigned_to": [f"user_{i}" for i in range(len(values))], "count": values})
+
+
+def test_many_tiny_slices_keep_the_biggest():
+    counts = _counts([5] * 50 + [4] * 150)  # every slice is under 1% of the total
+    folded = fold_other(counts, "assigned_to", "count", max_slices=8)
+    assert len(folded) == 8
+    assert folded["assigned_to"].iloc[-1] == OTHER_LABEL
+    assert folded["count"].head(7).tolist() == [5] * 7
+    assert folded["count"].sum() == counts["count"].sum()
+
+
+def test_few_slices_fold_only_tiny_ones():
+    counts = _counts([600, 300, 95, 3, 2])
+    folded = fold_other(counts, "assigned_to", "count", max_slices=8, min_share=0.01)
+    assert folded["assigned_to"].tolist() == ["user_0", "user_1", "user_2", OTHER_LABEL]
+    assert folded["count"].tolist() == [600, 300, 95, 5]
+
+
+def test_nothing_to_fold_returns_input():
+    counts = _counts([50, 30, 20])
+    assert fold_other(counts, "assigned_to", "count") is counts
@@ -0,0 +1,24 @@
+# tests/test_csv_pipeline.py
+from app.services.csv_pipeline import INCIDENT_COLUMNS, stream_rows
+
+
+def _rows(tmp_path, text):
+    path = tmp_path / "incidents.csv"
+    path.write_bytes(text.encode("utf-8"))
+    return [row for batch in stream_rows(path, INCIDENT_COLUMNS, workers=1) for row in batch]
+
+
+def test_control_characters_inside_fields_do_not_split_rows(tmp_path):
+    rows = _rows(tmp_path, "incident_id,timestamp,severity,category,status,description\n"
+                           '1,2024-01-01,High,DDoS,Open,"tab\x0bbreak\x1cand more"\n'
+                           "2,2024-01-02,Low,Malware,Closed,next\x85line\n")
+    assert [row[0] for row in rows] == [1, 2]
+    assert rows[0][-1] == "tab\x0bbreak\x1cand more"
+    assert rows[1][-1] == "next\x85line"
+
+
+def test_crlf_line_ends(tmp_path):
+    rows = _rows(tmp_path, "incident_id,timestamp,severity,category,status,description\r\n"
+                           "1,2024-01-01,High,DDoS,Open,first\r\n"
+                           "2,2024-01-02,Low,Malware,Closed,second\r\n")
+    assert [(row[0], row[-1]) for row in rows] == [(1, "first"), (2, "second")]
@@ -0,0 +1,28 @@
+# tests/test_frames.py
+import sqlite3
+
+import pandas as pd
+
+from app.data.frames import read_frame
+
+
+def _table(statuses):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER, status TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", list(enumerate(statuses)))
+    return conn
+
+
+def test_chunk_with_all_null_category_column():
+    statuses = ["Open", "Closed", "Open", "Open", "Closed"] + [None] * 5
+    df = read_frame("SELECT id, status FROM t ORDER BY id", conn=_table(statuses), chunksize=5)
+    assert isinstance(df["status"].dtype, pd.CategoricalDtype)
+    assert df["status"].isna().sum() == 5
+    assert df["status"].head(5).tolist() == statuses[:5]
+
+
+def test_chunks_with_different_categories():
+    statuses = ["Open"] * 5 + ["Closed"] * 5
+    df = read_frame("SELECT id, status FROM t ORDER BY id", conn=_table(statuses), chunksize=5)
+    assert isinstance(df["status"].dtype, pd.CategoricalDtype)
+    assert df["status"].tolist() == statuses
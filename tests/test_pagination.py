@@ -0,0 +1,57 @@
+# tests/test_pagination.py
+import pandas as pd
+
+from app.data.db import get_connection
+from app.data.incidents import insert_incident
+from app.data.queries import page_cursor, select_page
+
+
+def _pages(table, sort_column=None, descending=False, page_size=3, filters=None):
+    """Walk every page with the keyset cursor; returns the key of each row, in order."""
+    keys, after = [], None
+    with get_connection() as conn:
+        while True:
+            sql, params = select_page(table, filters, sort_column, descending, page_size, after)
+            page = pd.read_sql_query(sql, conn, params=params)
+            keys.extend(page["incident_id"].tolist())
+            if len(page) < page_size:
+                return keys
+            after = page_cursor(table, page.iloc[-1], sort_column)
+
+
+def _fill():
+    # equal timestamps and a missing one, so ties and NULLs have to be ordered by the key
+    stamps = ["2024-01-03", "2024-01-01", "2024-01-02", "2024-01-02", None, "2024-01-02", "2024-01-05", "2024-01-04"]
+    for i, stamp in enumerate(stamps):
+        insert_incident(100 + i, stamp, "High" if i % 2 else "Low", "Malware", "Open", f"incident {i}")
+    with get_connection() as conn:
+        return pd.read_sql_query("SELECT * FROM cyber_incidents", conn)
+
+
+def test_pages_by_key_cover_every_row_once(db):
+    rows = _fill()
+    assert _pages("cyber_incidents") == rows.sort_values("id")["incident_id"].tolist()
+    assert _pages("cyber_incidents", descending=True) == rows.sort_values("id", ascending=False)["incident_id"].tolist()
+
+
+def test_pages_by_time_break_ties_on_the_key(db):
+    rows = _fill()
+    rows["sort"] = rows["timestamp_epoch"].fillna(float("inf"))  # NULL sorts as '', after every number
+    ascending = rows.sort_values(["sort", "id"])["incident_id"].tolist()
+    assert _pages("cyber_incidents", "timestamp") == ascending
+    assert _pages("cyber_incidents", "timestamp", descending=True) == \
+        rows.sort_values(["sort", "id"], ascending=False)["incident_id"].tolist()
+
+
+def test_pages_with_a_filter(db):
+    rows = _fill()
+    high = rows[rows["severity"] == "High"].sort_values("id")["incident_id"].tolist()
+    assert _pages("cyber_incidents", filters={"severity": "High"}, page_size=2) == high
+
+
+def test_page_cursor_reads_epoch_and_missing_values():
+    row = {"id": 7, "timestamp": "2024-01-01", "timestamp_epoch": float("nan")}
+    assert page_cursor("cyber_incidents", row, "timestamp") == ("", 7)
+    row["timestamp_epoch"] = 1704067200
+    assert page_cursor("cyber_incidents", row, "timestamp") == (1704067200, 7)
+    assert page_cursor("cyber_incidents", row) == (7, 7)
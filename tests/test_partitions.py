@@ -0,0 +1,141 @@
+# tests/test_partitions.py
+import pytest
+
+from app.data.db import get_connection
+from app.data.incidents import (
+    delete_incident, insert_incident, iter_incidents, update_incident_status, update_incident_status_many,
+)
+from app.data.partitions import ALL_VIEW, HOT_TABLE, apply_retention, compress_partition, list_partitions, restore_partition
+from app.data.queries import count_by, count_rows
+from app.data.rollups import rebuild_rollups
+from app.data.search import search, search_page
+from app.data.write_behind import disable_write_behind, enable_write_behind, flush
+
+MONTHS = ["2024-01", "2024-02", "2024-03", "2024-04", "2024-05"]
+
+
+@pytest.fixture
+def incidents(db):
+    # four incidents a month; ids go up with time, except the late row loaded last
+    incident_id = 0
+    for month in MONTHS:
+        for day, severity in zip((3, 10, 17, 24), ("Low", "High", "High", "Critical")):
+            incident_id += 1
+            insert_incident(incident_id, f"{month}-{day:02d} 10:00:00", severity, "Phishing", "Open",
+                            f"host {incident_id} reported {'ransomware' if incident_id % 5 == 0 else 'spam'}")
+    insert_incident(100, "2024-01-28 10:00:00", "Low", "Malware", "Open", "late ransomware report")
+    return incident_id + 1
+
+
+def _rows(sql, params=()):
+    with get_connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def _counts():
+    """(count per severity, total) from the rollups, next to the same numbers counted on the view."""
+    by_severity = dict(_rows(*count_by(ALL_VIEW, "severity")))
+    total = _rows(*count_rows(ALL_VIEW))[0][0]
+    counted = dict(_rows(f"SELECT severity, COUNT(*) FROM {ALL_VIEW} GROUP BY 1"))
+    assert by_severity == counted and total == sum(counted.values())
+    return by_severity, total
+
+
+def _rollups():
+    return _rows("SELECT * FROM incident_daily_counts WHERE count != 0 ORDER BY 1, 2, 3, 4")
+
+
+def _check_search_index():
+    with get_connection() as conn:
+        conn.execute("INSERT INTO incidents_fts (incidents_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_retention_keeps_counts_search_and_rows(incidents):
+    before, rollups = _counts(), _rollups()
+    done = apply_retention(hot_months=2, compress_after_months=None)
+    assert list(done["moved"]) == [f"{HOT_TABLE}_2024_01", f"{HOT_TABLE}_2024_02", f"{HOT_TABLE}_2024_03"]
+    assert _rows(f"SELECT COUNT(*) FROM {HOT_TABLE}") == [(8,)]
+
+    assert _counts() == before
+    assert _rollups() == rollups
+    rebuild_rollups()
+    assert _rollups() == rollups
+    _check_search_index()
+    found = search(ALL_VIEW, "ransomware", {"category": "Phishing"})
+    assert sorted((row[2], row[0]) for row in found) == [(5, f"{HOT_TABLE}_2024_02"), (10, f"{HOT_TABLE}_2024_03"),
+                                                          (15, HOT_TABLE), (20, HOT_TABLE)]
+
+
+def test_search_newest_first_pages_across_tables(incidents):
+    apply_retention(hot_months=2, compress_after_months=None)
+    sql, params = search_page(ALL_VIEW, "spam", page_size=5, ranked=False)
+    first = _rows(sql, params)
+    sql, params = search_page(ALL_VIEW, "spam", page_size=50, after=(0.0, first[-1][1]), ranked=False)
+    ids = [row[1] for row in first + _rows(sql, params)]
+    assert ids == sorted(ids, reverse=True) and len(ids) == 16
+
+
+def test_iter_incidents_streams_each_table_in_id_order(incidents):
+    apply_retention(hot_months=2, compress_after_months=None)
+    ids = [row[0] for row in iter_incidents(batch_size=3)]
+    assert sorted(ids) == [id_ for (id_,) in _rows(f"SELECT id FROM {ALL_VIEW} ORDER BY id")]
+    # hot table first, then the archived months newest first
+    assert ids[:8] == [id_ for (id_,) in _rows(f"SELECT id FROM {HOT_TABLE} ORDER BY id")]
+    assert ids[-5:] == [id_ for (id_,) in _rows(f"SELECT id FROM {HOT_TABLE}_2024_01 ORDER BY id")]
+    assert [row.id for row in iter_incidents(("id",), after_id=18, as_objects=True)] == [19, 20, 21]
+
+
+def test_changes_reach_archived_incidents(incidents):
+    apply_retention(hot_months=2, compress_after_months=None)
+    january = f"{HOT_TABLE}_2024_01"
+    update_incident_status(2, "Closed")
+    update_incident_status_many([3, 100], "Resolved")
+    delete_incident(4)
+    assert _rows(f"SELECT incident_id, status FROM {january} ORDER BY incident_id") == [
+        (1, "Open"), (2, "Closed"), (3, "Resolved"), (100, "Resolved")]
+    assert dict(_rows(*count_by(ALL_VIEW, "status", {"category": "Phishing"})))["Closed"] == 1
+    _counts()
+    _check_search_index()
+
+
+def test_write_behind_routes_a_batch_to_the_partitions(incidents):
+    apply_retention(hot_months=2, compress_after_months=None)
+    enable_write_behind(interval=60)
+    try:
+        for incident_id in (1, 5, 20):
+            update_incident_status(incident_id, "Closed")
+        delete_incident(2)
+        flush()
+    finally:
+        disable_write_behind()
+    closed = _rows(f"SELECT source_table, incident_id FROM {ALL_VIEW} WHERE status = 'Closed' ORDER BY incident_id")
+    assert closed == [(f"{HOT_TABLE}_2024_01", 1), (f"{HOT_TABLE}_2024_02", 5), (HOT_TABLE, 20)]
+    assert _rows(f"SELECT COUNT(*) FROM {ALL_VIEW} WHERE incident_id = 2") == [(0,)]
+    assert dict(_rows(*count_by(ALL_VIEW, "status")))["Closed"] == 3  # the hot table's triggers are back too
+    _counts()
+
+
+def test_reloading_an_archived_incident_updates_it_in_place(incidents):
+    apply_retention(hot_months=2, compress_after_months=None)
+    insert_incident(6, "2024-02-10 12:00:00", "Low", "DDoS", "Closed", "host 6 reported spam")
+    insert_incident(7, "2024-05-30 12:00:00", "Low", "DDoS", "Closed", "host 7 moved on")
+    assert _rows(f"SELECT source_table, category FROM {ALL_VIEW} WHERE incident_id IN (6, 7) ORDER BY incident_id") == [
+        (f"{HOT_TABLE}_2024_02", "DDoS"), (HOT_TABLE, "DDoS")]
+    assert _counts()[1] == 21
+    _check_search_index()
+
+
+def test_compressing_is_refused_inside_the_window_and_restore_brings_rows_back(incidents, tmp_path):
+    apply_retention(hot_months=2, compress_after_months=None)
+    with pytest.raises(ValueError, match="within the newest"):
+        compress_partition(f"{HOT_TABLE}_2024_03", tmp_path, compress_after_months=3)
+    before = _counts()
+
+    compress_partition(f"{HOT_TABLE}_2024_01", tmp_path, compress_after_months=3)
+    assert [p["state"] for p in list_partitions()] == ["compressed", "table", "table"]
+    assert _counts()[1] == before[1] - 5
+    _check_search_index()
+
+    restore_partition(f"{HOT_TABLE}_2024_01")
+    assert _counts() == before
+    _check_search_index()
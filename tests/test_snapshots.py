@@ -0,0 +1,42 @@
+# tests/test_snapshots.py
+import shutil
+
+import pytest
+
+from app.data.db import configure_pool
+from app.data.schema import create_tables
+from app.data.sla import percentiles_from_tickets, resolution_percentiles
+from app.data.tickets import insert_ticket
+from app.services.snapshots import has_snapshot, read_snapshot, write_snapshots
+
+SLA_COLUMNS = ["created_epoch", "priority", "assigned_to", "resolution_hours"]
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    configure_pool(tmp_path / "snapshots.db")
+    create_tables()
+    for i, hours in enumerate([1.0, 2.5, 4.0, 8.0, 30.0, None]):
+        insert_ticket(i, "u", f"issue {i}", "Resolved", f"2024-03-{i + 1:02d} 09:00:00",
+                      "High" if i % 2 else "Low", "IT_Support_A", hours)
+    root = tmp_path / "snapshots"
+    write_snapshots(root=root)
+    yield root
+    configure_pool()
+
+
+def test_ticket_snapshot_has_the_sla_columns(snapshots):
+    assert has_snapshot("it_tickets", SLA_COLUMNS, root=snapshots)
+    tickets = read_snapshot("it_tickets", SLA_COLUMNS, root=snapshots).to_pandas()
+    expected = resolution_percentiles(("priority",), (0.5, 0.9), exact=True)
+    computed = percentiles_from_tickets(tickets, ("priority",), (0.5, 0.9))
+    assert computed["priority"].astype(str).tolist() == expected["priority"].astype(str).tolist()
+    for column in ("tickets", "p50_hours", "p90_hours"):
+        assert computed[column].tolist() == expected[column].tolist()
+
+
+def test_missing_table_folder_is_not_a_snapshot(snapshots):
+    shutil.rmtree(snapshots / "it_tickets")
+    assert not has_snapshot("it_tickets", root=snapshots)
+    assert read_snapshot("it_tickets", root=snapshots) is None
+    assert has_snapshot("cyber_incidents", root=snapshots)
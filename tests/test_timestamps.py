@@ -0,0 +1,32 @@
+# tests/test_timestamps.py
+import logging
+
+from app.data.timestamps import to_epoch
+
+MARCH_15_1430 = 1710513000  # 2024-03-15 14:30:00 UTC
+
+
+def test_iso_values():
+    assert to_epoch(["2024-03-15 14:30:00", "2024-03-15T14:30:00", "2024-03-15T16:30:00+02:00"]) == [MARCH_15_1430] * 3
+    assert to_epoch(["2024-03-15"]) == [MARCH_15_1430 - 14 * 3600 - 30 * 60]
+
+
+def test_other_formats_fall_back_to_lenient_parsing():
+    assert to_epoch(["03/15/2024 14:30", "15 Mar 2024 14:30", "March 15, 2024 2:30 PM"]) == [MARCH_15_1430] * 3
+
+
+def test_iso_and_other_formats_mixed():
+    assert to_epoch(["2024-03-15 14:30:00", "03/15/2024 14:30"]) == [MARCH_15_1430, MARCH_15_1430]
+
+
+def test_empty_and_unparseable_values_are_none(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.timestamps"):
+        assert to_epoch(["", None, "   ", "not a date", "2024-03-15 14:30:00"]) == [None, None, None, None, MARCH_15_1430]
+    assert "1 of 5 timestamps could not be parsed" in caplog.text  # empty values aren't counted
+
+
+def test_nothing_logged_when_everything_parses(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.timestamps"):
+        to_epoch(["2024-03-15", "03/15/2024", None])
+    assert caplog.text == ""
+    assert to_epoch([]) == []
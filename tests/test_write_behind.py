@@ -0,0 +1,56 @@
+# tests/test_write_behind.py
+import pytest
+
+from app.data.db import get_connection
+from app.data.tickets import delete_ticket, insert_ticket, update_ticket_status
+from app.data.write_behind import WriteBehindError, disable_write_behind, enable_write_behind, flush, write_row
+
+
+@pytest.fixture
+def queue(db):
+    # a long interval: nothing is written until flush()
+    yield enable_write_behind(interval=60)
+    disable_write_behind()
+
+
+def _tickets():
+    with get_connection() as conn:
+        return conn.execute("SELECT ticket_id, status FROM it_tickets ORDER BY ticket_id").fetchall()
+
+
+def test_changes_wait_for_flush_and_coalesce(queue):
+    insert_ticket(1, "u", "issue", "Open", "2024-01-01")
+    for status in ["In Progress", "Waiting for User", "Resolved"]:
+        update_ticket_status(1, status)
+    assert _tickets() == [(1, "Open")]
+    flush()
+    assert _tickets() == [(1, "Resolved")]
+    stats = queue.stats()
+    assert (stats["written"], stats["coalesced"], stats["pending"]) == (1, 2, 0)
+
+
+def test_delete_after_update_runs_last(queue):
+    insert_ticket(1, "u", "issue", "Open", "2024-01-01")
+    update_ticket_status(1, "Resolved")
+    delete_ticket(1)
+    update_ticket_status(1, "Closed")  # coalesced into the first update, so it keeps its place before the delete
+    flush()
+    assert _tickets() == []
+
+
+def test_synchronous_insert_is_not_undone_by_a_queued_delete(queue):
+    insert_ticket(1, "u", "issue", "Open", "2024-01-01")
+    delete_ticket(1)
+    insert_ticket(1, "u", "issue again", "Open", "2024-01-01")
+    flush()
+    assert _tickets() == [(1, "Open")]
+
+
+def test_flush_reports_failed_changes_once(queue):
+    insert_ticket(1, "u", "issue", "Open", "2024-01-01")
+    update_ticket_status(1, "Resolved")
+    write_row("it_tickets", "UPDATE no_such_table SET status = ?", ("x",), "bad")
+    with pytest.raises(WriteBehindError, match="1 queued change"):
+        flush()
+    assert _tickets() == [(1, "Resolved")]  # the rest of the batch was still written
+    flush()  # already reported